@@ -1,7 +1,8 @@
 import dataclasses
 import logging
 import time
-from typing import Optional, Tuple
+from concurrent.futures import Executor, Future
+from typing import List, Optional, Tuple
 
 from blspy import AugSchemeMPL
 
@@ -34,6 +35,50 @@ from chia.util.ints import uint8, uint32, uint64, uint128
 log = logging.getLogger(__name__)
 
 
+class VDFChecks:
+    """
+    Checks the VDF proofs of a block. Without an executor, each proof is checked when it is reached. With an executor,
+    the proofs are checked in parallel with each other and with the rest of the validation (including the proof of
+    space), and join returns the error of the first proof that is not valid.
+    """
+
+    def __init__(self, executor: Optional[Executor] = None):
+        self.executor = executor
+        self.pending: List[Tuple[Future, ValidationError]] = []
+
+    def is_valid(
+        self,
+        proof: VDFProof,
+        error: ValidationError,
+        constants: ConsensusConstants,
+        input_el: ClassgroupElement,
+        info: VDFInfo,
+        target_vdf_info: Optional[VDFInfo] = None,
+    ) -> bool:
+        """
+        Returns whether the proof is valid, or True if the check was submitted to the executor.
+        """
+        if self.executor is None:
+            return proof.is_valid(constants, input_el, info, target_vdf_info)
+        self.pending.append((self.executor.submit(proof.is_valid, constants, input_el, info, target_vdf_info), error))
+        return True
+
+    def join(self) -> Optional[ValidationError]:
+        pending, self.pending = self.pending, []
+        error: Optional[ValidationError] = None
+        for future, proof_error in pending:
+            if error is not None:
+                future.cancel()
+            elif not future.result():
+                error = proof_error
+        return error
+
+    def cancel(self) -> None:
+        for future, _ in self.pending:
+            future.cancel()
+        self.pending = []
+
+
 # noinspection PyCallByClass
 def validate_unfinished_header_block(
     constants: ConsensusConstants,
@@ -45,6 +90,7 @@ def validate_unfinished_header_block(
     skip_overflow_last_ss_validation: bool = False,
     skip_vdf_is_valid: bool = False,
     check_sub_epoch_summary=True,
+    executor: Optional[Executor] = None,
 ) -> Tuple[Optional[uint64], Optional[ValidationError]]:
     """
     Validates an unfinished header block. This is a block without the infusion VDFs (unfinished)
@@ -56,6 +102,46 @@ def validate_unfinished_header_block(
     released, header_block.finished_sub_slots will be missing one sub-slot. In this case,
     skip_overflow_last_ss_validation must be set to True. This will skip validation of end of slots, sub-epochs,
     and lead to other small tweaks in validation.
+
+    If an executor is passed, the VDF proofs are checked in it, in parallel. An invalid block is still rejected, but
+    when it has several errors, the error returned might not be the first one.
+    """
+    vdf_checks = VDFChecks(executor)
+    required_iters, error = _validate_unfinished_header_block(
+        constants,
+        blocks,
+        header_block,
+        check_filter,
+        expected_difficulty,
+        expected_sub_slot_iters,
+        skip_overflow_last_ss_validation,
+        skip_vdf_is_valid,
+        check_sub_epoch_summary,
+        vdf_checks,
+    )
+    if error is not None:
+        vdf_checks.cancel()
+        return None, error
+    error = vdf_checks.join()
+    if error is not None:
+        return None, error
+    return required_iters, None
+
+
+def _validate_unfinished_header_block(
+    constants: ConsensusConstants,
+    blocks: BlockchainInterface,
+    header_block: UnfinishedHeaderBlock,
+    check_filter: bool,
+    expected_difficulty: uint64,
+    expected_sub_slot_iters: uint64,
+    skip_overflow_last_ss_validation: bool,
+    skip_vdf_is_valid: bool,
+    check_sub_epoch_summary: bool,
+    vdf_checks: VDFChecks,
+) -> Tuple[Optional[uint64], Optional[ValidationError]]:
+    """
+    Validates an unfinished header block, the VDF proofs might still be checked by vdf_checks when this returns.
     """
     # 1. Check that the previous block exists in the blockchain, or that it is correct
 
@@ -198,14 +284,21 @@ def validate_unfinished_header_block(
                     if not skip_vdf_is_valid:
                         if (
                             not sub_slot.proofs.infused_challenge_chain_slot_proof.normalized_to_identity
-                            and not sub_slot.proofs.infused_challenge_chain_slot_proof.is_valid(
-                                constants, icc_vdf_input, target_vdf_info, None
+                            and not vdf_checks.is_valid(
+                                sub_slot.proofs.infused_challenge_chain_slot_proof,
+                                ValidationError(Err.INVALID_ICC_EOS_VDF),
+                                constants,
+                                icc_vdf_input,
+                                target_vdf_info,
+                                None,
                             )
                         ):
                             return None, ValidationError(Err.INVALID_ICC_EOS_VDF)
                         if (
                             sub_slot.proofs.infused_challenge_chain_slot_proof.normalized_to_identity
-                            and not sub_slot.proofs.infused_challenge_chain_slot_proof.is_valid(
+                            and not vdf_checks.is_valid(
+                                sub_slot.proofs.infused_challenge_chain_slot_proof,
+                                ValidationError(Err.INVALID_ICC_EOS_VDF),
                                 constants,
                                 ClassgroupElement.get_default_element(),
                                 sub_slot.infused_challenge_chain.infused_challenge_chain_end_of_slot_vdf,
@@ -305,7 +398,9 @@ def validate_unfinished_header_block(
                 eos_vdf_iters,
                 sub_slot.reward_chain.end_of_slot_vdf.output,
             )
-            if not skip_vdf_is_valid and not sub_slot.proofs.reward_chain_slot_proof.is_valid(
+            if not skip_vdf_is_valid and not vdf_checks.is_valid(
+                sub_slot.proofs.reward_chain_slot_proof,
+                ValidationError(Err.INVALID_RC_EOS_VDF),
                 constants,
                 ClassgroupElement.get_default_element(),
                 sub_slot.reward_chain.end_of_slot_vdf,
@@ -337,20 +432,21 @@ def validate_unfinished_header_block(
             if not skip_vdf_is_valid:
                 # Pass in None for target info since we are only checking the proof from the temporary point,
                 # but the challenge_chain_end_of_slot_vdf actually starts from the start of slot (for light clients)
-                if (
-                    not sub_slot.proofs.challenge_chain_slot_proof.normalized_to_identity
-                    and not sub_slot.proofs.challenge_chain_slot_proof.is_valid(
-                        constants, cc_start_element, partial_cc_vdf_info, None
-                    )
+                if not sub_slot.proofs.challenge_chain_slot_proof.normalized_to_identity and not vdf_checks.is_valid(
+                    sub_slot.proofs.challenge_chain_slot_proof,
+                    ValidationError(Err.INVALID_CC_EOS_VDF),
+                    constants,
+                    cc_start_element,
+                    partial_cc_vdf_info,
+                    None,
                 ):
                     return None, ValidationError(Err.INVALID_CC_EOS_VDF)
-                if (
-                    sub_slot.proofs.challenge_chain_slot_proof.normalized_to_identity
-                    and not sub_slot.proofs.challenge_chain_slot_proof.is_valid(
-                        constants,
-                        ClassgroupElement.get_default_element(),
-                        sub_slot.challenge_chain.challenge_chain_end_of_slot_vdf,
-                    )
+                if sub_slot.proofs.challenge_chain_slot_proof.normalized_to_identity and not vdf_checks.is_valid(
+                    sub_slot.proofs.challenge_chain_slot_proof,
+                    ValidationError(Err.INVALID_CC_EOS_VDF),
+                    constants,
+                    ClassgroupElement.get_default_element(),
+                    sub_slot.challenge_chain.challenge_chain_end_of_slot_vdf,
                 ):
                     return None, ValidationError(Err.INVALID_CC_EOS_VDF)
 
@@ -609,7 +705,9 @@ def validate_unfinished_header_block(
             rc_vdf_iters,
             header_block.reward_chain_block.reward_chain_sp_vdf.output,
         )
-        if not skip_vdf_is_valid and not header_block.reward_chain_sp_proof.is_valid(
+        if not skip_vdf_is_valid and not vdf_checks.is_valid(
+            header_block.reward_chain_sp_proof,
+            ValidationError(Err.INVALID_RC_SP_VDF),
             constants,
             rc_vdf_input,
             header_block.reward_chain_block.reward_chain_sp_vdf,
@@ -659,18 +757,21 @@ def validate_unfinished_header_block(
         ):
             return None, ValidationError(Err.INVALID_CC_SP_VDF)
         if not skip_vdf_is_valid:
-            if (
-                not header_block.challenge_chain_sp_proof.normalized_to_identity
-                and not header_block.challenge_chain_sp_proof.is_valid(constants, cc_vdf_input, target_vdf_info, None)
+            if not header_block.challenge_chain_sp_proof.normalized_to_identity and not vdf_checks.is_valid(
+                header_block.challenge_chain_sp_proof,
+                ValidationError(Err.INVALID_CC_SP_VDF),
+                constants,
+                cc_vdf_input,
+                target_vdf_info,
+                None,
             ):
                 return None, ValidationError(Err.INVALID_CC_SP_VDF)
-            if (
-                header_block.challenge_chain_sp_proof.normalized_to_identity
-                and not header_block.challenge_chain_sp_proof.is_valid(
-                    constants,
-                    ClassgroupElement.get_default_element(),
-                    header_block.reward_chain_block.challenge_chain_sp_vdf,
-                )
+            if header_block.challenge_chain_sp_proof.normalized_to_identity and not vdf_checks.is_valid(
+                header_block.challenge_chain_sp_proof,
+                ValidationError(Err.INVALID_CC_SP_VDF),
+                constants,
+                ClassgroupElement.get_default_element(),
+                header_block.reward_chain_block.challenge_chain_sp_vdf,
             ):
                 return None, ValidationError(Err.INVALID_CC_SP_VDF)
     else:
@@ -832,10 +933,47 @@ def validate_finished_header_block(
     expected_difficulty: uint64,
     expected_sub_slot_iters: uint64,
     check_sub_epoch_summary=True,
+    executor: Optional[Executor] = None,
 ) -> Tuple[Optional[uint64], Optional[ValidationError]]:
     """
     Fully validates the header of a block. A header block is the same  as a full block, but
     without transactions and transaction info. Returns (required_iters, error).
+
+    If an executor is passed, the VDF proofs are checked in it, in parallel. An invalid block is still rejected, but
+    when it has several errors, the error returned might not be the first one.
+    """
+    vdf_checks = VDFChecks(executor)
+    required_iters, error = _validate_finished_header_block(
+        constants,
+        blocks,
+        header_block,
+        check_filter,
+        expected_difficulty,
+        expected_sub_slot_iters,
+        check_sub_epoch_summary,
+        vdf_checks,
+    )
+    if error is not None:
+        vdf_checks.cancel()
+        return None, error
+    error = vdf_checks.join()
+    if error is not None:
+        return None, error
+    return required_iters, None
+
+
+def _validate_finished_header_block(
+    constants: ConsensusConstants,
+    blocks: BlockchainInterface,
+    header_block: HeaderBlock,
+    check_filter: bool,
+    expected_difficulty: uint64,
+    expected_sub_slot_iters: uint64,
+    check_sub_epoch_summary: bool,
+    vdf_checks: VDFChecks,
+) -> Tuple[Optional[uint64], Optional[ValidationError]]:
+    """
+    Fully validates the header of a block, the VDF proofs might still be checked by vdf_checks when this returns.
     """
     unfinished_header_block = UnfinishedHeaderBlock(
         header_block.finished_sub_slots,
@@ -847,7 +985,7 @@ def validate_finished_header_block(
         header_block.transactions_filter,
     )
 
-    required_iters, validate_unfinished_err = validate_unfinished_header_block(
+    required_iters, validate_unfinished_err = _validate_unfinished_header_block(
         constants,
         blocks,
         unfinished_header_block,
@@ -855,7 +993,9 @@ def validate_finished_header_block(
         expected_difficulty,
         expected_sub_slot_iters,
         False,
-        check_sub_epoch_summary=check_sub_epoch_summary,
+        False,
+        check_sub_epoch_summary,
+        vdf_checks,
     )
 
     genesis_block = False
@@ -950,25 +1090,23 @@ def validate_finished_header_block(
         log.error(f"{header_block.reward_chain_block.challenge_chain_ip_vdf }. expected {expected}")
         log.error(f"Block: {header_block}")
         return None, ValidationError(Err.INVALID_CC_IP_VDF)
-    if (
-        not header_block.challenge_chain_ip_proof.normalized_to_identity
-        and not header_block.challenge_chain_ip_proof.is_valid(
-            constants,
-            cc_vdf_output,
-            cc_target_vdf_info,
-            None,
-        )
+    if not header_block.challenge_chain_ip_proof.normalized_to_identity and not vdf_checks.is_valid(
+        header_block.challenge_chain_ip_proof,
+        ValidationError(Err.INVALID_CC_IP_VDF),
+        constants,
+        cc_vdf_output,
+        cc_target_vdf_info,
+        None,
     ):
         log.error(f"Did not validate, output {cc_vdf_output}")
         log.error(f"Block: {header_block}")
         return None, ValidationError(Err.INVALID_CC_IP_VDF)
-    if (
-        header_block.challenge_chain_ip_proof.normalized_to_identity
-        and not header_block.challenge_chain_ip_proof.is_valid(
-            constants,
-            ClassgroupElement.get_default_element(),
-            header_block.reward_chain_block.challenge_chain_ip_vdf,
-        )
+    if header_block.challenge_chain_ip_proof.normalized_to_identity and not vdf_checks.is_valid(
+        header_block.challenge_chain_ip_proof,
+        ValidationError(Err.INVALID_CC_IP_VDF),
+        constants,
+        ClassgroupElement.get_default_element(),
+        header_block.reward_chain_block.challenge_chain_ip_vdf,
     ):
         return None, ValidationError(Err.INVALID_CC_IP_VDF)
 
@@ -978,7 +1116,9 @@ def validate_finished_header_block(
         ip_vdf_iters,
         header_block.reward_chain_block.reward_chain_ip_vdf.output,
     )
-    if not header_block.reward_chain_ip_proof.is_valid(
+    if not vdf_checks.is_valid(
+        header_block.reward_chain_ip_proof,
+        ValidationError(Err.INVALID_RC_IP_VDF),
         constants,
         ClassgroupElement.get_default_element(),
         header_block.reward_chain_block.reward_chain_ip_vdf,
@@ -1039,7 +1179,9 @@ def validate_finished_header_block(
                 header_block.reward_chain_block.infused_challenge_chain_ip_vdf.output,
             )
 
-            if icc_vdf_input is None or not header_block.infused_challenge_chain_ip_proof.is_valid(
+            if icc_vdf_input is None or not vdf_checks.is_valid(
+                header_block.infused_challenge_chain_ip_proof,
+                ValidationError(Err.INVALID_ICC_VDF, "invalid icc proof"),
                 constants,
                 icc_vdf_input,
                 header_block.reward_chain_block.infused_challenge_chain_ip_vdf,
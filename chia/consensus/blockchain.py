@@ -2,9 +2,11 @@ import asyncio
 import dataclasses
 import logging
 import multiprocessing
+import time
 from concurrent.futures.process import ProcessPoolExecutor
 from enum import Enum
-from typing import Dict, List, Optional, Set, Tuple, Union
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple, Union
 
 from chia.consensus.block_body_validation import validate_block_body
 from chia.consensus.block_header_validation import validate_finished_header_block, validate_unfinished_header_block
@@ -15,8 +17,14 @@ from chia.consensus.cost_calculator import NPCResult
 from chia.consensus.difficulty_adjustment import get_next_sub_slot_iters_and_difficulty
 from chia.consensus.find_fork_point import find_fork_point_in_chain
 from chia.consensus.full_block_to_block_record import block_to_block_record
-from chia.consensus.multiprocess_validation import PreValidationResult, pre_validate_blocks_multiprocessing
+from chia.consensus.multiprocess_validation import (
+    PreValidationContext,
+    PreValidationResult,
+    pre_validate_blocks_multiprocessing,
+)
+from chia.full_node.block_height_map import BlockHeightMap
 from chia.full_node.block_store import BlockStore
+from chia.full_node.chain_snapshot import ChainSnapshot, read_chain_snapshot, write_chain_snapshot
 from chia.full_node.coin_store import CoinStore
 from chia.full_node.mempool_check_conditions import get_name_puzzle_conditions
 from chia.types.blockchain_format.coin import Coin
@@ -26,6 +34,7 @@ from chia.types.blockchain_format.vdf import VDFInfo
 from chia.types.coin_record import CoinRecord
 from chia.types.end_of_slot_bundle import EndOfSubSlotBundle
 from chia.types.full_block import FullBlock
+from chia.types.full_block_view import FullBlockView
 from chia.types.generator_types import BlockGenerator, GeneratorArg
 from chia.types.header_block import HeaderBlock
 from chia.types.unfinished_block import UnfinishedBlock
@@ -38,6 +47,11 @@ from chia.util.streamable import recurse_jsonify
 
 log = logging.getLogger(__name__)
 
+# Number of heights read at a time by stream_header_blocks_in_range
+HEADER_BLOCKS_BATCH_SIZE = 32
+# Seconds between the chain snapshots written while blocks are added, one is also written on shut down
+SNAPSHOT_INTERVAL = 600
+
 
 class ReceiveBlockResult(Enum):
     """
@@ -63,22 +77,23 @@ class Blockchain(BlockchainInterface):
     __block_records: Dict[bytes32, BlockRecord]
     # all hashes of blocks in block_record by height, used for garbage collection
     __heights_in_cache: Dict[uint32, Set[bytes32]]
-    # Defines the path from genesis to the peak, no orphan blocks
-    __height_to_hash: Dict[uint32, bytes32]
-    # All sub-epoch summaries that have been included in the blockchain from the beginning until and including the peak
-    # (height_included, SubEpochSummary). Note: ONLY for the blocks in the path to the peak
-    __sub_epoch_summaries: Dict[uint32, SubEpochSummary] = {}
+    # Defines the path from genesis to the peak, no orphan blocks, and the sub-epoch summaries included in that path
+    __height_map: BlockHeightMap
     # Unspent Store
     coin_store: CoinStore
     # Store
     block_store: BlockStore
     # Used to verify blocks in parallel
     pool: ProcessPoolExecutor
+    pre_validation_context: PreValidationContext
     # Set holding seen compact proofs, in order to avoid duplicates.
     _seen_compact_proofs: Set[Tuple[VDFInfo, uint32]]
 
     # Whether blockchain is shut down or not
     _shut_down: bool
+    # File with the block records kept in memory, read on startup instead of the database when it matches the peak
+    _snapshot_path: Optional[Path]
+    _last_snapshot_time: float
 
     # Lock to prevent simultaneous reads and writes
     lock: asyncio.Lock
@@ -89,11 +104,12 @@ class Blockchain(BlockchainInterface):
         coin_store: CoinStore,
         block_store: BlockStore,
         consensus_constants: ConsensusConstants,
+        db_path: Optional[Path] = None,
     ):
         """
         Initializes a blockchain with the BlockRecords from disk, assuming they have all been
         validated. Uses the genesis block given in override_constants, or as a fallback,
-        in the consensus constants config.
+        in the consensus constants config. The height to hash map is saved next to db_path, if given.
         """
         self = Blockchain()
         self.lock = asyncio.Lock()  # External lock handled by full node
@@ -102,32 +118,42 @@ class Blockchain(BlockchainInterface):
         if cpu_count > 61:
             cpu_count = 61  # Windows Server 2016 has an issue https://bugs.python.org/issue26903
         num_workers = max(cpu_count - 2, 1)
-        self.pool = ProcessPoolExecutor(max_workers=num_workers)
+        self.constants = consensus_constants
+        self.constants_json = recurse_jsonify(dataclasses.asdict(self.constants))
+        self.pre_validation_context = PreValidationContext(self.constants_json, num_workers)
+        self.pool = self.pre_validation_context.pool
         log.info(f"Started {num_workers} processes for block validation")
 
-        self.constants = consensus_constants
         self.coin_store = coin_store
         self.block_store = block_store
-        self.constants_json = recurse_jsonify(dataclasses.asdict(self.constants))
         self._shut_down = False
-        await self._load_chain_from_store()
+        self._snapshot_path = None if db_path is None else db_path.with_name(f"{db_path.stem}-chain-snapshot")
+        self._last_snapshot_time = time.time()
+        await self._load_chain_from_store(db_path)
         self._seen_compact_proofs = set()
         return self
 
     def shut_down(self):
         self._shut_down = True
-        self.pool.shutdown(wait=True)
+        self.pre_validation_context.shut_down()
+        self.save_snapshot()
 
-    async def _load_chain_from_store(self) -> None:
+    async def _load_chain_from_store(self, db_path: Optional[Path]) -> None:
         """
         Initializes the state of the Blockchain class from the database.
         """
-        height_to_hash, sub_epoch_summaries = await self.block_store.get_peak_height_dicts()
-        self.__height_to_hash = height_to_hash
-        self.__sub_epoch_summaries = sub_epoch_summaries
+        self.__height_map = await BlockHeightMap.create(self.block_store, db_path)
         self.__block_records = {}
         self.__heights_in_cache = {}
-        block_records, peak = await self.block_store.get_block_records_close_to_peak(self.constants.BLOCKS_CACHE_SIZE)
+        start_time = time.time()
+        block_records, peak = await self._read_snapshot()
+        source = "chain snapshot"
+        if block_records is None:
+            block_records, peak = await self.block_store.get_block_records_close_to_peak(
+                self.constants.BLOCKS_CACHE_SIZE
+            )
+            source = "database"
+        log.info(f"Loaded {len(block_records)} block records from the {source} in {time.time() - start_time:.3f}s")
         for block in block_records.values():
             self.add_block_record(block)
 
@@ -138,7 +164,45 @@ class Blockchain(BlockchainInterface):
 
         assert peak is not None
         self._peak_height = self.block_record(peak).height
-        assert len(self.__height_to_hash) == self._peak_height + 1
+        assert self.__height_map.contains_height(self._peak_height)
+        assert not self.__height_map.contains_height(uint32(self._peak_height + 1))
+
+    async def _read_snapshot(self) -> Tuple[Optional[Dict[bytes32, BlockRecord]], Optional[bytes32]]:
+        """
+        Returns the block records and the peak of the chain snapshot, if it has the same peak and the same number of
+        block records close to the peak as the database.
+        """
+        if self._snapshot_path is None:
+            return None, None
+        snapshot = read_chain_snapshot(self._snapshot_path)
+        if snapshot is None:
+            return None, None
+        peak = await self.block_store.get_peak()
+        if peak is None or peak[0] != snapshot.peak_hash:
+            log.info("The chain snapshot is not at the peak of the database")
+            return None, None
+        count = await self.block_store.count_block_records_from(peak[1] - self.constants.BLOCKS_CACHE_SIZE)
+        if count != len(snapshot.block_records):
+            log.info("The chain snapshot does not have the same block records as the database")
+            return None, None
+        return {record.header_hash: record for record in snapshot.block_records}, snapshot.peak_hash
+
+    def save_snapshot(self) -> None:
+        """
+        Writes the block records close to the peak to the chain snapshot, which is read on the next startup.
+        """
+        if self._snapshot_path is None:
+            return None
+        peak = self.get_peak()
+        if peak is None:
+            return None
+        min_height = peak.height - self.constants.BLOCKS_CACHE_SIZE
+        block_records = [record for record in self.__block_records.values() if record.height >= min_height]
+        try:
+            write_chain_snapshot(self._snapshot_path, ChainSnapshot(peak.header_hash, block_records))
+        except OSError as e:
+            log.error(f"Could not write the chain snapshot: {e}")
+        self._last_snapshot_time = time.time()
 
     def get_peak(self) -> Optional[BlockRecord]:
         """
@@ -268,11 +332,11 @@ class Blockchain(BlockchainInterface):
                 # Then update the memory cache. It is important that this task is not cancelled and does not throw
                 self.add_block_record(block_record)
                 for fetched_block_record in records:
-                    self.__height_to_hash[fetched_block_record.height] = fetched_block_record.header_hash
-                    if fetched_block_record.sub_epoch_summary_included is not None:
-                        self.__sub_epoch_summaries[
-                            fetched_block_record.height
-                        ] = fetched_block_record.sub_epoch_summary_included
+                    self.__height_map.update_height(
+                        fetched_block_record.height,
+                        fetched_block_record.header_hash,
+                        fetched_block_record.sub_epoch_summary_included,
+                    )
                 if peak_height is not None:
                     self._peak_height = peak_height
             except BaseException:
@@ -280,6 +344,11 @@ class Blockchain(BlockchainInterface):
                 await self.block_store.db_wrapper.rollback_transaction()
                 raise
         if fork_height is not None:
+            # The saved map and the snapshot are checked against the database on startup, so they are written after
+            # the commit
+            await self.__height_map.maybe_flush()
+            if time.time() - self._last_snapshot_time > SNAPSHOT_INTERVAL:
+                self.save_snapshot()
             return ReceiveBlockResult.NEW_PEAK, None, fork_height
         else:
             return ReceiveBlockResult.ADDED_AS_ORPHAN, None, None
@@ -326,13 +395,7 @@ class Blockchain(BlockchainInterface):
             if block_record.prev_hash != peak.header_hash:
                 await self.coin_store.rollback_to_block(fork_height)
             # Rollback sub_epoch_summaries
-            heights_to_delete = []
-            for ses_included_height in self.__sub_epoch_summaries.keys():
-                if ses_included_height > fork_height:
-                    heights_to_delete.append(ses_included_height)
-            for height in heights_to_delete:
-                log.info(f"delete ses at height {height}")
-                del self.__sub_epoch_summaries[height]
+            self.__height_map.rollback(fork_height)
 
             # Collect all blocks from fork point to new peak
             blocks_to_add: List[Tuple[FullBlock, BlockRecord]] = []
@@ -350,6 +413,7 @@ class Blockchain(BlockchainInterface):
                 curr = fetched_block_record.prev_hash
 
             records_to_add = []
+            coin_changes: List[Tuple[FullBlock, List[Coin], List[bytes32]]] = []
             for fetched_full_block, fetched_block_record in reversed(blocks_to_add):
                 records_to_add.append(fetched_block_record)
                 if fetched_block_record.is_transaction_block:
@@ -359,7 +423,8 @@ class Blockchain(BlockchainInterface):
                         )
                     else:
                         tx_removals, tx_additions = await self.get_tx_removals_and_additions(fetched_full_block, None)
-                    await self.coin_store.new_block(fetched_full_block, tx_additions, tx_removals)
+                    coin_changes.append((fetched_full_block, tx_additions, tx_removals))
+            await self.coin_store.new_blocks(coin_changes)
 
             # Changes the peak to be the new peak
             await self.block_store.set_peak(block_record.header_hash)
@@ -369,7 +434,7 @@ class Blockchain(BlockchainInterface):
         return None, None, []
 
     async def get_tx_removals_and_additions(
-        self, block: FullBlock, npc_result: Optional[NPCResult] = None
+        self, block: Union[FullBlock, FullBlockView], npc_result: Optional[NPCResult] = None
     ) -> Tuple[List[bytes32], List[Coin]]:
         if block.is_transaction_block():
             if block.transactions_generator is not None:
@@ -543,7 +608,7 @@ class Blockchain(BlockchainInterface):
         return PreValidationResult(None, required_iters, cost_result)
 
     async def pre_validate_blocks_multiprocessing(
-        self, blocks: List[FullBlock], npc_results: Dict[uint32, NPCResult], batch_size: int = 4
+        self, blocks: List[FullBlock], npc_results: Dict[uint32, NPCResult], batch_size: Optional[int] = None
     ) -> Optional[List[PreValidationResult]]:
         return await pre_validate_blocks_multiprocessing(
             self.constants,
@@ -555,6 +620,7 @@ class Blockchain(BlockchainInterface):
             npc_results,
             self.get_block_generator,
             batch_size,
+            self.pre_validation_context,
         )
 
     def contains_block(self, header_hash: bytes32) -> bool:
@@ -572,16 +638,16 @@ class Blockchain(BlockchainInterface):
         return self.block_record(header_hash)
 
     def get_ses_heights(self) -> List[uint32]:
-        return sorted(self.__sub_epoch_summaries.keys())
+        return self.__height_map.get_ses_heights()
 
     def get_ses(self, height: uint32) -> SubEpochSummary:
-        return self.__sub_epoch_summaries[height]
+        return self.__height_map.get_ses(height)
 
     def height_to_hash(self, height: uint32) -> Optional[bytes32]:
-        return self.__height_to_hash[height]
+        return self.__height_map.get_hash(height)
 
     def contains_height(self, height: uint32) -> bool:
-        return height in self.__height_to_hash
+        return self.__height_map.contains_height(height)
 
     def get_peak_height(self) -> Optional[uint32]:
         return self._peak_height
@@ -639,41 +705,60 @@ class Blockchain(BlockchainInterface):
     async def get_block_records_in_range(self, start: int, stop: int) -> Dict[bytes32, BlockRecord]:
         return await self.block_store.get_block_records_in_range(start, stop)
 
+    async def stream_header_blocks_in_range(
+        self, start: int, stop: int, tx_filter: bool = True, batch_size: int = HEADER_BLOCKS_BATCH_SIZE
+    ) -> AsyncIterator[HeaderBlock]:
+        """
+        Yields the header blocks of the chain from start to stop (inclusive), in height order. Blocks are read
+        batch_size heights at a time, with one range query for the blocks that are not cached, and one for the coins
+        added and for the coins removed in the batch, so only one batch of full blocks is in memory at a time.
+        """
+        for batch_start in range(start, stop + 1, batch_size):
+            batch_stop = min(stop, batch_start + batch_size - 1)
+            hashes: Dict[uint32, bytes32] = {}
+            for height in range(batch_start, batch_stop + 1):
+                if self.contains_height(uint32(height)):
+                    hashes[uint32(height)] = self.height_to_hash(uint32(height))
+            if len(hashes) == 0:
+                continue
+
+            blocks: Dict[bytes32, FullBlock] = {}
+            for header_hash in hashes.values():
+                block = self.block_store.block_cache.get(header_hash)
+                if block is not None:
+                    blocks[header_hash] = block
+            missing = [height for height, header_hash in hashes.items() if header_hash not in blocks]
+            if len(missing) > 0:
+                for block in await self.block_store.get_full_blocks_in_range(missing[0], missing[-1]):
+                    if hashes.get(block.height) == block.header_hash:
+                        blocks[block.header_hash] = block
+
+            added: Dict[uint32, List[CoinRecord]] = {}
+            removed: Dict[uint32, List[CoinRecord]] = {}
+            if tx_filter:
+                added = await self.coin_store.get_coins_added_in_range(uint32(batch_start), uint32(batch_stop))
+                removed = await self.coin_store.get_coins_removed_in_range(uint32(batch_start), uint32(batch_stop))
+
+            for height, header_hash in hashes.items():
+                if header_hash not in blocks:
+                    raise ValueError(f"Header hash {header_hash} not in the blockchain")
+                # The chain can change while the blocks and coins are read, or while the caller handles a header
+                if self.height_to_hash(height) != header_hash:
+                    raise ValueError(f"Block at {header_hash} is no longer in the blockchain (it's in a fork)")
+                block = blocks[header_hash]
+                if tx_filter is False:
+                    yield get_block_header(block, [], [])
+                else:
+                    tx_additions = [record.coin for record in added.get(height, []) if not record.coinbase]
+                    removals = [record.coin.name() for record in removed.get(height, [])]
+                    yield get_block_header(block, tx_additions, removals)
+
     async def get_header_blocks_in_range(
         self, start: int, stop: int, tx_filter: bool = True
     ) -> Dict[bytes32, HeaderBlock]:
-        hashes = []
-        for height in range(start, stop + 1):
-            if self.contains_height(uint32(height)):
-                header_hash: bytes32 = self.height_to_hash(uint32(height))
-                hashes.append(header_hash)
-
-        blocks: List[FullBlock] = []
-        for hash in hashes.copy():
-            block = self.block_store.block_cache.get(hash)
-            if block is not None:
-                blocks.append(block)
-                hashes.remove(hash)
-        blocks_on_disk: List[FullBlock] = await self.block_store.get_blocks_by_hash(hashes)
-        blocks.extend(blocks_on_disk)
-        header_blocks: Dict[bytes32, HeaderBlock] = {}
-
-        for block in blocks:
-            if self.height_to_hash(block.height) != block.header_hash:
-                raise ValueError(f"Block at {block.header_hash} is no longer in the blockchain (it's in a fork)")
-            if tx_filter is False:
-                header = get_block_header(block, [], [])
-            else:
-                tx_additions: List[CoinRecord] = [
-                    c for c in (await self.coin_store.get_coins_added_at_height(block.height)) if not c.coinbase
-                ]
-                removed: List[CoinRecord] = await self.coin_store.get_coins_removed_at_height(block.height)
-                header = get_block_header(
-                    block, [record.coin for record in tx_additions], [record.coin.name() for record in removed]
-                )
-            header_blocks[header.header_hash] = header
-
-        return header_blocks
+        return {
+            header.header_hash: header async for header in self.stream_header_blocks_in_range(start, stop, tx_filter)
+        }
 
     async def get_header_block_by_height(
         self, height: int, header_hash: bytes32, tx_filter: bool = True
@@ -742,7 +827,7 @@ class Blockchain(BlockchainInterface):
         return False
 
     async def get_block_generator(
-        self, block: Union[FullBlock, UnfinishedBlock], additional_blocks=None
+        self, block: Union[FullBlock, FullBlockView, UnfinishedBlock], additional_blocks=None
     ) -> Optional[BlockGenerator]:
         if additional_blocks is None:
             additional_blocks = {}
@@ -770,7 +855,7 @@ class Blockchain(BlockchainInterface):
         else:
             # First tries to find the blocks in additional_blocks
             reorg_chain: Dict[uint32, FullBlock] = {}
-            curr: Union[FullBlock, UnfinishedBlock] = block
+            curr: Union[FullBlock, FullBlockView, UnfinishedBlock] = block
             additional_height_dict = {}
             while curr.prev_header_hash in additional_blocks:
                 prev: FullBlock = additional_blocks[curr.prev_header_hash]
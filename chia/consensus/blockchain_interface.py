@@ -1,4 +1,4 @@
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional
 
 from chia.consensus.block_record import BlockRecord
 from chia.types.blockchain_format.sized_bytes import bytes32
@@ -54,6 +54,11 @@ class BlockchainInterface:
     ) -> Dict[bytes32, HeaderBlock]:
         pass
 
+    def stream_header_blocks_in_range(
+        self, start: int, stop: int, tx_filter: bool = True, batch_size: int = 32
+    ) -> AsyncIterator[HeaderBlock]:
+        pass
+
     async def get_header_block_by_height(
         self, height: int, header_hash: bytes32, tx_filter: bool = True
     ) -> Optional[HeaderBlock]:
@@ -1,9 +1,16 @@
 import asyncio
+import dataclasses
 import logging
+import mmap
+import os
+import tempfile
+import time
 import traceback
+import weakref
 from concurrent.futures.process import ProcessPoolExecutor
+from concurrent.futures.thread import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Sequence, Tuple, Union, Callable
+from typing import Any, Awaitable, BinaryIO, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union, Callable
 
 from chia.consensus.block_header_validation import validate_finished_header_block
 from chia.consensus.block_record import BlockRecord
@@ -17,6 +24,7 @@ from chia.consensus.pot_iterations import calculate_iterations_quality, is_overf
 from chia.full_node.mempool_check_conditions import get_name_puzzle_conditions
 from chia.types.blockchain_format.coin import Coin
 from chia.types.blockchain_format.sized_bytes import bytes32
+from chia.types.blockchain_format.vdf import get_verified_vdf_cache_stats
 from chia.types.full_block import FullBlock
 from chia.types.generator_types import BlockGenerator
 from chia.types.header_block import HeaderBlock
@@ -37,9 +45,277 @@ class PreValidationResult(Streamable):
     npc_result: Optional[NPCResult]  # Iff error is None and block is a transaction block
 
 
+# Path, generation and size of a BlockRecordBuffer, and the lowest height and number of records of the window
+BlockRecordsLocation = Tuple[str, int, int, int, int]
+
+
+def _remove_files(paths: Set[str], keep: Optional[str] = None) -> None:
+    for path in list(paths):
+        if path == keep:
+            continue
+        try:
+            os.remove(path)
+            paths.discard(path)
+        except OSError:
+            pass
+
+
+class BlockRecordBuffer:
+    """
+    Append only file of serialized BlockRecords, shared with the pre-validation workers. Each record is written once,
+    and the workers only parse the records written since their previous batch, instead of receiving the whole window
+    of recent block records with every batch. Once the file reaches max_size, a new one is started.
+    """
+
+    def __init__(self, max_size: int = 64 * 1024 * 1024):
+        self.max_size = max_size
+        self.path: Optional[str] = None
+        self.file: Optional[BinaryIO] = None
+        self.generation = 0
+        self.size = 0
+        self.written: Set[bytes32] = set()
+        self.paths: Set[str] = set()
+        self._finalizer = weakref.finalize(self, _remove_files, self.paths)
+
+    def _rotate(self) -> None:
+        if self.file is not None:
+            self.file.close()
+        # The previous file can still be read by a worker, so only the older ones are removed
+        _remove_files(self.paths, keep=self.path)
+        fd, self.path = tempfile.mkstemp(prefix="chia_block_records_")
+        self.paths.add(self.path)
+        self.file = os.fdopen(fd, "wb")
+        self.generation += 1
+        self.size = 0
+        self.written = set()
+
+    def add(self, records: Iterable[BlockRecord], min_height: int, window_size: int) -> BlockRecordsLocation:
+        if self.file is None or self.size > self.max_size:
+            self._rotate()
+        assert self.file is not None and self.path is not None
+        for record in records:
+            if record.header_hash in self.written:
+                continue
+            record_bytes = bytes(record)
+            self.file.write(len(record_bytes).to_bytes(4, "big"))
+            self.file.write(record_bytes)
+            self.size += 4 + len(record_bytes)
+            self.written.add(record.header_hash)
+        self.file.flush()
+        return self.path, self.generation, self.size, min_height, window_size
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        self._finalizer()
+
+
+class BlockRecordReader:
+    """
+    Worker side of a BlockRecordBuffer, which keeps the parsed records between batches. Records are looked up by
+    header hash, so keeping more than the current window is harmless. Records below the window are dropped once
+    there are twice as many records as in the window.
+    """
+
+    def __init__(self, path: str, generation: int):
+        self.path = path
+        self.generation = generation
+        self.parsed_size = 0
+        self.records: Dict[bytes32, BlockRecord] = {}
+
+    def update(self, size: int, min_height: int, window_size: int) -> Dict[bytes32, BlockRecord]:
+        if size > self.parsed_size:
+            with open(self.path, "rb") as f:
+                with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as view:
+                    pos = self.parsed_size
+                    while pos < size:
+                        length = int.from_bytes(view[pos : pos + 4], "big")
+                        record = BlockRecord.from_bytes(view[pos + 4 : pos + 4 + length])
+                        self.records[record.header_hash] = record
+                        pos += 4 + length
+            self.parsed_size = size
+        if len(self.records) > 2 * window_size:
+            self.records = {k: v for k, v in self.records.items() if v.height >= min_height}
+        return self.records
+
+
+# State of a pre-validation worker process, kept between batches
+_worker_constants: Optional[ConsensusConstants] = None
+_worker_block_records: Optional[BlockRecordReader] = None
+_worker_vdf_executor: Optional[ThreadPoolExecutor] = None
+
+# Threads that check the VDF proofs of a block in parallel, when a worker validates a single block
+VDF_THREADS = 4
+
+
+def init_pre_validation_worker(constants_dict: Dict) -> None:
+    global _worker_constants
+    _worker_constants = dataclass_from_dict(ConsensusConstants, constants_dict)
+
+
+def _get_worker_vdf_executor() -> ThreadPoolExecutor:
+    global _worker_vdf_executor
+    if _worker_vdf_executor is None:
+        _worker_vdf_executor = ThreadPoolExecutor(max_workers=VDF_THREADS, thread_name_prefix="vdf-check")
+    return _worker_vdf_executor
+
+
+def _get_worker_block_records(location: BlockRecordsLocation) -> Dict[bytes32, BlockRecord]:
+    global _worker_block_records
+    path, generation, size, min_height, window_size = location
+    if (
+        _worker_block_records is None
+        or _worker_block_records.path != path
+        or _worker_block_records.generation != generation
+    ):
+        _worker_block_records = BlockRecordReader(path, generation)
+    return _worker_block_records.update(size, min_height, window_size)
+
+
+# Estimated cost of pre-validating a block, in units of one VDF verification
+PROOF_OF_SPACE_COST = 1
+GENERATOR_BYTES_PER_COST = 10000
+
+
+def estimate_validation_cost(block: Union[FullBlock, HeaderBlock], npc_results: Dict[uint32, NPCResult]) -> int:
+    """
+    Rough cost of pre-validating a block, from the number of VDFs in the block and its sub slots, and the size of the
+    transactions generator that needs to run.
+    """
+    rcb = block.reward_chain_block
+    vdfs = 2
+    if rcb.challenge_chain_sp_vdf is not None:
+        vdfs += 1
+    if rcb.reward_chain_sp_vdf is not None:
+        vdfs += 1
+    if rcb.infused_challenge_chain_ip_vdf is not None:
+        vdfs += 1
+    for sub_slot in block.finished_sub_slots:
+        vdfs += 2 if sub_slot.infused_challenge_chain is None else 3
+    cost = vdfs + PROOF_OF_SPACE_COST
+    if isinstance(block, FullBlock) and block.transactions_generator is not None and block.height not in npc_results:
+        cost += len(bytes(block.transactions_generator)) // GENERATOR_BYTES_PER_COST
+    return cost
+
+
+def split_into_work_units(costs: List[int], num_units: int) -> List[Tuple[int, int]]:
+    """
+    Splits consecutive blocks into at most num_units ranges [start, end) of about the same total cost.
+    """
+    remaining = sum(costs)
+    ranges: List[Tuple[int, int]] = []
+    start = 0
+    unit_cost = 0
+    for i, cost in enumerate(costs):
+        unit_cost += cost
+        # Each unit gets its share of what the previous units left
+        units_left = num_units - len(ranges)
+        if units_left > 1 and unit_cost * units_left >= remaining:
+            ranges.append((start, i + 1))
+            start = i + 1
+            remaining -= unit_cost
+            unit_cost = 0
+    if start < len(costs):
+        ranges.append((start, len(costs)))
+    return ranges
+
+
+@dataclass
+class PreValidationWorkerStats:
+    work_units: int = 0
+    blocks: int = 0
+    estimated_cost: int = 0
+    wall_time: float = 0
+    cpu_time: float = 0
+    vdf_cache_hits: int = 0
+    vdf_cache_misses: int = 0
+
+
+def timed_batch_pre_validate_blocks(*args: Any) -> Tuple[List[bytes], int, float, float, int, int]:
+    """
+    Runs batch_pre_validate_blocks, and returns the process id, the wall and cpu time it took, and the hits and misses
+    of the verified VDF cache of the worker, with the results.
+    """
+    start = time.time()
+    cpu_start = time.process_time()
+    vdf_cache_start = get_verified_vdf_cache_stats()
+    results = batch_pre_validate_blocks(*args)
+    vdf_cache = get_verified_vdf_cache_stats()
+    return (
+        results,
+        os.getpid(),
+        time.time() - start,
+        time.process_time() - cpu_start,
+        vdf_cache["hits"] - vdf_cache_start["hits"],
+        vdf_cache["misses"] - vdf_cache_start["misses"],
+    )
+
+
+class PreValidationContext:
+    """
+    Process pool for block pre-validation whose workers keep the consensus constants, and the recent block records,
+    from one batch to the next. Blocks are split into work units of the same estimated cost, one for each active
+    worker. The number of active workers goes down when the workers do not get enough cpu time, because the machine
+    is busy, and back up to num_workers when they do.
+    """
+
+    def __init__(self, constants_json: Dict, num_workers: int):
+        self.pool = ProcessPoolExecutor(
+            max_workers=num_workers, initializer=init_pre_validation_worker, initargs=(constants_json,)
+        )
+        self.block_records = BlockRecordBuffer()
+        self.max_workers = num_workers
+        self.active_workers = num_workers
+        self.low_utilization = 0.5
+        self.high_utilization = 0.85
+        self.worker_stats: Dict[int, PreValidationWorkerStats] = {}
+
+    def record(self, unit_costs: List[int], unit_results: List[Tuple[int, int, float, float, int, int]]) -> None:
+        """
+        Adds the (process id, blocks, wall time, cpu time, vdf cache hits, vdf cache misses) of each work unit to the
+        worker stats, and tunes the number of active workers from the share of their wall time that the workers spent
+        on the cpu.
+        """
+        cpu_time = 0.0
+        wall_time_sum = 0.0
+        for cost, (pid, blocks, wall_time, unit_cpu_time, vdf_hits, vdf_misses) in zip(unit_costs, unit_results):
+            stats = self.worker_stats.setdefault(pid, PreValidationWorkerStats())
+            stats.work_units += 1
+            stats.blocks += blocks
+            stats.estimated_cost += cost
+            stats.wall_time += wall_time
+            stats.cpu_time += unit_cpu_time
+            stats.vdf_cache_hits += vdf_hits
+            stats.vdf_cache_misses += vdf_misses
+            cpu_time += unit_cpu_time
+            wall_time_sum += wall_time
+        if len(unit_results) < self.active_workers or wall_time_sum <= 0:
+            # Too few blocks to keep all the workers busy, says nothing about the machine
+            return
+        utilization = cpu_time / wall_time_sum
+        if utilization < self.low_utilization and self.active_workers > 1:
+            self.active_workers -= 1
+            log.info(f"Pre-validation workers at {utilization:.0%} cpu, using {self.active_workers} workers")
+        elif utilization > self.high_utilization and self.active_workers < self.max_workers:
+            self.active_workers += 1
+            log.info(f"Pre-validation workers at {utilization:.0%} cpu, using {self.active_workers} workers")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "active_workers": self.active_workers,
+            "max_workers": self.max_workers,
+            "workers": {pid: dataclasses.asdict(stats) for pid, stats in self.worker_stats.items()},
+        }
+
+    def shut_down(self) -> None:
+        self.pool.shutdown(wait=True)
+        self.block_records.close()
+
+
 def batch_pre_validate_blocks(
-    constants_dict: Dict,
-    blocks_pickled: Dict[bytes, bytes],
+    constants_dict: Optional[Dict],
+    blocks_pickled: Optional[Dict[bytes, bytes]],
     full_blocks_pickled: Optional[List[bytes]],
     header_blocks_pickled: Optional[List[bytes]],
     prev_transaction_generators: List[Optional[bytes]],
@@ -47,14 +323,30 @@ def batch_pre_validate_blocks(
     check_filter: bool,
     expected_difficulty: List[uint64],
     expected_sub_slot_iters: List[uint64],
+    block_records_location: Optional[BlockRecordsLocation] = None,
 ) -> List[bytes]:
-    blocks = {}
-    for k, v in blocks_pickled.items():
-        blocks[k] = BlockRecord.from_bytes(v)
+    """
+    constants_dict is None in the workers of a PreValidationContext, which already have the constants, and
+    blocks_pickled is None when the block records are read from block_records_location instead.
+    """
+    blocks: Dict[bytes32, BlockRecord] = {}
+    if blocks_pickled is not None:
+        for k, v in blocks_pickled.items():
+            blocks[bytes32(k)] = BlockRecord.from_bytes(v)
+    else:
+        assert block_records_location is not None
+        blocks = _get_worker_block_records(block_records_location)
     results: List[PreValidationResult] = []
-    constants: ConsensusConstants = dataclass_from_dict(ConsensusConstants, constants_dict)
+    if constants_dict is not None:
+        constants: ConsensusConstants = dataclass_from_dict(ConsensusConstants, constants_dict)
+    else:
+        assert _worker_constants is not None
+        constants = _worker_constants
     if full_blocks_pickled is not None and header_blocks_pickled is not None:
         assert ValueError("Only one should be passed here")
+    # A single block is usually a new peak, its VDFs are checked in parallel to validate it sooner
+    num_blocks = len(full_blocks_pickled if full_blocks_pickled is not None else header_blocks_pickled or [])
+    vdf_executor: Optional[ThreadPoolExecutor] = _get_worker_vdf_executor() if num_blocks == 1 else None
     if full_blocks_pickled is not None:
         for i in range(len(full_blocks_pickled)):
             try:
@@ -89,6 +381,7 @@ def batch_pre_validate_blocks(
                     check_filter,
                     expected_difficulty[i],
                     expected_sub_slot_iters[i],
+                    executor=vdf_executor,
                 )
                 error_int: Optional[uint16] = None
                 if error is not None:
@@ -110,6 +403,7 @@ def batch_pre_validate_blocks(
                     check_filter,
                     expected_difficulty[i],
                     expected_sub_slot_iters[i],
+                    executor=vdf_executor,
                 )
                 error_int = None
                 if error is not None:
@@ -131,7 +425,8 @@ async def pre_validate_blocks_multiprocessing(
     check_filter: bool,
     npc_results: Dict[uint32, NPCResult],
     get_block_generator: Optional[Callable],
-    batch_size: int,
+    batch_size: Optional[int],
+    context: Optional[PreValidationContext] = None,
 ) -> Optional[List[PreValidationResult]]:
     """
     This method must be called under the blockchain lock
@@ -147,6 +442,8 @@ async def pre_validate_blocks_multiprocessing(
         blocks: list of full blocks to validate (must be connected to current chain)
         npc_results
         get_block_generator
+        batch_size: number of blocks validated by each worker call, None to let the context balance the work
+        context: if given, its pool is used and the block records are shared through its BlockRecordBuffer
     """
     prev_b: Optional[BlockRecord] = None
     # Collects all the recent blocks (up to the previous sub-epoch)
@@ -238,16 +535,38 @@ async def pre_validate_blocks_multiprocessing(
         if not block_record_was_present[i]:
             block_records.remove_block_record(block.header_hash)
 
-    recent_sb_compressed_pickled = {bytes(k): bytes(v) for k, v in recent_blocks_compressed.items()}
+    worker_constants: Optional[Dict] = constants_json
+    block_records_location: Optional[BlockRecordsLocation] = None
+    recent_sb_compressed_pickled: Optional[Dict[bytes, bytes]] = None
+    if context is not None:
+        # The workers already have the constants, and only read the block records they have not seen yet
+        pool = context.pool
+        worker_constants = None
+        block_records_location = context.block_records.add(
+            recent_blocks.values(), min(r.height for r in recent_blocks.values()), len(recent_blocks)
+        )
+    else:
+        recent_sb_compressed_pickled = {bytes(k): bytes(v) for k, v in recent_blocks_compressed.items()}
     npc_results_pickled = {}
     for k, v in npc_results.items():
         npc_results_pickled[k] = bytes(v)
-    futures = []
+    costs: List[int] = []
+    if context is not None:
+        costs = [estimate_validation_cost(block, npc_results) for block in blocks]
+    if batch_size is None and context is not None:
+        work_units = split_into_work_units(costs, context.active_workers)
+    else:
+        fixed_size = batch_size if batch_size is not None else 4
+        work_units = [(i, min(i + fixed_size, len(blocks))) for i in range(0, len(blocks), fixed_size)]
+    loop = asyncio.get_running_loop()
+    futures: List[Awaitable[List[bytes]]] = []
+    timed_futures: List[Awaitable[Tuple[List[bytes], int, float, float, int, int]]] = []
     # Pool of workers to validate blocks concurrently
-    for i in range(0, len(blocks), batch_size):
-        end_i = min(i + batch_size, len(blocks))
+    for i, end_i in work_units:
         blocks_to_validate = blocks[i:end_i]
-        if any([len(block.finished_sub_slots) > 0 for block in blocks_to_validate]):
+        if context is not None:
+            final_pickled: Optional[Dict[bytes, bytes]] = None
+        elif any([len(block.finished_sub_slots) > 0 for block in blocks_to_validate]):
             final_pickled = {bytes(k): bytes(v) for k, v in recent_blocks.items()}
         else:
             final_pickled = recent_sb_compressed_pickled
@@ -283,24 +602,33 @@ async def pre_validate_blocks_multiprocessing(
                     hb_pickled = []
                 hb_pickled.append(bytes(block))
 
-        futures.append(
-            asyncio.get_running_loop().run_in_executor(
-                pool,
-                batch_pre_validate_blocks,
-                constants_json,
-                final_pickled,
-                b_pickled,
-                hb_pickled,
-                previous_generators,
-                npc_results_pickled,
-                check_filter,
-                [diff_ssis[j][0] for j in range(i, end_i)],
-                [diff_ssis[j][1] for j in range(i, end_i)],
-            )
+        args = (
+            worker_constants,
+            final_pickled,
+            b_pickled,
+            hb_pickled,
+            previous_generators,
+            npc_results_pickled,
+            check_filter,
+            [diff_ssis[j][0] for j in range(i, end_i)],
+            [diff_ssis[j][1] for j in range(i, end_i)],
+            block_records_location,
+        )
+        if context is not None:
+            timed_futures.append(loop.run_in_executor(pool, timed_batch_pre_validate_blocks, *args))
+        else:
+            futures.append(loop.run_in_executor(pool, batch_pre_validate_blocks, *args))
+    if context is not None:
+        timed_results = await asyncio.gather(*timed_futures)
+        context.record(
+            [sum(costs[i:end_i]) for i, end_i in work_units],
+            [
+                (pid, end_i - i, wall_time, cpu_time, vdf_hits, vdf_misses)
+                for (i, end_i), (_, pid, wall_time, cpu_time, vdf_hits, vdf_misses) in zip(work_units, timed_results)
+            ],
         )
+        batch_results = [unit_result[0] for unit_result in timed_results]
+    else:
+        batch_results = await asyncio.gather(*futures)
     # Collect all results into one flat list
-    return [
-        PreValidationResult.from_bytes(result)
-        for batch_result in (await asyncio.gather(*futures))
-        for result in batch_result
-    ]
+    return [PreValidationResult.from_bytes(result) for batch_result in batch_results for result in batch_result]
@@ -0,0 +1,244 @@
+import asyncio
+import bisect
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from chia.protocols.full_node_protocol import RequestBlocks, RespondBlocks
+from chia.server.ws_connection import WSChiaConnection
+from chia.types.blockchain_format.sized_bytes import bytes32
+from chia.types.full_block import FullBlock
+from chia.util.ints import uint32
+
+log = logging.getLogger(__name__)
+
+
+@dataclass
+class BlockBatch:
+    index: int
+    start_height: int
+    end_height: int
+    blocks: List[FullBlock]
+    peer: WSChiaConnection
+
+
+class PeerThroughput:
+    """
+    Moving average of the blocks per second that a peer sent us, used to spot batches that take too long.
+    """
+
+    def __init__(self, smoothing: float = 0.3):
+        self.smoothing = smoothing
+        self.blocks_per_second: Optional[float] = None
+        self.blocks = 0
+        self.failures = 0
+
+    def record(self, blocks: int, duration: float) -> None:
+        self.blocks += blocks
+        rate = blocks / max(duration, 0.001)
+        if self.blocks_per_second is None:
+            self.blocks_per_second = rate
+        else:
+            self.blocks_per_second = self.smoothing * rate + (1 - self.smoothing) * self.blocks_per_second
+
+    def expected_duration(self, blocks: int) -> Optional[float]:
+        if self.blocks_per_second is None or self.blocks_per_second <= 0:
+            return None
+        return blocks / self.blocks_per_second
+
+
+class BlockDownloader:
+    """
+    Downloads the blocks between two heights from several peers at once, in batches. Each peer has a few requests
+    in flight, and takes the lowest batch that nobody requested yet, so faster peers download more batches. Batches
+    are returned in height order by next_batch, while the following batches are being downloaded. A batch that takes
+    much longer than its peer usually needs is also requested from an idle peer, and the first response is used.
+    """
+
+    def __init__(
+        self,
+        peers: List[WSChiaConnection],
+        start_height: int,
+        end_height: int,
+        batch_size: int,
+        max_batches_ahead: int = 8,
+        requests_per_peer: int = 2,
+        request_timeout: int = 60,
+        min_slow_seconds: float = 5,
+    ):
+        self.ranges: List[Tuple[int, int]] = [
+            (height, min(end_height, height + batch_size)) for height in range(start_height, end_height, batch_size)
+        ]
+        self.max_batches_ahead = max(max_batches_ahead, 1)
+        self.requests_per_peer = max(requests_per_peer, 1)
+        self.request_timeout = request_timeout
+        self.min_slow_seconds = min_slow_seconds
+
+        # Index of the next batch returned by next_batch
+        self.next_index = 0
+        # Indexes of the batches that are waiting for a peer, sorted
+        self.pending: List[int] = list(range(len(self.ranges)))
+        # Index of a batch : peer node id : time the batch was requested from that peer
+        self.in_flight: Dict[int, Dict[bytes32, float]] = {}
+        self.responses: Dict[int, Tuple[List[FullBlock], WSChiaConnection]] = {}
+
+        self.peers: Dict[bytes32, WSChiaConnection] = {}
+        self.throughput: Dict[bytes32, PeerThroughput] = {}
+        self.tasks: Dict[bytes32, List[asyncio.Task]] = {}
+        self.changed = asyncio.Event()
+        self.closed = False
+        for peer in peers:
+            self.add_peer(peer)
+
+    @property
+    def finished(self) -> bool:
+        return self.next_index >= len(self.ranges)
+
+    def add_peer(self, peer: WSChiaConnection) -> None:
+        if self.closed or peer.closed or peer.peer_node_id in self.peers:
+            return
+        self.peers[peer.peer_node_id] = peer
+        self.throughput.setdefault(peer.peer_node_id, PeerThroughput())
+        self.tasks[peer.peer_node_id] = [
+            asyncio.create_task(self._download_from_peer(peer)) for _ in range(self.requests_per_peer)
+        ]
+        self._notify()
+
+    def remove_peer(self, peer_id: bytes32) -> None:
+        """
+        Stops downloading from a peer, its batches are given to the other peers.
+        """
+        if self.peers.pop(peer_id, None) is None:
+            return
+        for index in list(self.in_flight.keys()):
+            if self.in_flight[index].pop(peer_id, None) is not None:
+                # The tasks of the peer are cancelled, so they do not clean up after themselves
+                if len(self.in_flight[index]) == 0:
+                    del self.in_flight[index]
+                self._requeue(index)
+        current = asyncio.current_task()
+        for task in self.tasks.pop(peer_id, []):
+            if task is not current:
+                task.cancel()
+        self._notify()
+
+    def reject(self, batch: BlockBatch) -> None:
+        """
+        Called when the blocks of a batch are invalid. The batch is downloaded again from another peer.
+        """
+        peer_id = batch.peer.peer_node_id
+        self.remove_peer(peer_id)
+        self.next_index = batch.index
+        for index, (_, peer) in list(self.responses.items()):
+            if peer.peer_node_id == peer_id:
+                del self.responses[index]
+                self._requeue(index)
+        self._requeue(batch.index)
+        self._notify()
+
+    async def next_batch(self) -> Optional[BlockBatch]:
+        """
+        Returns the batch following the previous one, once it is downloaded. Returns None if all the batches were
+        returned, or if there are no peers left to download from.
+        """
+        while not self.finished:
+            if self.next_index in self.responses:
+                blocks, peer = self.responses.pop(self.next_index)
+                start_height, end_height = self.ranges[self.next_index]
+                batch = BlockBatch(self.next_index, start_height, end_height, blocks, peer)
+                self.next_index += 1
+                self._notify()
+                return batch
+            if len(self.peers) == 0:
+                return None
+            self.changed.clear()
+            await self.changed.wait()
+        return None
+
+    def close(self) -> None:
+        self.closed = True
+        for tasks in self.tasks.values():
+            for task in tasks:
+                task.cancel()
+        self.tasks = {}
+        self._notify()
+
+    def _notify(self) -> None:
+        self.changed.set()
+
+    def _requeue(self, index: int) -> None:
+        if (
+            index >= self.next_index
+            and index not in self.responses
+            and len(self.in_flight.get(index, {})) == 0
+            and index not in self.pending
+        ):
+            bisect.insort(self.pending, index)
+
+    def _take_batch(self, peer_id: bytes32) -> Optional[int]:
+        window_end = self.next_index + self.max_batches_ahead
+        while len(self.pending) > 0 and self.pending[0] < self.next_index:
+            self.pending.pop(0)
+        if len(self.pending) > 0 and self.pending[0] < window_end:
+            return self.pending.pop(0)
+
+        # Nothing left to request, helps with the oldest batch that is late
+        now = time.time()
+        for index in sorted(self.in_flight.keys()):
+            if index >= window_end:
+                break
+            requested = self.in_flight[index]
+            # Batches below next_index were already returned by next_batch
+            if index < self.next_index or index in self.responses or peer_id in requested or len(requested) != 1:
+                continue
+            other_id, started = next(iter(requested.items()))
+            start_height, end_height = self.ranges[index]
+            expected = self.throughput[other_id].expected_duration(end_height - start_height + 1)
+            if now - started > max(self.min_slow_seconds, 2 * expected if expected is not None else 0):
+                log.info(f"Batch {start_height} to {end_height} is slow, also requesting it from another peer")
+                return index
+        return None
+
+    async def _download_from_peer(self, peer: WSChiaConnection) -> None:
+        peer_id = peer.peer_node_id
+        while not self.closed and peer_id in self.peers and not self.finished:
+            index = self._take_batch(peer_id)
+            if index is None:
+                self.changed.clear()
+                try:
+                    # Wakes up regularly to look for slow batches
+                    await asyncio.wait_for(self.changed.wait(), 1)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            start_height, end_height = self.ranges[index]
+            started = time.time()
+            self.in_flight.setdefault(index, {})[peer_id] = started
+            response = None
+            try:
+                response = await peer.request_blocks(
+                    RequestBlocks(uint32(start_height), uint32(end_height), True), timeout=self.request_timeout
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.warning(f"Error requesting blocks {start_height} to {end_height} from {peer.peer_host}: {e}")
+            requested = self.in_flight.get(index, {})
+            requested.pop(peer_id, None)
+            if len(requested) == 0:
+                self.in_flight.pop(index, None)
+
+            if not isinstance(response, RespondBlocks):
+                self.throughput[peer_id].failures += 1
+                if response is None:
+                    await peer.close()
+                self._requeue(index)
+                self.remove_peer(peer_id)
+                return
+
+            self.throughput[peer_id].record(len(response.blocks), time.time() - started)
+            if index >= self.next_index and index not in self.responses:
+                self.responses[index] = (response.blocks, peer)
+            self._notify()
@@ -0,0 +1,180 @@
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from chia.full_node.block_store import BlockStore
+from chia.types.blockchain_format.sized_bytes import bytes32
+from chia.types.blockchain_format.sub_epoch_summary import SubEpochSummary
+from chia.util.ints import uint32
+from chia.util.streamable import Streamable, streamable
+
+log = logging.getLogger(__name__)
+
+# Number of heights read from the block_records table at a time, when walking back from the peak
+LOAD_BATCH_SIZE = 1000
+
+
+@dataclass(frozen=True)
+@streamable
+class SesCache(Streamable):
+    content: List[Tuple[uint32, SubEpochSummary]]
+
+
+class BlockHeightMap:
+    """
+    Maps the heights of the main chain to header hashes, and keeps the sub epoch summaries included in the main chain.
+    The hashes are stored back to back in a bytearray, 32 bytes per height. When the database path is given, the
+    map is saved to files next to the database, and on startup only the blocks that changed since it was saved are
+    read from the block_records table, walking back from the peak until the saved hashes match the chain.
+    """
+
+    block_store: BlockStore
+    # Header hash of each height of the main chain, height h is at [h * 32, h * 32 + 32)
+    __height_to_hash: bytearray
+    # Height included : summary, only for the blocks in the main chain
+    __sub_epoch_summaries: Dict[uint32, SubEpochSummary]
+    __height_to_hash_filename: Optional[Path]
+    __ses_filename: Optional[Path]
+    # Lowest height that changed since the files were written
+    __first_dirty: Optional[int]
+    __ses_dirty: bool
+
+    @classmethod
+    async def create(cls, block_store: BlockStore, db_path: Optional[Path] = None) -> "BlockHeightMap":
+        self = cls()
+        self.block_store = block_store
+        self.__height_to_hash = bytearray()
+        self.__sub_epoch_summaries = {}
+        self.__height_to_hash_filename = None
+        self.__ses_filename = None
+        self.__first_dirty = None
+        self.__ses_dirty = False
+
+        peak = await block_store.get_peak()
+        if db_path is not None:
+            self.__height_to_hash_filename = db_path.with_name(f"{db_path.stem}-height-to-hash")
+            self.__ses_filename = db_path.with_name(f"{db_path.stem}-sub-epoch-summaries")
+            if peak is not None:
+                self._load_files()
+        if peak is None:
+            self.__first_dirty = 0
+            self.__ses_dirty = True
+            await self.maybe_flush()
+            return self
+
+        peak_hash, peak_height = peak
+        # Heights above the peak are from a previous chain
+        del self.__height_to_hash[(peak_height + 1) * 32 :]
+        for height in [h for h in self.__sub_epoch_summaries.keys() if h > peak_height]:
+            del self.__sub_epoch_summaries[height]
+            self.__ses_dirty = True
+
+        missing = (peak_height + 1) * 32 - len(self.__height_to_hash)
+        if missing > 0:
+            # Zeros never match a header hash, so these heights are all read from the database
+            self.__height_to_hash.extend(bytes(missing))
+        await self._load_from_peak(peak_hash, peak_height)
+        await self.maybe_flush()
+        return self
+
+    def _load_files(self) -> None:
+        assert self.__height_to_hash_filename is not None and self.__ses_filename is not None
+        try:
+            height_to_hash = bytearray(self.__height_to_hash_filename.read_bytes())
+            ses_cache = SesCache.from_bytes(self.__ses_filename.read_bytes())
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            log.warning(f"Could not read the saved height to hash map, rebuilding it from the database: {e}")
+            return
+        # The last height might have been partially written
+        del height_to_hash[len(height_to_hash) - len(height_to_hash) % 32 :]
+        self.__height_to_hash = height_to_hash
+        self.__sub_epoch_summaries = {height: ses for height, ses in ses_cache.content}
+
+    async def _load_from_peak(self, peak_hash: bytes32, peak_height: uint32) -> None:
+        """
+        Walks back the chain from the peak, until the hash at a height matches the one in the map. The map is
+        correct below that height, since each hash commits to all the previous blocks.
+        """
+        curr_hash = peak_hash
+        curr_height = int(peak_height)
+        loaded = 0
+        while curr_height >= 0:
+            batch_start = max(0, curr_height - LOAD_BATCH_SIZE + 1)
+            links = await self.block_store.get_block_links_in_range(batch_start, curr_height)
+            while curr_height >= batch_start:
+                if self.contains_height(uint32(curr_height)) and self.get_hash(uint32(curr_height)) == curr_hash:
+                    log.info(f"Loaded {loaded} heights of the height to hash map from the database")
+                    return
+                prev_hash, ses = links[curr_hash]
+                self.update_height(uint32(curr_height), curr_hash, ses)
+                loaded += 1
+                curr_hash = prev_hash
+                curr_height -= 1
+        log.info(f"Loaded {loaded} heights of the height to hash map from the database")
+
+    def update_height(self, height: uint32, header_hash: bytes32, ses: Optional[SubEpochSummary]) -> None:
+        """
+        Sets the block at a height of the main chain. Heights can only be added right after the last one.
+        """
+        start = height * 32
+        assert start <= len(self.__height_to_hash)
+        self.__height_to_hash[start : start + 32] = header_hash
+        if self.__first_dirty is None or height < self.__first_dirty:
+            self.__first_dirty = height
+        if ses is not None:
+            self.__sub_epoch_summaries[height] = ses
+            self.__ses_dirty = True
+        elif self.__sub_epoch_summaries.pop(height, None) is not None:
+            self.__ses_dirty = True
+
+    def rollback(self, fork_height: int) -> None:
+        """
+        Removes the sub epoch summaries above the fork height. The hashes above it are replaced by update_height.
+        """
+        for height in [h for h in self.__sub_epoch_summaries.keys() if h > fork_height]:
+            log.info(f"delete ses at height {height}")
+            del self.__sub_epoch_summaries[height]
+            self.__ses_dirty = True
+
+    def get_hash(self, height: uint32) -> bytes32:
+        if not self.contains_height(height):
+            raise KeyError(height)
+        return bytes32(self.__height_to_hash[height * 32 : height * 32 + 32])
+
+    def contains_height(self, height: uint32) -> bool:
+        return height * 32 < len(self.__height_to_hash)
+
+    def get_ses(self, height: uint32) -> SubEpochSummary:
+        return self.__sub_epoch_summaries[height]
+
+    def get_ses_heights(self) -> List[uint32]:
+        return sorted(self.__sub_epoch_summaries.keys())
+
+    async def maybe_flush(self) -> None:
+        """
+        Writes the heights that changed, and the sub epoch summaries if they changed, to the files. Does nothing when
+        the map is not saved to files.
+        """
+        if self.__height_to_hash_filename is None or self.__ses_filename is None:
+            return
+        try:
+            # The summaries are written first. If the node stops before the hashes are written, the heights that
+            # changed do not match on startup, and their summaries are read from the database again.
+            if self.__ses_dirty:
+                ses_cache = SesCache([(height, ses) for height, ses in sorted(self.__sub_epoch_summaries.items())])
+                tmp_filename = self.__ses_filename.with_suffix(".tmp")
+                tmp_filename.write_bytes(bytes(ses_cache))
+                tmp_filename.replace(self.__ses_filename)
+                self.__ses_dirty = False
+            if self.__first_dirty is not None:
+                mode = "r+b" if self.__height_to_hash_filename.exists() else "wb"
+                with open(self.__height_to_hash_filename, mode) as f:
+                    f.seek(min(self.__first_dirty * 32, f.seek(0, 2)))
+                    f.write(self.__height_to_hash[f.tell() :])
+                    f.truncate()
+                self.__first_dirty = None
+        except OSError as e:
+            log.error(f"Could not save the height to hash map: {e}")
@@ -7,22 +7,23 @@ from chia.consensus.block_record import BlockRecord
 from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.types.blockchain_format.sub_epoch_summary import SubEpochSummary
 from chia.types.full_block import FullBlock
+from chia.types.full_block_view import FullBlockView
 from chia.types.weight_proof import SubEpochChallengeSegment, SubEpochSegments
 from chia.util.db_wrapper import DBWrapper
 from chia.util.ints import uint32
-from chia.util.lru_cache import LRUCache
+from chia.util.lru_cache import LRUCache, TwoQueueCache
 
 log = logging.getLogger(__name__)
 
 
 class BlockStore:
     db: aiosqlite.Connection
-    block_cache: LRUCache
+    block_cache: TwoQueueCache
     db_wrapper: DBWrapper
     ses_challenge_cache: LRUCache
 
     @classmethod
-    async def create(cls, db_wrapper: DBWrapper):
+    async def create(cls, db_wrapper: DBWrapper, block_cache_bytes: Optional[int] = None):
         self = cls()
 
         # All full blocks which have been added to the blockchain. Header_hash -> block
@@ -61,13 +62,15 @@ class BlockStore:
         await self.db.execute("CREATE INDEX IF NOT EXISTS peak on block_records(is_peak)")
         await self.db.execute("CREATE INDEX IF NOT EXISTS is_block on block_records(is_block)")
 
-        await self.db.commit()
-        self.block_cache = LRUCache(1000)
+        await self.db_wrapper.commit_transaction()
+        # Blocks vary a lot in size, so the block cache can be bounded by the serialized size of the blocks in it
+        self.block_cache = TwoQueueCache(1000, max_size=block_cache_bytes)
         self.ses_challenge_cache = LRUCache(50)
         return self
 
     async def add_full_block(self, header_hash: bytes32, block: FullBlock, block_record: BlockRecord) -> None:
-        self.block_cache.put(header_hash, block)
+        block_bytes = bytes(block)
+        self.block_cache.put(header_hash, block, len(block_bytes))
         cursor_1 = await self.db.execute(
             "INSERT OR REPLACE INTO full_blocks VALUES(?, ?, ?, ?, ?)",
             (
@@ -75,7 +78,7 @@ class BlockStore:
                 block.height,
                 int(block.is_transaction_block()),
                 int(block.is_fully_compactified()),
-                bytes(block),
+                block_bytes,
             ),
         )
 
@@ -106,7 +109,7 @@ class BlockStore:
                 (ses_block_hash.hex(), bytes(SubEpochSegments(segments))),
             )
             await cursor_1.close()
-            await self.db.commit()
+            await self.db_wrapper.commit_transaction()
 
     async def get_sub_epoch_challenge_segments(
         self,
@@ -115,11 +118,12 @@ class BlockStore:
         cached = self.ses_challenge_cache.get(ses_block_hash)
         if cached is not None:
             return cached
-        cursor = await self.db.execute(
-            "SELECT challenge_segments from sub_epoch_segments_v3 WHERE ses_block_hash=?", (ses_block_hash.hex(),)
-        )
-        row = await cursor.fetchone()
-        await cursor.close()
+        async with self.db_wrapper.reader() as conn:
+            cursor = await conn.execute(
+                "SELECT challenge_segments from sub_epoch_segments_v3 WHERE ses_block_hash=?", (ses_block_hash.hex(),)
+            )
+            row = await cursor.fetchone()
+            await cursor.close()
         if row is not None:
             challenge_segments = SubEpochSegments.from_bytes(row[0]).challenge_segments
             self.ses_challenge_cache.put(ses_block_hash, challenge_segments)
@@ -135,24 +139,46 @@ class BlockStore:
             log.debug(f"cache hit for block {header_hash.hex()}")
             return cached
         log.debug(f"cache miss for block {header_hash.hex()}")
-        cursor = await self.db.execute("SELECT block from full_blocks WHERE header_hash=?", (header_hash.hex(),))
-        row = await cursor.fetchone()
-        await cursor.close()
+        generation = self.db_wrapper.cache_generation()
+        async with self.db_wrapper.reader() as conn:
+            cursor = await conn.execute("SELECT block from full_blocks WHERE header_hash=?", (header_hash.hex(),))
+            row = await cursor.fetchone()
+            await cursor.close()
         if row is not None:
             block = FullBlock.from_bytes(row[0])
-            self.block_cache.put(header_hash, block)
+            if self.db_wrapper.can_cache(generation):
+                self.block_cache.put(header_hash, block, len(row[0]))
             return block
         return None
 
+    async def get_full_block_view(self, header_hash: bytes32) -> Optional[FullBlockView]:
+        """
+        Returns a view of the block, which only parses the VDF proofs and the transactions generator when they
+        are accessed. Blocks read from the database are not added to the block cache.
+        """
+        cached = self.block_cache.get(header_hash)
+        if cached is not None:
+            log.debug(f"cache hit for block {header_hash.hex()}")
+            return FullBlockView.from_full_block(cached)
+        log.debug(f"cache miss for block {header_hash.hex()}")
+        async with self.db_wrapper.reader() as conn:
+            cursor = await conn.execute("SELECT block from full_blocks WHERE header_hash=?", (header_hash.hex(),))
+            row = await cursor.fetchone()
+            await cursor.close()
+        if row is not None:
+            return FullBlockView(row[0])
+        return None
+
     async def get_full_block_bytes(self, header_hash: bytes32) -> Optional[bytes]:
         cached = self.block_cache.get(header_hash)
         if cached is not None:
             log.debug(f"cache hit for block {header_hash.hex()}")
             return bytes(cached)
         log.debug(f"cache miss for block {header_hash.hex()}")
-        cursor = await self.db.execute("SELECT block from full_blocks WHERE header_hash=?", (header_hash.hex(),))
-        row = await cursor.fetchone()
-        await cursor.close()
+        async with self.db_wrapper.reader() as conn:
+            cursor = await conn.execute("SELECT block from full_blocks WHERE header_hash=?", (header_hash.hex(),))
+            row = await cursor.fetchone()
+            await cursor.close()
         if row is not None:
             return row[0]
         return None
@@ -163,9 +189,23 @@ class BlockStore:
 
         heights_db = tuple(heights)
         formatted_str = f'SELECT block from full_blocks WHERE height in ({"?," * (len(heights_db) - 1)}?)'
-        cursor = await self.db.execute(formatted_str, heights_db)
-        rows = await cursor.fetchall()
-        await cursor.close()
+        async with self.db_wrapper.reader() as conn:
+            cursor = await conn.execute(formatted_str, heights_db)
+            rows = await cursor.fetchall()
+            await cursor.close()
+        return [FullBlock.from_bytes(row[0]) for row in rows]
+
+    async def get_full_blocks_in_range(self, start: int, stop: int) -> List[FullBlock]:
+        """
+        Returns the blocks from start to stop (inclusive) in height order, including the blocks that are not in the
+        main chain. Blocks read from the database are not added to the block cache.
+        """
+        async with self.db_wrapper.reader() as conn:
+            cursor = await conn.execute(
+                "SELECT block from full_blocks WHERE height>=? AND height<=? ORDER BY height", (start, stop)
+            )
+            rows = await cursor.fetchall()
+            await cursor.close()
         return [FullBlock.from_bytes(row[0]) for row in rows]
 
     async def get_block_records_by_hash(self, header_hashes: List[bytes32]):
@@ -178,9 +218,10 @@ class BlockStore:
 
         header_hashes_db = tuple([hh.hex() for hh in header_hashes])
         formatted_str = f'SELECT block from block_records WHERE header_hash in ({"?," * (len(header_hashes_db) - 1)}?)'
-        cursor = await self.db.execute(formatted_str, header_hashes_db)
-        rows = await cursor.fetchall()
-        await cursor.close()
+        async with self.db_wrapper.reader() as conn:
+            cursor = await conn.execute(formatted_str, header_hashes_db)
+            rows = await cursor.fetchall()
+            await cursor.close()
         all_blocks: Dict[bytes32, BlockRecord] = {}
         for row in rows:
             block_rec: BlockRecord = BlockRecord.from_bytes(row[0])
@@ -205,15 +246,19 @@ class BlockStore:
         formatted_str = (
             f'SELECT header_hash, block from full_blocks WHERE header_hash in ({"?," * (len(header_hashes_db) - 1)}?)'
         )
-        cursor = await self.db.execute(formatted_str, header_hashes_db)
-        rows = await cursor.fetchall()
-        await cursor.close()
+        generation = self.db_wrapper.cache_generation()
+        async with self.db_wrapper.reader() as conn:
+            cursor = await conn.execute(formatted_str, header_hashes_db)
+            rows = await cursor.fetchall()
+            await cursor.close()
+        can_cache = self.db_wrapper.can_cache(generation)
         all_blocks: Dict[bytes32, FullBlock] = {}
         for row in rows:
             header_hash = bytes.fromhex(row[0])
             full_block: FullBlock = FullBlock.from_bytes(row[1])
             all_blocks[header_hash] = full_block
-            self.block_cache.put(header_hash, full_block)
+            if can_cache:
+                self.block_cache.put(header_hash, full_block, len(row[1]))
         ret: List[FullBlock] = []
         for hh in header_hashes:
             if hh not in all_blocks:
@@ -222,12 +267,13 @@ class BlockStore:
         return ret
 
     async def get_block_record(self, header_hash: bytes32) -> Optional[BlockRecord]:
-        cursor = await self.db.execute(
-            "SELECT block from block_records WHERE header_hash=?",
-            (header_hash.hex(),),
-        )
-        row = await cursor.fetchone()
-        await cursor.close()
+        async with self.db_wrapper.reader() as conn:
+            cursor = await conn.execute(
+                "SELECT block from block_records WHERE header_hash=?",
+                (header_hash.hex(),),
+            )
+            row = await cursor.fetchone()
+            await cursor.close()
         if row is not None:
             return BlockRecord.from_bytes(row[0])
         return None
@@ -244,9 +290,10 @@ class BlockStore:
 
         formatted_str = f"SELECT header_hash, block from block_records WHERE height >= {start} and height <= {stop}"
 
-        cursor = await self.db.execute(formatted_str)
-        rows = await cursor.fetchall()
-        await cursor.close()
+        async with self.db_wrapper.reader() as conn:
+            cursor = await conn.execute(formatted_str)
+            rows = await cursor.fetchall()
+            await cursor.close()
         ret: Dict[bytes32, BlockRecord] = {}
         for row in rows:
             header_hash = bytes.fromhex(row[0])
@@ -262,62 +309,64 @@ class BlockStore:
         peak header hash.
         """
 
-        res = await self.db.execute("SELECT * from block_records WHERE is_peak = 1")
-        peak_row = await res.fetchone()
-        await res.close()
-        if peak_row is None:
-            return {}, None
-
-        formatted_str = f"SELECT header_hash, block  from block_records WHERE height >= {peak_row[2] - blocks_n}"
-        cursor = await self.db.execute(formatted_str)
-        rows = await cursor.fetchall()
-        await cursor.close()
+        async with self.db_wrapper.reader() as conn:
+            res = await conn.execute("SELECT * from block_records WHERE is_peak = 1")
+            peak_row = await res.fetchone()
+            await res.close()
+            if peak_row is None:
+                return {}, None
+
+            formatted_str = f"SELECT header_hash, block  from block_records WHERE height >= {peak_row[2] - blocks_n}"
+            cursor = await conn.execute(formatted_str)
+            rows = await cursor.fetchall()
+            await cursor.close()
         ret: Dict[bytes32, BlockRecord] = {}
         for row in rows:
             header_hash = bytes.fromhex(row[0])
             ret[header_hash] = BlockRecord.from_bytes(row[1])
         return ret, bytes.fromhex(peak_row[0])
 
-    async def get_peak_height_dicts(self) -> Tuple[Dict[uint32, bytes32], Dict[uint32, SubEpochSummary]]:
+    async def count_block_records_from(self, min_height: int) -> int:
         """
-        Returns a dictionary with all blocks, as well as the header hash of the peak,
-        if present.
+        Returns the number of block records with height >= min_height, including the blocks not in the main chain.
         """
+        async with self.db_wrapper.reader() as conn:
+            cursor = await conn.execute("SELECT COUNT(*) from block_records WHERE height >= ?", (min_height,))
+            row = await cursor.fetchone()
+            await cursor.close()
+        return row[0]
 
-        res = await self.db.execute("SELECT * from block_records WHERE is_peak = 1")
-        row = await res.fetchone()
-        await res.close()
+    async def get_peak(self) -> Optional[Tuple[bytes32, uint32]]:
+        """
+        Returns the header hash and height of the peak, if present.
+        """
+        async with self.db_wrapper.reader() as conn:
+            cursor = await conn.execute("SELECT header_hash, height from block_records WHERE is_peak = 1")
+            row = await cursor.fetchone()
+            await cursor.close()
         if row is None:
-            return {}, {}
-
-        peak: bytes32 = bytes.fromhex(row[0])
-        cursor = await self.db.execute("SELECT header_hash,prev_hash,height,sub_epoch_summary from block_records")
-        rows = await cursor.fetchall()
-        await cursor.close()
-        hash_to_prev_hash: Dict[bytes32, bytes32] = {}
-        hash_to_height: Dict[bytes32, uint32] = {}
-        hash_to_summary: Dict[bytes32, SubEpochSummary] = {}
+            return None
+        return bytes32(bytes.fromhex(row[0])), uint32(row[1])
 
+    async def get_block_links_in_range(
+        self, start: int, stop: int
+    ) -> Dict[bytes32, Tuple[bytes32, Optional[SubEpochSummary]]]:
+        """
+        Returns the previous hash and the included sub epoch summary of the blocks from start to stop (inclusive),
+        including the blocks that are not in the main chain.
+        """
+        async with self.db_wrapper.reader() as conn:
+            cursor = await conn.execute(
+                "SELECT header_hash, prev_hash, sub_epoch_summary from block_records WHERE height>=? AND height<=?",
+                (start, stop),
+            )
+            rows = await cursor.fetchall()
+            await cursor.close()
+        links: Dict[bytes32, Tuple[bytes32, Optional[SubEpochSummary]]] = {}
         for row in rows:
-            hash_to_prev_hash[bytes.fromhex(row[0])] = bytes.fromhex(row[1])
-            hash_to_height[bytes.fromhex(row[0])] = row[2]
-            if row[3] is not None:
-                hash_to_summary[bytes.fromhex(row[0])] = SubEpochSummary.from_bytes(row[3])
-
-        height_to_hash: Dict[uint32, bytes32] = {}
-        sub_epoch_summaries: Dict[uint32, SubEpochSummary] = {}
-
-        curr_header_hash = peak
-        curr_height = hash_to_height[curr_header_hash]
-        while True:
-            height_to_hash[curr_height] = curr_header_hash
-            if curr_header_hash in hash_to_summary:
-                sub_epoch_summaries[curr_height] = hash_to_summary[curr_header_hash]
-            if curr_height == 0:
-                break
-            curr_header_hash = hash_to_prev_hash[curr_header_hash]
-            curr_height = hash_to_height[curr_header_hash]
-        return height_to_hash, sub_epoch_summaries
+            ses = None if row[2] is None else SubEpochSummary.from_bytes(row[2])
+            links[bytes32(bytes.fromhex(row[0]))] = (bytes32(bytes.fromhex(row[1])), ses)
+        return links
 
     async def set_peak(self, header_hash: bytes32) -> None:
         # We need to be in a sqlite transaction here.
@@ -331,21 +380,23 @@ class BlockStore:
         await cursor_2.close()
 
     async def is_fully_compactified(self, header_hash: bytes32) -> Optional[bool]:
-        cursor = await self.db.execute(
-            "SELECT is_fully_compactified from full_blocks WHERE header_hash=?", (header_hash.hex(),)
-        )
-        row = await cursor.fetchone()
-        await cursor.close()
+        async with self.db_wrapper.reader() as conn:
+            cursor = await conn.execute(
+                "SELECT is_fully_compactified from full_blocks WHERE header_hash=?", (header_hash.hex(),)
+            )
+            row = await cursor.fetchone()
+            await cursor.close()
         if row is None:
             return None
         return bool(row[0])
 
     async def get_first_not_compactified(self, min_height: int) -> Optional[int]:
-        cursor = await self.db.execute(
-            "SELECT MIN(height) from full_blocks WHERE is_fully_compactified=0 AND height>=?", (min_height,)
-        )
-        row = await cursor.fetchone()
-        await cursor.close()
+        async with self.db_wrapper.reader() as conn:
+            cursor = await conn.execute(
+                "SELECT MIN(height) from full_blocks WHERE is_fully_compactified=0 AND height>=?", (min_height,)
+            )
+            row = await cursor.fetchone()
+            await cursor.close()
         if row is None:
             return None
         return int(row[0])
@@ -0,0 +1,48 @@
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+from chia.consensus.block_record import BlockRecord
+from chia.types.blockchain_format.sized_bytes import bytes32
+from chia.util.hash import std_hash
+from chia.util.streamable import Streamable, streamable
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+@streamable
+class ChainSnapshot(Streamable):
+    peak_hash: bytes32
+    # The block records close to the peak, that the blockchain keeps in memory
+    block_records: List[BlockRecord]
+
+
+def write_chain_snapshot(path: Path, snapshot: ChainSnapshot) -> None:
+    """
+    Writes the snapshot after a checksum of its bytes. The file is replaced at once, so a node that stops while
+    writing leaves the previous snapshot.
+    """
+    data = bytes(snapshot)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_bytes(std_hash(data) + data)
+    tmp_path.replace(path)
+
+
+def read_chain_snapshot(path: Path) -> Optional[ChainSnapshot]:
+    """
+    Returns the snapshot in the file, or None if there is none or if it is corrupted.
+    """
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return None
+    if len(data) < 32 or std_hash(data[32:]) != data[:32]:
+        log.warning(f"The chain snapshot {path} is corrupted")
+        return None
+    try:
+        return ChainSnapshot.from_bytes(data[32:])
+    except Exception as e:
+        log.warning(f"Could not parse the chain snapshot {path}: {e}")
+        return None
@@ -1,4 +1,5 @@
-from typing import List, Optional
+import logging
+from typing import Any, Dict, List, Optional, Tuple
 
 import aiosqlite
 
@@ -8,22 +9,48 @@ from chia.types.coin_record import CoinRecord
 from chia.types.full_block import FullBlock
 from chia.util.db_wrapper import DBWrapper
 from chia.util.ints import uint32, uint64
-from chia.util.lru_cache import LRUCache
+from chia.util.lru_cache import TwoQueueCache
+
+log = logging.getLogger(__name__)
+
+# SQLite integers are signed 64 bit, amounts with the top bit set are stored as their two's complement
+AMOUNT_SIGN_BIT = 1 << 63
+AMOUNT_MASK = (1 << 64) - 1
+# Stay well below SQLITE_MAX_VARIABLE_NUMBER, which is 999 on older sqlite builds
+MAX_SQL_PARAMETERS = 500
+# Serialized size of a CoinRecord, which all have the same size, used to bound the coin record cache in bytes
+COIN_RECORD_SIZE = 90
+
+
+def amount_to_db(amount: uint64) -> int:
+    return int(amount) - (1 << 64) if amount >= AMOUNT_SIGN_BIT else int(amount)
+
+
+def amount_from_db(amount: int) -> uint64:
+    return uint64(amount & AMOUNT_MASK)
 
 
 class CoinStore:
     """
     This object handles CoinRecords in DB.
     A cache is maintained for quicker access to recent coins.
+
+    Records live in the coin_record_v2 table, keyed by 32 byte blobs. Databases created by older versions
+    have a hex keyed coin_record table, which is drained into coin_record_v2 in batches by
+    migrate_legacy_records while the node is running. Until that finishes, every coin is in exactly
+    one of the two tables, and reads consult both.
     """
 
     coin_record_db: aiosqlite.Connection
-    coin_record_cache: LRUCache
+    coin_record_cache: TwoQueueCache
     cache_size: uint32
     db_wrapper: DBWrapper
+    migrating: bool
 
     @classmethod
-    async def create(cls, db_wrapper: DBWrapper, cache_size: uint32 = uint32(60000)):
+    async def create(
+        cls, db_wrapper: DBWrapper, cache_size: uint32 = uint32(60000), cache_bytes: Optional[int] = None
+    ):
         self = cls()
 
         self.cache_size = cache_size
@@ -33,113 +60,169 @@ class CoinStore:
         await self.coin_record_db.execute("pragma synchronous=2")
         await self.coin_record_db.execute(
             (
-                "CREATE TABLE IF NOT EXISTS coin_record("
-                "coin_name text PRIMARY KEY,"
+                "CREATE TABLE IF NOT EXISTS coin_record_v2("
+                "coin_name blob PRIMARY KEY,"
                 " confirmed_index bigint,"
                 " spent_index bigint,"
                 " spent int,"
                 " coinbase int,"
-                " puzzle_hash text,"
-                " coin_parent text,"
-                " amount blob,"
+                " puzzle_hash blob,"
+                " coin_parent blob,"
+                " amount bigint,"
                 " timestamp bigint)"
             )
         )
 
         # Useful for reorg lookups
         await self.coin_record_db.execute(
-            "CREATE INDEX IF NOT EXISTS coin_confirmed_index on coin_record(confirmed_index)"
+            "CREATE INDEX IF NOT EXISTS coin_v2_confirmed_index on coin_record_v2(confirmed_index)"
+        )
+
+        await self.coin_record_db.execute(
+            "CREATE INDEX IF NOT EXISTS coin_v2_spent_index on coin_record_v2(spent_index)"
         )
 
-        await self.coin_record_db.execute("CREATE INDEX IF NOT EXISTS coin_spent_index on coin_record(spent_index)")
+        await self.coin_record_db.execute("CREATE INDEX IF NOT EXISTS coin_v2_spent on coin_record_v2(spent)")
 
-        await self.coin_record_db.execute("CREATE INDEX IF NOT EXISTS coin_spent on coin_record(spent)")
+        await self.coin_record_db.execute(
+            "CREATE INDEX IF NOT EXISTS coin_v2_puzzle_hash on coin_record_v2(puzzle_hash)"
+        )
 
-        await self.coin_record_db.execute("CREATE INDEX IF NOT EXISTS coin_puzzle_hash on coin_record(puzzle_hash)")
+        cursor = await self.coin_record_db.execute(
+            "SELECT name from sqlite_master WHERE type='table' AND name='coin_record'"
+        )
+        self.migrating = (await cursor.fetchone()) is not None
+        await cursor.close()
+        if self.migrating:
+            log.info("Found legacy coin_record table, coins will be migrated to coin_record_v2")
 
-        await self.coin_record_db.commit()
-        self.coin_record_cache = LRUCache(cache_size)
+        await self.db_wrapper.commit_transaction()
+        self.coin_record_cache = TwoQueueCache(cache_size, max_size=cache_bytes, size_of=lambda _: COIN_RECORD_SIZE)
         return self
 
-    async def new_block(self, block: FullBlock, tx_additions: List[Coin], tx_removals: List[bytes32]):
+    async def new_block(self, block: FullBlock, tx_additions: List[Coin], tx_removals: List[bytes32]) -> None:
         """
         Only called for blocks which are blocks (and thus have rewards and transactions)
         """
-        if block.is_transaction_block() is False:
-            return None
-        assert block.foliage_transaction_block is not None
-
-        for coin in tx_additions:
-            record: CoinRecord = CoinRecord(
-                coin,
-                block.height,
-                uint32(0),
-                False,
-                False,
-                block.foliage_transaction_block.timestamp,
-            )
-            await self._add_coin_record(record, False)
-
-        included_reward_coins = block.get_included_reward_coins()
-        if block.height == 0:
-            assert len(included_reward_coins) == 0
-        else:
-            assert len(included_reward_coins) >= 2
-
-        for coin in included_reward_coins:
-            reward_coin_r: CoinRecord = CoinRecord(
-                coin,
-                block.height,
-                uint32(0),
-                False,
-                True,
-                block.foliage_transaction_block.timestamp,
-            )
-            await self._add_coin_record(reward_coin_r, False)
+        await self.new_blocks([(block, tx_additions, tx_removals)])
+
+    async def new_blocks(self, blocks: List[Tuple[FullBlock, List[Coin], List[bytes32]]]) -> None:
+        """
+        Applies the additions, reward coins and removals of consecutive blocks, in order, with one executemany
+        per kind of write. Coins may be created and spent within the same batch. Must be called inside a
+        transaction, since a failure part way leaves the batch partially written.
+        """
+        # Coins created in this batch, in their final state
+        added: Dict[bytes32, CoinRecord] = {}
+        # Coins that existed before this batch and were spent by it
+        spent: Dict[bytes32, CoinRecord] = {}
+
+        all_removals: List[bytes32] = [name for _, _, removals in blocks for name in removals]
+        existing: Dict[bytes32, CoinRecord] = await self._get_coin_records_by_names(all_removals)
+
+        for block, tx_additions, tx_removals in blocks:
+            if block.is_transaction_block() is False:
+                continue
+            assert block.foliage_transaction_block is not None
+            timestamp = block.foliage_transaction_block.timestamp
+
+            included_reward_coins = block.get_included_reward_coins()
+            if block.height == 0:
+                assert len(included_reward_coins) == 0
+            else:
+                assert len(included_reward_coins) >= 2
+
+            for coin, coinbase in [(c, False) for c in tx_additions] + [(c, True) for c in included_reward_coins]:
+                name = coin.name()
+                if name in added:
+                    raise ValueError(f"Coin already exists in db: {name}")
+                added[name] = CoinRecord(coin, block.height, uint32(0), False, coinbase, timestamp)
+
+            total_amount_spent: int = 0
+            for coin_name in tx_removals:
+                current: Optional[CoinRecord] = added.get(coin_name, spent.get(coin_name, existing.get(coin_name)))
+                if current is None:
+                    raise ValueError(f"Cannot spend a coin that does not exist in db: {coin_name}")
+
+                assert not current.spent  # Redundant sanity check, already checked in block_body_validation
+                spent_record = CoinRecord(
+                    current.coin,
+                    current.confirmed_block_index,
+                    block.height,
+                    True,
+                    current.coinbase,
+                    current.timestamp,
+                )
+                if coin_name in added:
+                    added[coin_name] = spent_record
+                else:
+                    spent[coin_name] = spent_record
+                total_amount_spent += current.coin.amount
 
-        total_amount_spent: int = 0
-        for coin_name in tx_removals:
-            total_amount_spent += await self._set_spent(coin_name, block.height)
+            # Sanity check, already checked in block_body_validation
+            assert sum([a.amount for a in tx_additions]) <= total_amount_spent
 
-        # Sanity check, already checked in block_body_validation
-        assert sum([a.amount for a in tx_additions]) <= total_amount_spent
+        if self.migrating:
+            await self._remove_legacy_records(list(added.keys()), list(spent.keys()))
+
+        cursor = await self.coin_record_db.executemany(
+            "INSERT INTO coin_record_v2 VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [self._coin_record_to_row(record) for record in added.values()],
+        )
+        await cursor.close()
+        cursor = await self.coin_record_db.executemany(
+            "INSERT OR REPLACE INTO coin_record_v2 VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [self._coin_record_to_row(record) for record in spent.values()],
+        )
+        await cursor.close()
+
+        for name, record in list(added.items()) + list(spent.items()):
+            self.coin_record_cache.put(name, record)
 
     # Checks DB and DiffStores for CoinRecord with coin_name and returns it
     async def get_coin_record(self, coin_name: bytes32) -> Optional[CoinRecord]:
         cached = self.coin_record_cache.get(coin_name)
         if cached is not None:
             return cached
-        cursor = await self.coin_record_db.execute("SELECT * from coin_record WHERE coin_name=?", (coin_name.hex(),))
-        row = await cursor.fetchone()
-        await cursor.close()
-        if row is not None:
-            coin = Coin(bytes32(bytes.fromhex(row[6])), bytes32(bytes.fromhex(row[5])), uint64.from_bytes(row[7]))
-            record = CoinRecord(coin, row[1], row[2], row[3], row[4], row[8])
-            self.coin_record_cache.put(record.coin.name(), record)
+        generation = self.db_wrapper.cache_generation()
+        records = await self._select_coin_records("coin_name=?", (coin_name,))
+        if len(records) > 0:
+            record = records[0]
+            if self.db_wrapper.can_cache(generation):
+                self.coin_record_cache.put(record.coin.name(), record)
             return record
         return None
 
+    async def get_coin_records_by_names(self, names: List[bytes32]) -> Dict[bytes32, CoinRecord]:
+        """
+        Returns the records of the coins with the given names, unknown coins are left out.
+        """
+        return await self._get_coin_records_by_names(names)
+
     async def get_coins_added_at_height(self, height: uint32) -> List[CoinRecord]:
-        cursor = await self.coin_record_db.execute("SELECT * from coin_record WHERE confirmed_index=?", (height,))
-        rows = await cursor.fetchall()
-        await cursor.close()
-        coins = []
-        for row in rows:
-            coin = Coin(bytes32(bytes.fromhex(row[6])), bytes32(bytes.fromhex(row[5])), uint64.from_bytes(row[7]))
-            coins.append(CoinRecord(coin, row[1], row[2], row[3], row[4], row[8]))
-        return coins
+        return await self._select_coin_records("confirmed_index=?", (height,))
 
     async def get_coins_removed_at_height(self, height: uint32) -> List[CoinRecord]:
-        cursor = await self.coin_record_db.execute("SELECT * from coin_record WHERE spent_index=?", (height,))
-        rows = await cursor.fetchall()
-        await cursor.close()
-        coins = []
-        for row in rows:
-            spent: bool = bool(row[3])
-            if spent:
-                coin = Coin(bytes32(bytes.fromhex(row[6])), bytes32(bytes.fromhex(row[5])), uint64.from_bytes(row[7]))
-                coin_record = CoinRecord(coin, row[1], row[2], spent, row[4], row[8])
-                coins.append(coin_record)
+        return await self._select_coin_records("spent_index=? AND spent=1", (height,))
+
+    async def get_coins_added_in_range(self, start: uint32, stop: uint32) -> Dict[uint32, List[CoinRecord]]:
+        """
+        Returns the coins added at each height from start to stop (inclusive), heights without coins are left out.
+        """
+        records = await self._select_coin_records("confirmed_index>=? AND confirmed_index<=?", (start, stop))
+        coins: Dict[uint32, List[CoinRecord]] = {}
+        for record in records:
+            coins.setdefault(record.confirmed_block_index, []).append(record)
+        return coins
+
+    async def get_coins_removed_in_range(self, start: uint32, stop: uint32) -> Dict[uint32, List[CoinRecord]]:
+        """
+        Returns the coins spent at each height from start to stop (inclusive), heights without spends are left out.
+        """
+        records = await self._select_coin_records("spent_index>=? AND spent_index<=? AND spent=1", (start, stop))
+        coins: Dict[uint32, List[CoinRecord]] = {}
+        for record in records:
+            coins.setdefault(record.spent_block_index, []).append(record)
         return coins
 
     # Checks DB and DiffStores for CoinRecords with puzzle_hash and returns them
@@ -151,19 +234,12 @@ class CoinStore:
         end_height: uint32 = uint32((2 ** 32) - 1),
     ) -> List[CoinRecord]:
 
-        coins = set()
-        cursor = await self.coin_record_db.execute(
-            f"SELECT * from coin_record WHERE puzzle_hash=? AND confirmed_index>=? AND confirmed_index<? "
+        records = await self._select_coin_records(
+            f"puzzle_hash=? AND confirmed_index>=? AND confirmed_index<? "
             f"{'' if include_spent_coins else 'AND spent=0'}",
-            (puzzle_hash.hex(), start_height, end_height),
+            (puzzle_hash, start_height, end_height),
         )
-        rows = await cursor.fetchall()
-
-        await cursor.close()
-        for row in rows:
-            coin = Coin(bytes32(bytes.fromhex(row[6])), bytes32(bytes.fromhex(row[5])), uint64.from_bytes(row[7]))
-            coins.add(CoinRecord(coin, row[1], row[2], row[3], row[4], row[8]))
-        return list(coins)
+        return list(set(records))
 
     async def get_coin_records_by_puzzle_hashes(
         self,
@@ -175,22 +251,13 @@ class CoinStore:
         if len(puzzle_hashes) == 0:
             return []
 
-        coins = set()
-        puzzle_hashes_db = tuple([ph.hex() for ph in puzzle_hashes])
-        cursor = await self.coin_record_db.execute(
-            f'SELECT * from coin_record WHERE puzzle_hash in ({"?," * (len(puzzle_hashes_db) - 1)}?) '
+        records = await self._select_coin_records(
+            f'puzzle_hash in ({"?," * (len(puzzle_hashes) - 1)}?) '
             f"AND confirmed_index>=? AND confirmed_index<? "
             f"{'' if include_spent_coins else 'AND spent=0'}",
-            puzzle_hashes_db + (start_height, end_height),
+            tuple(puzzle_hashes) + (start_height, end_height),
         )
-
-        rows = await cursor.fetchall()
-
-        await cursor.close()
-        for row in rows:
-            coin = Coin(bytes32(bytes.fromhex(row[6])), bytes32(bytes.fromhex(row[5])), uint64.from_bytes(row[7]))
-            coins.add(CoinRecord(coin, row[1], row[2], row[3], row[4], row[8]))
-        return list(coins)
+        return list(set(records))
 
     async def rollback_to_block(self, block_index: int):
         """
@@ -198,7 +265,7 @@ class CoinStore:
         """
         # Update memory cache
         delete_queue: bytes32 = []
-        for coin_name, coin_record in list(self.coin_record_cache.cache.items()):
+        for coin_name, coin_record in self.coin_record_cache.items():
             if int(coin_record.spent_block_index) > block_index:
                 new_record = CoinRecord(
                     coin_record.coin,
@@ -216,32 +283,163 @@ class CoinStore:
             self.coin_record_cache.remove(coin_name)
 
         # Delete from storage
-        c1 = await self.coin_record_db.execute("DELETE FROM coin_record WHERE confirmed_index>?", (block_index,))
-        await c1.close()
-        c2 = await self.coin_record_db.execute(
-            "UPDATE coin_record SET spent_index = 0, spent = 0 WHERE spent_index>?",
-            (block_index,),
+        tables = ["coin_record_v2", "coin_record"] if self.migrating else ["coin_record_v2"]
+        for table in tables:
+            c1 = await self.coin_record_db.execute(f"DELETE FROM {table} WHERE confirmed_index>?", (block_index,))
+            await c1.close()
+            c2 = await self.coin_record_db.execute(
+                f"UPDATE {table} SET spent_index = 0, spent = 0 WHERE spent_index>?",
+                (block_index,),
+            )
+            await c2.close()
+
+    async def migrate_legacy_records(self, batch_size: int = 10000) -> int:
+        """
+        Moves coins from the legacy hex keyed coin_record table into coin_record_v2, one batch per
+        transaction, and drops the legacy table once it is empty. Each batch deletes the rows it copied,
+        so an interrupted migration resumes where it stopped. Returns the number of coins moved.
+        """
+        migrated = 0
+        while self.migrating:
+            async with self.db_wrapper.lock:
+                cursor = await self.coin_record_db.execute(
+                    "SELECT rowid, * from coin_record ORDER BY rowid LIMIT ?", (batch_size,)
+                )
+                rows = list(await cursor.fetchall())
+                await cursor.close()
+                if len(rows) == 0:
+                    # The legacy table is empty, so readers can stop looking at it before it is dropped
+                    self.migrating = False
+                    cursor = await self.coin_record_db.execute("DROP TABLE coin_record")
+                    await cursor.close()
+                    await self.db_wrapper.commit_transaction()
+                    log.info(f"Finished migrating coin records, moved {migrated} coins in this run")
+                    break
+                records = [self._legacy_row_to_coin_record(row[1:]) for row in rows]
+                # Rows spent or added after the migration started are already in coin_record_v2 (see
+                # _add_coin_record), so a conflict can only come from a crash between batches
+                cursor = await self.coin_record_db.executemany(
+                    "INSERT OR IGNORE INTO coin_record_v2 VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    [self._coin_record_to_row(record) for record in records],
+                )
+                await cursor.close()
+                cursor = await self.coin_record_db.execute("DELETE FROM coin_record WHERE rowid<=?", (rows[-1][0],))
+                await cursor.close()
+                await self.db_wrapper.commit_transaction()
+            migrated += len(rows)
+        return migrated
+
+    async def _get_coin_records_by_names(self, names: List[bytes32]) -> Dict[bytes32, CoinRecord]:
+        found: Dict[bytes32, CoinRecord] = {}
+        missing: List[bytes32] = []
+        for name in names:
+            cached = self.coin_record_cache.get(name)
+            if cached is not None:
+                found[name] = cached
+            else:
+                missing.append(name)
+        # While migrating, each name is a parameter of both tables' SELECT
+        chunk_size = MAX_SQL_PARAMETERS // 2 if self.migrating else MAX_SQL_PARAMETERS
+        for i in range(0, len(missing), chunk_size):
+            chunk = missing[i : i + chunk_size]
+            for record in await self._select_coin_records(f'coin_name in ({"?," * (len(chunk) - 1)}?)', tuple(chunk)):
+                found[record.name] = record
+        return found
+
+    async def _remove_legacy_records(self, new_names: List[bytes32], replaced_names: List[bytes32]) -> None:
+        # New coins must not exist yet in either table, replaced ones move out of the legacy table
+        for i in range(0, len(new_names), MAX_SQL_PARAMETERS):
+            chunk = [name.hex() for name in new_names[i : i + MAX_SQL_PARAMETERS]]
+            cursor = await self.coin_record_db.execute(
+                f'SELECT coin_name from coin_record WHERE coin_name in ({"?," * (len(chunk) - 1)}?) LIMIT 1',
+                tuple(chunk),
+            )
+            row = await cursor.fetchone()
+            await cursor.close()
+            if row is not None:
+                raise ValueError(f"Coin already exists in db: {row[0]}")
+        cursor = await self.coin_record_db.executemany(
+            "DELETE FROM coin_record WHERE coin_name=?", [(name.hex(),) for name in replaced_names]
+        )
+        await cursor.close()
+
+    async def _select_coin_records(self, where: str, args: Tuple[Any, ...]) -> List[CoinRecord]:
+        if self.migrating:
+            # One statement reads both tables from the same snapshot, so a coin that a migration batch moves
+            # meanwhile is found in exactly one of them
+            legacy_args = tuple([arg.hex() if isinstance(arg, bytes) else arg for arg in args])
+            try:
+                async with self.db_wrapper.reader() as conn:
+                    cursor = await conn.execute(
+                        f"SELECT 0, * from coin_record_v2 WHERE {where} "
+                        f"UNION ALL SELECT 1, * from coin_record WHERE {where}",
+                        args + legacy_args,
+                    )
+                    rows = await cursor.fetchall()
+                    await cursor.close()
+                return [
+                    self._legacy_row_to_coin_record(row[1:]) if row[0] == 1 else self._row_to_coin_record(row[1:])
+                    for row in rows
+                ]
+            except aiosqlite.OperationalError:
+                # The migration finished and dropped the legacy table after migrating was checked, all coins are
+                # in coin_record_v2 now
+                if self.migrating:
+                    raise
+        async with self.db_wrapper.reader() as conn:
+            cursor = await conn.execute(f"SELECT * from coin_record_v2 WHERE {where}", args)
+            rows = await cursor.fetchall()
+            await cursor.close()
+        return [self._row_to_coin_record(row) for row in rows]
+
+    @staticmethod
+    def _row_to_coin_record(row) -> CoinRecord:
+        coin = Coin(bytes32(row[6]), bytes32(row[5]), amount_from_db(row[7]))
+        return CoinRecord(coin, row[1], row[2], bool(row[3]), bool(row[4]), row[8])
+
+    @staticmethod
+    def _legacy_row_to_coin_record(row) -> CoinRecord:
+        coin = Coin(bytes32(bytes.fromhex(row[6])), bytes32(bytes.fromhex(row[5])), uint64.from_bytes(row[7]))
+        return CoinRecord(coin, row[1], row[2], bool(row[3]), bool(row[4]), row[8])
+
+    @staticmethod
+    def _coin_record_to_row(record: CoinRecord) -> Tuple[Any, ...]:
+        return (
+            record.coin.name(),
+            record.confirmed_block_index,
+            record.spent_block_index,
+            int(record.spent),
+            int(record.coinbase),
+            record.coin.puzzle_hash,
+            record.coin.parent_coin_info,
+            amount_to_db(record.coin.amount),
+            record.timestamp,
         )
-        await c2.close()
 
     # Store CoinRecord in DB and ram cache
     async def _add_coin_record(self, record: CoinRecord, allow_replace: bool) -> None:
         if self.coin_record_cache.get(record.coin.name()) is not None:
             self.coin_record_cache.remove(record.coin.name())
 
+        if self.migrating:
+            # Keep each coin in exactly one table, so reads never see two versions of it
+            if allow_replace:
+                cursor = await self.coin_record_db.execute(
+                    "DELETE FROM coin_record WHERE coin_name=?", (record.coin.name().hex(),)
+                )
+                await cursor.close()
+            else:
+                cursor = await self.coin_record_db.execute(
+                    "SELECT coin_name from coin_record WHERE coin_name=?", (record.coin.name().hex(),)
+                )
+                row = await cursor.fetchone()
+                await cursor.close()
+                if row is not None:
+                    raise ValueError(f"Coin already exists in db: {record.coin.name()}")
+
         cursor = await self.coin_record_db.execute(
-            f"INSERT {'OR REPLACE ' if allow_replace else ''}INTO coin_record VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?)",
-            (
-                record.coin.name().hex(),
-                record.confirmed_block_index,
-                record.spent_block_index,
-                int(record.spent),
-                int(record.coinbase),
-                str(record.coin.puzzle_hash.hex()),
-                str(record.coin.parent_coin_info.hex()),
-                bytes(record.coin.amount),
-                record.timestamp,
-            ),
+            f"INSERT {'OR REPLACE ' if allow_replace else ''}INTO coin_record_v2 VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            self._coin_record_to_row(record),
         )
         await cursor.close()
 
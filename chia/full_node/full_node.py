@@ -19,6 +19,7 @@ from chia.consensus.difficulty_adjustment import get_next_sub_slot_iters_and_dif
 from chia.consensus.make_sub_epoch_summary import next_sub_epoch_summary
 from chia.consensus.multiprocess_validation import PreValidationResult
 from chia.consensus.pot_iterations import calculate_sp_iters
+from chia.full_node.block_downloader import BlockDownloader
 from chia.full_node.block_store import BlockStore
 from chia.full_node.bundle_tools import detect_potential_template_generator
 from chia.full_node.coin_store import CoinStore
@@ -29,10 +30,8 @@ from chia.full_node.sync_store import SyncStore
 from chia.full_node.weight_proof import WeightProofHandler
 from chia.protocols import farmer_protocol, full_node_protocol, timelord_protocol, wallet_protocol
 from chia.protocols.full_node_protocol import (
-    RejectBlocks,
     RequestBlocks,
     RespondBlock,
-    RespondBlocks,
     RespondSignagePoint,
 )
 from chia.protocols.protocol_message_types import ProtocolMessageTypes
@@ -68,6 +67,7 @@ class FullNode:
     mempool_manager: MempoolManager
     connection: aiosqlite.Connection
     _sync_task: Optional[asyncio.Task]
+    _coin_migration_task: Optional[asyncio.Task]
     blockchain: Blockchain
     config: Dict
     server: Any
@@ -119,13 +119,24 @@ class FullNode:
         # create the store (db) and full node instance
         self.connection = await aiosqlite.connect(self.db_path)
         self.db_wrapper = DBWrapper(self.connection)
-        self.block_store = await BlockStore.create(self.db_wrapper)
+        self.block_store = await BlockStore.create(self.db_wrapper, self.config.get("block_cache_bytes"))
         self.sync_store = await SyncStore.create()
-        self.coin_store = await CoinStore.create(self.db_wrapper)
+        self.coin_store = await CoinStore.create(
+            self.db_wrapper, cache_bytes=self.config.get("coin_record_cache_bytes")
+        )
+        await self.db_wrapper.open_read_pool(self.db_path, self.config.get("db_readers", 4))
+        self._coin_migration_task = None
+        if self.coin_store.migrating:
+            self._coin_migration_task = asyncio.create_task(self.coin_store.migrate_legacy_records())
         self.log.info("Initializing blockchain from disk")
         start_time = time.time()
-        self.blockchain = await Blockchain.create(self.coin_store, self.block_store, self.constants)
-        self.mempool_manager = MempoolManager(self.coin_store, self.constants)
+        self.blockchain = await Blockchain.create(self.coin_store, self.block_store, self.constants, self.db_path)
+        self.mempool_manager = MempoolManager(
+            self.coin_store, self.constants, self.config.get("mempool_validation_workers", 1)
+        )
+        # Transactions waiting to be added to the mempool together, with the futures of their results
+        self._tx_batch: List[Tuple[SpendBundle, bytes32, asyncio.Future]] = []
+        self._tx_batch_task: Optional[asyncio.Task] = None
         self.weight_proof_handler = None
         asyncio.create_task(self.initialize_weight_proof())
 
@@ -168,7 +179,9 @@ class FullNode:
             asyncio.create_task(self.full_node_peers.start())
 
     async def initialize_weight_proof(self):
-        self.weight_proof_handler = WeightProofHandler(self.constants, self.blockchain)
+        self.weight_proof_handler = WeightProofHandler(
+            self.constants, self.blockchain, self.config.get("weight_proof_validation_workers", 4)
+        )
         peak = self.blockchain.get_peak()
         if peak is not None:
             await self.weight_proof_handler.create_sub_epoch_segments()
@@ -535,6 +548,8 @@ class FullNode:
             self.blockchain.shut_down()
         if self.mempool_manager is not None:
             self.mempool_manager.shut_down()
+        if self.weight_proof_handler is not None:
+            self.weight_proof_handler.shut_down()
         if self.full_node_peers is not None:
             asyncio.create_task(self.full_node_peers.close())
         if self.uncompact_task is not None:
@@ -542,8 +557,10 @@ class FullNode:
 
     async def _await_closed(self):
         cancel_task_safe(self._sync_task, self.log)
+        cancel_task_safe(self._coin_migration_task, self.log)
         for task_id, task in list(self.full_node_store.tx_fetch_tasks.items()):
             cancel_task_safe(task, self.log)
+        await self.db_wrapper.close_read_pool()
         await self.connection.close()
 
     async def _sync(self):
@@ -713,62 +730,56 @@ class FullNode:
                             fork_point_height = our_peak_height
                         break
 
-        for i in range(fork_point_height, target_peak_sb_height, batch_size):
-            start_height = i
-            end_height = min(target_peak_sb_height, start_height + batch_size)
-            request = RequestBlocks(uint32(start_height), uint32(end_height), True)
-            self.log.info(f"Requesting blocks: {start_height} to {end_height}")
-            batch_added = False
-            to_remove = []
-            for peer in peers_with_peak:
-                if peer.closed:
-                    to_remove.append(peer)
-                    continue
-                response = await peer.request_blocks(request, timeout=60)
-                if response is None:
-                    await peer.close()
-                    to_remove.append(peer)
-                    continue
-                if isinstance(response, RejectBlocks):
-                    to_remove.append(peer)
-                    continue
-                elif isinstance(response, RespondBlocks):
-                    success, advanced_peak, _ = await self.receive_block_batch(
-                        response.blocks, peer, None if advanced_peak else uint32(fork_point_height), summaries
+        downloader = BlockDownloader(
+            peers_with_peak,
+            fork_point_height,
+            target_peak_sb_height,
+            batch_size,
+            max_batches_ahead=self.config.get("sync_batches_ahead", 8),
+            requests_per_peer=self.config.get("sync_requests_per_peer", 2),
+        )
+        sync_start = time.time()
+        blocks_added = 0
+        try:
+            while not downloader.finished:
+                batch = await downloader.next_batch()
+                if batch is None:
+                    self.log.info(
+                        f"Failed to fetch blocks {downloader.ranges[downloader.next_index]} from peers: "
+                        f"{peers_with_peak}"
                     )
-                    if success is False:
-                        await peer.close(600)
-                        continue
-                    else:
-                        batch_added = True
-                        break
-
-            peak = self.blockchain.get_peak()
-            assert peak is not None
-            msg = make_msg(
-                ProtocolMessageTypes.new_peak_wallet,
-                wallet_protocol.NewPeakWallet(
-                    peak.header_hash,
-                    peak.height,
-                    peak.weight,
-                    uint32(max(peak.height - 1, uint32(0))),
-                ),
-            )
-            await self.server.send_to_all([msg], NodeType.WALLET)
-
-            for peer in to_remove:
-                peers_with_peak.remove(peer)
+                    break
+                start_height, end_height = batch.start_height, batch.end_height
+                success, advanced_peak, _ = await self.receive_block_batch(
+                    batch.blocks, batch.peer, None if advanced_peak else uint32(fork_point_height), summaries
+                )
+                if success is False:
+                    await batch.peer.close(600)
+                    downloader.reject(batch)
+                    continue
+                blocks_added += len(batch.blocks)
+
+                peak = self.blockchain.get_peak()
+                assert peak is not None
+                msg = make_msg(
+                    ProtocolMessageTypes.new_peak_wallet,
+                    wallet_protocol.NewPeakWallet(
+                        peak.header_hash,
+                        peak.height,
+                        peak.weight,
+                        uint32(max(peak.height - 1, uint32(0))),
+                    ),
+                )
+                await self.server.send_to_all([msg], NodeType.WALLET)
 
-            if self.sync_store.peers_changed.is_set():
-                peer_ids = self.sync_store.get_peers_that_have_peak([peak_hash])
-                peers_with_peak = [c for c in self.server.all_connections.values() if c.peer_node_id in peer_ids]
-                self.log.info(f"Number of peers we are syncing from: {len(peers_with_peak)}")
-                self.sync_store.peers_changed.clear()
+                if self.sync_store.peers_changed.is_set():
+                    peer_ids = self.sync_store.get_peers_that_have_peak([peak_hash])
+                    peers_with_peak = [c for c in self.server.all_connections.values() if c.peer_node_id in peer_ids]
+                    for peer in peers_with_peak:
+                        downloader.add_peer(peer)
+                    self.log.info(f"Number of peers we are syncing from: {len(peers_with_peak)}")
+                    self.sync_store.peers_changed.clear()
 
-            if batch_added is False:
-                self.log.info(f"Failed to fetch blocks {start_height} to {end_height} from peers: {peers_with_peak}")
-                break
-            else:
                 self.log.info(f"Added blocks {start_height} to {end_height}")
                 self.blockchain.clean_block_record(
                     min(
@@ -776,6 +787,13 @@ class FullNode:
                         peak.height - self.constants.BLOCKS_CACHE_SIZE,
                     )
                 )
+        finally:
+            downloader.close()
+        sync_time = time.time() - sync_start
+        self.log.info(
+            f"Synced {blocks_added} blocks in {sync_time} seconds ({blocks_added / max(sync_time, 0.001)} blocks/sec) "
+            f"from {len(downloader.throughput)} peers"
+        )
 
     async def receive_block_batch(
         self,
@@ -1608,16 +1626,15 @@ class FullNode:
             error: Optional[Err] = Err.NO_TRANSACTIONS_WHILE_SYNCING
             self.mempool_manager.remove_seen(spend_name)
         else:
+            result_future: asyncio.Future = asyncio.get_running_loop().create_future()
+            self._tx_batch.append((transaction, spend_name, result_future))
+            if self._tx_batch_task is None:
+                self._tx_batch_task = asyncio.create_task(self._add_transaction_batch())
             try:
-                cost_result = await self.mempool_manager.pre_validate_spendbundle(transaction)
+                cost, status, error = await result_future
             except Exception as e:
                 self.mempool_manager.remove_seen(spend_name)
                 raise e
-            async with self.mempool_manager.lock:
-                if self.mempool_manager.get_spendbundle(spend_name) is not None:
-                    self.mempool_manager.remove_seen(spend_name)
-                    return MempoolInclusionStatus.FAILED, Err.ALREADY_INCLUDING_TRANSACTION
-                cost, status, error = await self.mempool_manager.add_spendbundle(transaction, cost_result, spend_name)
             if status == MempoolInclusionStatus.SUCCESS:
                 self.log.debug(
                     f"Added transaction to mempool: {spend_name} mempool size: "
@@ -1626,7 +1643,9 @@ class FullNode:
                 # Only broadcast successful transactions, not pending ones. Otherwise it's a DOS
                 # vector.
                 mempool_item = self.mempool_manager.get_mempool_item(spend_name)
-                assert mempool_item is not None
+                if mempool_item is None:
+                    # Replaced by a transaction with a higher fee from the same batch
+                    return status, error
                 fees = mempool_item.fee
                 assert fees >= 0
                 assert cost is not None
@@ -1647,6 +1666,34 @@ class FullNode:
                 )
         return status, error
 
+    async def _add_transaction_batch(self):
+        """
+        Adds the transactions received concurrently to the mempool in batches, so that they are validated
+        in parallel and their coins are fetched together.
+        """
+        try:
+            # Lets the transactions that arrived with the first one join the batch
+            await asyncio.sleep(0)
+            while len(self._tx_batch) > 0:
+                batch = self._tx_batch
+                self._tx_batch = []
+                try:
+                    results = await self.mempool_manager.add_spendbundles(
+                        [(transaction, spend_name) for transaction, spend_name, _ in batch]
+                    )
+                except Exception as e:
+                    results = [e] * len(batch)
+                for (_, _, result_future), result in zip(batch, results):
+                    # The waiter is cancelled if its peer disconnected or its request timed out
+                    if result_future.done():
+                        continue
+                    if isinstance(result, Exception):
+                        result_future.set_exception(result)
+                    else:
+                        result_future.set_result(result)
+        finally:
+            self._tx_batch_task = None
+
     async def _needs_compact_proof(
         self, vdf_info: VDFInfo, header_block: HeaderBlock, field_vdf: CompressibleVDFField
     ) -> bool:
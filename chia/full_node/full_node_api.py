@@ -27,6 +27,7 @@ from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.types.coin_record import CoinRecord
 from chia.types.end_of_slot_bundle import EndOfSubSlotBundle
 from chia.types.full_block import FullBlock
+from chia.types.full_block_view import FullBlockView
 from chia.types.generator_types import BlockGenerator
 from chia.types.mempool_inclusion_status import MempoolInclusionStatus
 from chia.types.mempool_item import MempoolItem
@@ -237,11 +238,11 @@ class FullNodeAPI:
         if request.tip in self.full_node.pow_creation:
             event = self.full_node.pow_creation[request.tip]
             await event.wait()
-            wp = await self.full_node.weight_proof_handler.get_proof_of_weight(request.tip)
+            wp_bytes = await self.full_node.weight_proof_handler.get_serialized_proof_of_weight(request.tip)
         else:
             event = asyncio.Event()
             self.full_node.pow_creation[request.tip] = event
-            wp = await self.full_node.weight_proof_handler.get_proof_of_weight(request.tip)
+            wp_bytes = await self.full_node.weight_proof_handler.get_serialized_proof_of_weight(request.tip)
             event.set()
         tips = list(self.full_node.pow_creation.keys())
 
@@ -250,22 +251,12 @@ class FullNodeAPI:
             for i in range(0, 4):
                 self.full_node.pow_creation.pop(tips[i])
 
-        if wp is None:
+        if wp_bytes is None:
             self.log.error(f"failed creating weight proof for peak {request.tip}")
             return None
 
-        # Serialization of wp is slow
-        if (
-            self.full_node.full_node_store.serialized_wp_message_tip is not None
-            and self.full_node.full_node_store.serialized_wp_message_tip == request.tip
-        ):
-            return self.full_node.full_node_store.serialized_wp_message
-        message = make_msg(
-            ProtocolMessageTypes.respond_proof_of_weight, full_node_protocol.RespondProofOfWeight(wp, request.tip)
-        )
-        self.full_node.full_node_store.serialized_wp_message_tip = request.tip
-        self.full_node.full_node_store.serialized_wp_message = message
-        return message
+        # Serialization of wp is slow, the handler keeps the bytes of the proofs, same as RespondProofOfWeight(wp, tip)
+        return Message(uint8(ProtocolMessageTypes.respond_proof_of_weight.value), None, wp_bytes + request.tip)
 
     @api_request
     async def respond_proof_of_weight(self, request: full_node_protocol.RespondProofOfWeight) -> Optional[Message]:
@@ -1049,7 +1040,7 @@ class FullNodeAPI:
         if header_hash is None:
             msg = make_msg(ProtocolMessageTypes.reject_header_request, RejectHeaderRequest(request.height))
             return msg
-        block: Optional[FullBlock] = await self.full_node.block_store.get_full_block(header_hash)
+        block: Optional[FullBlockView] = await self.full_node.block_store.get_full_block_view(header_hash)
         if block is not None:
             tx_removals, tx_additions = await self.full_node.blockchain.get_tx_removals_and_additions(block)
             header_block = get_block_header(block, tx_additions, tx_removals)
@@ -1062,7 +1053,7 @@ class FullNodeAPI:
 
     @api_request
     async def request_additions(self, request: wallet_protocol.RequestAdditions) -> Optional[Message]:
-        block: Optional[FullBlock] = await self.full_node.block_store.get_full_block(request.header_hash)
+        block: Optional[FullBlockView] = await self.full_node.block_store.get_full_block_view(request.header_hash)
 
         # We lock so that the coin store does not get modified
         if (
@@ -1125,14 +1116,16 @@ class FullNodeAPI:
 
     @api_request
     async def request_removals(self, request: wallet_protocol.RequestRemovals) -> Optional[Message]:
-        block: Optional[FullBlock] = await self.full_node.block_store.get_full_block(request.header_hash)
+        block: Optional[FullBlockView] = await self.full_node.block_store.get_full_block_view(request.header_hash)
+        peak_height: Optional[uint32] = self.full_node.blockchain.get_peak_height()
 
         # We lock so that the coin store does not get modified
         if (
             block is None
             or block.is_transaction_block() is False
             or block.height != request.height
-            or block.height > self.full_node.blockchain.get_peak_height()
+            or peak_height is None
+            or block.height > peak_height
             or self.full_node.blockchain.height_to_hash(block.height) != request.header_hash
         ):
             reject = wallet_protocol.RejectRemovalsRequest(request.height, request.header_hash)
@@ -1241,23 +1234,18 @@ class FullNodeAPI:
         if request.end_height < request.start_height or request.end_height - request.start_height > 32:
             return None
 
-        header_hashes = []
         for i in range(request.start_height, request.end_height + 1):
             if not self.full_node.blockchain.contains_height(uint32(i)):
                 reject = RejectHeaderBlocks(request.start_height, request.end_height)
                 msg = make_msg(ProtocolMessageTypes.reject_header_blocks, reject)
                 return msg
-            header_hashes.append(self.full_node.blockchain.height_to_hash(uint32(i)))
-
-        blocks: List[FullBlock] = await self.full_node.block_store.get_blocks_by_hash(header_hashes)
-        header_blocks = []
-        for block in blocks:
-            added_coins_records = await self.full_node.coin_store.get_coins_added_at_height(block.height)
-            removed_coins_records = await self.full_node.coin_store.get_coins_removed_at_height(block.height)
-            added_coins = [record.coin for record in added_coins_records if not record.coinbase]
-            removal_names = [record.coin.name() for record in removed_coins_records]
-            header_block = get_block_header(block, added_coins, removal_names)
-            header_blocks.append(header_block)
+
+        header_blocks = [
+            header_block
+            async for header_block in self.full_node.blockchain.stream_header_blocks_in_range(
+                request.start_height, request.end_height
+            )
+        ]
 
         msg = make_msg(
             ProtocolMessageTypes.respond_header_blocks,
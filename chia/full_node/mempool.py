@@ -1,3 +1,4 @@
+import math
 from typing import Dict, List
 
 from sortedcontainers import SortedDict
@@ -5,6 +6,24 @@ from sortedcontainers import SortedDict
 from chia.types.blockchain_format.coin import Coin
 from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.types.mempool_item import MempoolItem
+from chia.util.fenwick_tree import FenwickTree
+
+# Fee per cost rates are grouped into buckets, FEE_RATE_BUCKETS_PER_OCTAVE for each power of two between
+# 2 ** MIN_FEE_RATE_OCTAVE and 2 ** MAX_FEE_RATE_OCTAVE. Rates outside of that range share the first or last bucket.
+FEE_RATE_BUCKETS_PER_OCTAVE = 8
+MIN_FEE_RATE_OCTAVE = -32
+MAX_FEE_RATE_OCTAVE = 64
+FEE_RATE_BUCKETS = (MAX_FEE_RATE_OCTAVE - MIN_FEE_RATE_OCTAVE) * FEE_RATE_BUCKETS_PER_OCTAVE + 2
+
+
+def fee_rate_bucket(fee_per_cost: float) -> int:
+    """
+    Returns the bucket of a fee per cost rate. Higher rates are never in lower buckets.
+    """
+    if fee_per_cost <= 0:
+        return 0
+    bucket = math.floor((math.log2(fee_per_cost) - MIN_FEE_RATE_OCTAVE) * FEE_RATE_BUCKETS_PER_OCTAVE) + 1
+    return min(max(bucket, 0), FEE_RATE_BUCKETS - 1)
 
 
 class Mempool:
@@ -15,6 +34,11 @@ class Mempool:
         self.removals: Dict[bytes32, MempoolItem] = {}
         self.max_size_in_cost: int = max_size_in_cost
         self.total_mempool_cost: int = 0
+        # Total cost of the items with each fee per cost rate
+        self.rate_costs: Dict[float, int] = {}
+        # Total cost of the items, and number of distinct fee per cost rates (keys of sorted_spends), in each bucket
+        self.bucket_costs: FenwickTree = FenwickTree(FEE_RATE_BUCKETS)
+        self.bucket_rates: FenwickTree = FenwickTree(FEE_RATE_BUCKETS)
 
     def get_min_fee_rate(self, cost: int) -> float:
         """
@@ -22,15 +46,21 @@ class Mempool:
         """
 
         if self.at_full_capacity(cost):
-            current_cost = self.total_mempool_cost
-
-            # Iterates through all spends in increasing fee per cost
-            for fee_per_cost, spends_with_fpc in self.sorted_spends.items():
-                for spend_name, item in spends_with_fpc.items():
-                    current_cost -= item.cost
-                    # Removing one at a time, until our transaction of size cost fits
-                    if current_cost + cost <= self.max_size_in_cost:
-                        return fee_per_cost
+            # The cheapest items, in increasing fee per cost, are removed until our transaction of size cost fits
+            cost_to_free = self.total_mempool_cost + cost - self.max_size_in_cost
+            if cost_to_free > self.total_mempool_cost:
+                raise ValueError(
+                    f"Transaction with cost {cost} does not fit in mempool of max cost {self.max_size_in_cost}"
+                )
+
+            # Skips the buckets that can all be removed without freeing enough cost
+            bucket = self.bucket_costs.find(cost_to_free)
+            freed_cost = self.bucket_costs.prefix_sum(bucket)
+            first_rate_index = self.bucket_rates.prefix_sum(bucket)
+            for fee_per_cost in self.sorted_spends.islice(first_rate_index):
+                freed_cost += self.rate_costs[fee_per_cost]
+                if freed_cost >= cost_to_free:
+                    return fee_per_cost
             raise ValueError(
                 f"Transaction with cost {cost} does not fit in mempool of max cost {self.max_size_in_cost}"
             )
@@ -41,17 +71,20 @@ class Mempool:
         """
         Removes an item from the mempool.
         """
-        removals: List[Coin] = item.spend_bundle.removals()
-        additions: List[Coin] = item.spend_bundle.additions()
-        for rem in removals:
+        for rem in item.removals:
             del self.removals[rem.name()]
-        for add in additions:
+        for add in item.additions:
             del self.additions[add.name()]
         del self.spends[item.name]
         del self.sorted_spends[item.fee_per_cost][item.name]
+        bucket = fee_rate_bucket(item.fee_per_cost)
+        self.bucket_costs.add(bucket, -item.cost)
+        self.rate_costs[item.fee_per_cost] -= item.cost
         dic = self.sorted_spends[item.fee_per_cost]
-        if len(dic.values()) == 0:
+        if len(dic) == 0:
             del self.sorted_spends[item.fee_per_cost]
+            del self.rate_costs[item.fee_per_cost]
+            self.bucket_rates.add(bucket, -1)
         self.total_mempool_cost -= item.cost
         assert self.total_mempool_cost >= 0
 
@@ -68,16 +101,21 @@ class Mempool:
         while self.at_full_capacity(item.cost):
             # Val is Dict[hash, MempoolItem]
             fee_per_cost, val = self.sorted_spends.peekitem(index=0)
-            to_remove = list(val.values())[0]
+            to_remove = next(iter(val.values()))
             self.remove_from_pool(to_remove)
 
         self.spends[item.name] = item
 
         # sorted_spends is Dict[float, Dict[bytes32, MempoolItem]]
+        bucket = fee_rate_bucket(item.fee_per_cost)
         if item.fee_per_cost not in self.sorted_spends:
             self.sorted_spends[item.fee_per_cost] = {}
+            self.rate_costs[item.fee_per_cost] = 0
+            self.bucket_rates.add(bucket, 1)
 
         self.sorted_spends[item.fee_per_cost][item.name] = item
+        self.rate_costs[item.fee_per_cost] += item.cost
+        self.bucket_costs.add(bucket, item.cost)
 
         for add in additions:
             self.additions[add.name()] = item
@@ -4,7 +4,7 @@ import dataclasses
 import logging
 import time
 from concurrent.futures.process import ProcessPoolExecutor
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Dict, List, Optional, Set, Tuple, Union
 from blspy import AugSchemeMPL, G1Element
 from chiabip158 import PyBIP158
 
@@ -37,6 +37,22 @@ from chia.util.streamable import recurse_jsonify
 
 log = logging.getLogger(__name__)
 
+# Conditions that depend on the height or timestamp of the peak, which are checked again on each new peak
+TIME_AND_HEIGHT_CONDITIONS = {
+    ConditionOpcode.ASSERT_HEIGHT_ABSOLUTE,
+    ConditionOpcode.ASSERT_HEIGHT_RELATIVE,
+    ConditionOpcode.ASSERT_SECONDS_ABSOLUTE,
+    ConditionOpcode.ASSERT_SECONDS_RELATIVE,
+}
+
+
+def has_time_or_height_conditions(item: MempoolItem) -> bool:
+    for npc in item.npc_result.npc_list:
+        for opcode, _ in npc.conditions:
+            if opcode in TIME_AND_HEIGHT_CONDITIONS:
+                return True
+    return False
+
 
 def get_npc_multiprocess(spend_bundle_bytes: bytes, max_cost: int) -> bytes:
     program = simple_solution_generator(SpendBundle.from_bytes(spend_bundle_bytes))
@@ -44,8 +60,43 @@ def get_npc_multiprocess(spend_bundle_bytes: bytes, max_cost: int) -> bytes:
     return bytes(get_name_puzzle_conditions(program, max_cost, True))
 
 
+def validate_spend_bundles_multiprocess(
+    spend_bundles_bytes: List[bytes], max_cost: int, agg_sig_me_additional_data: bytes
+) -> List[Tuple[Optional[bytes], bool, Optional[str]]]:
+    """
+    Runs the spend bundles and checks their aggregate signatures. Returns the serialized NPCResult of each bundle,
+    and whether its signature was found valid. Bundles with an invalid signature are checked again by
+    add_spendbundle, so that the same error is returned as for a single transaction. A bundle that raises gets
+    no NPCResult and the message of the exception instead, so that the other bundles are still validated.
+    """
+    results: List[Tuple[Optional[bytes], bool, Optional[str]]] = []
+    for spend_bundle_bytes in spend_bundles_bytes:
+        try:
+            spend_bundle = SpendBundle.from_bytes(spend_bundle_bytes)
+            npc_result = get_name_puzzle_conditions(simple_solution_generator(spend_bundle), max_cost, True)
+        except Exception as e:
+            results.append((None, False, f"{type(e).__name__}: {e}"))
+            continue
+        signature_valid = False
+        if npc_result.error is None:
+            pks: List[G1Element] = []
+            msgs: List[bytes] = []
+            try:
+                for npc in npc_result.npc_list:
+                    for pk, msg in pkm_pairs_for_conditions_dict(
+                        npc.condition_dict, npc.coin_name, agg_sig_me_additional_data
+                    ):
+                        pks.append(pk)
+                        msgs.append(msg)
+                signature_valid = AugSchemeMPL.aggregate_verify(pks, msgs, spend_bundle.aggregated_signature)
+            except Exception:
+                signature_valid = False
+        results.append((bytes(npc_result), signature_valid, None))
+    return results
+
+
 class MempoolManager:
-    def __init__(self, coin_store: CoinStore, consensus_constants: ConsensusConstants):
+    def __init__(self, coin_store: CoinStore, consensus_constants: ConsensusConstants, num_workers: int = 1):
         self.constants: ConsensusConstants = consensus_constants
         self.constants_json = recurse_jsonify(dataclasses.asdict(self.constants))
 
@@ -66,7 +117,10 @@ class MempoolManager:
         self.potential_cache_max_total_cost = int(self.constants.MAX_BLOCK_COST_CLVM * 5)
         self.potential_cache_cost: int = 0
         self.seen_cache_size = 10000
-        self.pool = ProcessPoolExecutor(max_workers=1)
+        self.num_workers = max(num_workers, 1)
+        self.pool = ProcessPoolExecutor(max_workers=self.num_workers)
+        # Maximum number of spend bundles validated by one worker in one call, when validating many at once
+        self.validation_batch_size = 50
 
         # The mempool will correspond to a certain peak
         self.peak: Optional[BlockRecord] = None
@@ -221,6 +275,75 @@ class MempoolManager:
         log.info(f"It took {end_time - start_time} to pre validate transaction")
         return NPCResult.from_bytes(cached_result_bytes)
 
+    async def pre_validate_spendbundles(
+        self, new_spends: List[SpendBundle]
+    ) -> List[Union[Tuple[NPCResult, bool], Exception]]:
+        """
+        Runs the spend bundles and checks their aggregate signatures, in batches spread over the process pool.
+        Returns the NPCResult of each spend bundle, and whether its signature is valid, or the exception it raised.
+        """
+        start_time = time.time()
+        loop = asyncio.get_running_loop()
+        spends_bytes = [bytes(new_spend) for new_spend in new_spends]
+        batch_size = min(self.validation_batch_size, max(1, -(-len(spends_bytes) // self.num_workers)))
+        futures = [
+            loop.run_in_executor(
+                self.pool,
+                validate_spend_bundles_multiprocess,
+                spends_bytes[i : i + batch_size],
+                self.constants.MAX_BLOCK_COST_CLVM,
+                self.constants.AGG_SIG_ME_ADDITIONAL_DATA,
+            )
+            for i in range(0, len(spends_bytes), batch_size)
+        ]
+        results: List[Union[Tuple[NPCResult, bool], Exception]] = []
+        for batch_results in await asyncio.gather(*futures):
+            for npc_result_bytes, signature_valid, error in batch_results:
+                if npc_result_bytes is None:
+                    results.append(ValueError(f"Could not validate spend bundle: {error}"))
+                else:
+                    results.append((NPCResult.from_bytes(npc_result_bytes), signature_valid))
+        log.info(f"It took {time.time() - start_time} to pre validate {len(new_spends)} transactions")
+        return results
+
+    async def add_spendbundles(
+        self, new_spends: List[Tuple[SpendBundle, bytes32]]
+    ) -> List[Union[Tuple[Optional[uint64], MempoolInclusionStatus, Optional[Err]], Exception]]:
+        """
+        Tries to add many spend bundles to the mempool. The bundles are validated together in the process pool,
+        and the coin records they spend are fetched with a single query. Returns the result of add_spendbundle for
+        each bundle, in order, or the exception that it raised.
+        """
+        pre_validated = await self.pre_validate_spendbundles([new_spend for new_spend, _ in new_spends])
+        results: List[Union[Tuple[Optional[uint64], MempoolInclusionStatus, Optional[Err]], Exception]] = []
+        async with self.lock:
+            removal_names: List[bytes32] = []
+            for pre_validation in pre_validated:
+                if not isinstance(pre_validation, Exception) and pre_validation[0].error is None:
+                    removal_names.extend(npc.coin_name for npc in pre_validation[0].npc_list)
+            removal_records = await self.coin_store.get_coin_records_by_names(removal_names)
+            for (new_spend, spend_name), pre_validation in zip(new_spends, pre_validated):
+                if isinstance(pre_validation, Exception):
+                    results.append(pre_validation)
+                    continue
+                if self.get_spendbundle(spend_name) is not None:
+                    results.append((None, MempoolInclusionStatus.FAILED, Err.ALREADY_INCLUDING_TRANSACTION))
+                    continue
+                npc_result, signature_valid = pre_validation
+                try:
+                    results.append(
+                        await self.add_spendbundle(
+                            new_spend,
+                            npc_result,
+                            spend_name,
+                            validate_signature=not signature_valid,
+                            removal_records=removal_records,
+                        )
+                    )
+                except Exception as e:
+                    results.append(e)
+        return results
+
     async def add_spendbundle(
         self,
         new_spend: SpendBundle,
@@ -228,10 +351,12 @@ class MempoolManager:
         spend_name: bytes32,
         validate_signature=True,
         program: Optional[SerializedProgram] = None,
+        removal_records: Optional[Dict[bytes32, CoinRecord]] = None,
     ) -> Tuple[Optional[uint64], MempoolInclusionStatus, Optional[Err]]:
         """
         Tries to add spend bundle to the mempool
         Returns the cost (if SUCCESS), the result (MempoolInclusion status), and an optional error
+        removal_records can hold coin records prefetched from the coin store, coins not in it are looked up.
         """
         start_time = time.time()
         if self.peak is None:
@@ -292,7 +417,10 @@ class MempoolManager:
         removal_coin_dict: Dict[bytes32, Coin] = {}
         removal_amount = uint64(0)
         for name in removal_names:
-            removal_record = await self.coin_store.get_coin_record(name)
+            if removal_records is not None and name in removal_records:
+                removal_record: Optional[CoinRecord] = removal_records[name]
+            else:
+                removal_record = await self.coin_store.get_coin_record(name)
             if removal_record is None and name not in additions_dict:
                 return None, MempoolInclusionStatus.FAILED, Err.UNKNOWN_UNSPENT
             elif name in additions_dict:
@@ -504,37 +632,107 @@ class MempoolManager:
         if new_peak.timestamp <= self.constants.INITIAL_FREEZE_END_TIMESTAMP:
             return []
 
+        old_peak = self.peak
         self.peak = new_peak
 
-        old_pool = self.mempool
+        start_time = time.time()
         async with self.lock:
-            self.mempool = Mempool(self.mempool_max_total_cost)
-
-            for item in old_pool.spends.values():
-                _, result, _ = await self.add_spendbundle(
-                    item.spend_bundle, item.npc_result, item.spend_bundle_name, False, item.program
-                )
-                # If the spend bundle was confirmed or conflicting (can no longer be in mempool), it won't be
-                # successfully added to the new mempool. In this case, remove it from seen, so in the case of a reorg,
-                # it can be resubmitted
-                if result != MempoolInclusionStatus.SUCCESS:
-                    self.remove_seen(item.spend_bundle_name)
-
-            potential_txs_copy = self.potential_txs.copy()
-            self.potential_txs = {}
-            txs_added = []
-            for item in potential_txs_copy.values():
-                cost, status, error = await self.add_spendbundle(
-                    item.spend_bundle, item.npc_result, item.spend_bundle_name, program=item.program
-                )
-                if status == MempoolInclusionStatus.SUCCESS:
-                    txs_added.append((item.spend_bundle, item.npc_result, item.spend_bundle_name))
+            if old_peak is not None and new_peak.prev_transaction_block_hash == old_peak.header_hash:
+                # The coin set only changed by the coins added and removed in the new peak
+                touched, txs_added = await self.update_mempool(new_peak)
+            else:
+                touched, txs_added = await self.rebuild_mempool()
+        log.info(
+            f"Updated mempool to peak {new_peak.height}, touched {touched} items in {time.time() - start_time} seconds"
+        )
         log.info(
             f"Size of mempool: {len(self.mempool.spends)} spends, cost: {self.mempool.total_mempool_cost} "
             f"minimum fee to get in: {self.mempool.get_min_fee_rate(100000)}"
         )
         return txs_added
 
+    async def rebuild_mempool(self) -> Tuple[int, List[Tuple[SpendBundle, NPCResult, bytes32]]]:
+        """
+        Adds all the items of the mempool, and the potential transactions, again to an empty mempool for the
+        current peak. Returns the number of items touched, and the potential transactions that were added.
+        """
+        old_pool = self.mempool
+        self.mempool = Mempool(self.mempool_max_total_cost)
+
+        for item in old_pool.spends.values():
+            _, result, _ = await self.add_spendbundle(
+                item.spend_bundle, item.npc_result, item.spend_bundle_name, False, item.program
+            )
+            # If the spend bundle was confirmed or conflicting (can no longer be in mempool), it won't be
+            # successfully added to the new mempool. In this case, remove it from seen, so in the case of a reorg,
+            # it can be resubmitted
+            if result != MempoolInclusionStatus.SUCCESS:
+                self.remove_seen(item.spend_bundle_name)
+
+        potential_txs_copy = self.potential_txs.copy()
+        self.potential_txs = {}
+        self.potential_cache_cost = 0
+        txs_added = await self.retry_potential_txs(list(potential_txs_copy.values()))
+        return len(old_pool.spends) + len(potential_txs_copy), txs_added
+
+    async def update_mempool(self, new_peak: BlockRecord) -> Tuple[int, List[Tuple[SpendBundle, NPCResult, bytes32]]]:
+        """
+        Updates the mempool for a new peak whose previous transaction block is the current peak of the mempool.
+        Only the items that spend coins removed in the new peak, and the items with height or time conditions,
+        are touched. Returns the number of items touched, and the potential transactions that were added.
+        """
+        removed: Set[bytes32] = set(
+            record.name for record in await self.coin_store.get_coins_removed_at_height(new_peak.height)
+        )
+
+        # Items spending coins which were spent in the new peak are either confirmed or conflicting
+        confirmed_or_conflicting: Dict[bytes32, MempoolItem] = {}
+        for name in removed:
+            if name in self.mempool.removals:
+                item = self.mempool.removals[name]
+                confirmed_or_conflicting[item.name] = item
+        for item in confirmed_or_conflicting.values():
+            self.mempool.remove_from_pool(item)
+            self.remove_seen(item.name)
+
+        # The other items still spend unspent coins, only their conditions relative to the peak can change
+        to_recheck = [item for item in self.mempool.spends.values() if has_time_or_height_conditions(item)]
+        for item in to_recheck:
+            self.mempool.remove_from_pool(item)
+            _, result, _ = await self.add_spendbundle(
+                item.spend_bundle, item.npc_result, item.spend_bundle_name, False, item.program
+            )
+            if result != MempoolInclusionStatus.SUCCESS:
+                self.remove_seen(item.spend_bundle_name)
+
+        # Potential transactions can only get in if one of their conflicts, or their height or time, changed
+        to_retry: List[MempoolItem] = []
+        for item in list(self.potential_txs.values()):
+            removal_names = [coin.name() for coin in item.removals]
+            if any(name in removed for name in removal_names):
+                self.pop_potential_tx(item.spend_bundle_name)
+            elif has_time_or_height_conditions(item) or not any(
+                name in self.mempool.removals for name in removal_names
+            ):
+                self.pop_potential_tx(item.spend_bundle_name)
+                to_retry.append(item)
+        txs_added = await self.retry_potential_txs(to_retry)
+        return len(confirmed_or_conflicting) + len(to_recheck) + len(to_retry), txs_added
+
+    async def retry_potential_txs(self, items: List[MempoolItem]) -> List[Tuple[SpendBundle, NPCResult, bytes32]]:
+        txs_added = []
+        for item in items:
+            cost, status, error = await self.add_spendbundle(
+                item.spend_bundle, item.npc_result, item.spend_bundle_name, program=item.program
+            )
+            if status == MempoolInclusionStatus.SUCCESS:
+                txs_added.append((item.spend_bundle, item.npc_result, item.spend_bundle_name))
+        return txs_added
+
+    def pop_potential_tx(self, bundle_hash: bytes32) -> None:
+        item = self.potential_txs.pop(bundle_hash)
+        self.potential_cache_cost -= item.cost
+
     async def get_items_not_in_filter(self, mempool_filter: PyBIP158, limit: int = 100) -> List[MempoolItem]:
         items: List[MempoolItem] = []
         counter = 0
@@ -37,6 +37,7 @@ from chia.types.weight_proof import (
 from chia.util.block_cache import BlockCache
 from chia.util.hash import std_hash
 from chia.util.ints import uint8, uint32, uint64, uint128
+from chia.util.lru_cache import LRUCache
 from chia.util.streamable import dataclass_from_dict, recurse_jsonify
 
 log = logging.getLogger(__name__)
@@ -47,20 +48,48 @@ class WeightProofHandler:
     LAMBDA_L = 100
     C = 0.5
     MAX_SAMPLES = 20
+    # Proofs of the last few tips, since syncing peers ask for the proofs of the peaks they saw
+    PROOF_CACHE_SIZE = 4
+    # Serialized challenge segments of sampled sub epochs
+    SEGMENT_BYTES_CACHE_SIZE = 64 * 1024 * 1024
 
     def __init__(
         self,
         constants: ConsensusConstants,
         blockchain: BlockchainInterface,
+        num_workers: int = 1,
     ):
         self.tip: Optional[bytes32] = None
         self.proof: Optional[WeightProof] = None
         self.constants = constants
         self.blockchain = blockchain
         self.lock = asyncio.Lock()
+        # tip : (proof, bytes of the proof)
+        self.proofs = LRUCache(self.PROOF_CACHE_SIZE)
+        # sub epoch summary block hash : bytes of its challenge segments, without the length of the list
+        self.segment_bytes = LRUCache(100000, max_size=self.SEGMENT_BYTES_CACHE_SIZE)
+        # The header blocks of the last recent chain, with their bytes, only the new blocks are loaded for a new tip
+        self.recent_headers: Dict[bytes32, Tuple[HeaderBlock, bytes]] = {}
+        # Validates the recent chain and the segments of each sampled sub epoch in parallel, created when first used
+        self.num_workers = max(num_workers, 1)
+        self.executor: Optional[ProcessPoolExecutor] = None
 
     async def get_proof_of_weight(self, tip: bytes32) -> Optional[WeightProof]:
+        proof = await self._get_proof_of_weight(tip)
+        if proof is None:
+            return None
+        return proof[0]
 
+    async def get_serialized_proof_of_weight(self, tip: bytes32) -> Optional[bytes]:
+        """
+        Returns bytes(proof) for the proof of tip, assembled from the cached bytes of its parts.
+        """
+        proof = await self._get_proof_of_weight(tip)
+        if proof is None:
+            return None
+        return proof[1]
+
+    async def _get_proof_of_weight(self, tip: bytes32) -> Optional[Tuple[WeightProof, bytes]]:
         tip_rec = self.blockchain.try_block_record(tip)
         if tip_rec is None:
             log.error("unknown tip")
@@ -71,15 +100,16 @@ class WeightProofHandler:
             return None
 
         async with self.lock:
-            if self.proof is not None:
-                if self.proof.recent_chain_data[-1].header_hash == tip:
-                    return self.proof
-            wp = await self._create_proof_of_weight(tip)
-            if wp is None:
+            cached: Optional[Tuple[WeightProof, bytes]] = self.proofs.get(tip)
+            if cached is not None:
+                return cached
+            proof = await self._create_proof_of_weight_and_bytes(tip)
+            if proof is None:
                 return None
-            self.proof = wp
+            self.proofs.put(tip, proof)
+            self.proof = proof[0]
             self.tip = tip
-            return wp
+            return proof
 
     def get_sub_epoch_data(self, tip_height: uint32, summary_heights: List[uint32]) -> List[SubEpochData]:
         sub_epoch_data: List[SubEpochData] = []
@@ -95,8 +125,18 @@ class WeightProofHandler:
         """
         Creates a weight proof object
         """
+        proof = await self._create_proof_of_weight_and_bytes(tip)
+        if proof is None:
+            return None
+        return proof[0]
+
+    async def _create_proof_of_weight_and_bytes(self, tip: bytes32) -> Optional[Tuple[WeightProof, bytes]]:
+        """
+        Creates a weight proof object, and its bytes
+        """
         assert self.blockchain is not None
         sub_epoch_segments: List[SubEpochChallengeSegment] = []
+        segments_bytes: List[bytes] = []
         tip_rec = self.blockchain.try_block_record(tip)
         if tip_rec is None:
             log.error("failed not tip in cache")
@@ -148,9 +188,29 @@ class WeightProofHandler:
                     await self.blockchain.persist_sub_epoch_challenge_segments(ses_block.header_hash, segments)
                 log.debug(f"sub epoch {sub_epoch_n} has {len(segments)} segments")
                 sub_epoch_segments.extend(segments)
+                segments_bytes.append(self._get_segments_bytes(ses_block.header_hash, segments))
             prev_ses_block = ses_block
         log.debug(f"sub_epochs: {len(sub_epoch_data)}")
-        return WeightProof(sub_epoch_data, sub_epoch_segments, recent_chain)
+        wp = WeightProof(sub_epoch_data, sub_epoch_segments, recent_chain)
+
+        # Same as bytes(wp), without streaming the segments and headers that were in previous proofs again
+        wp_bytes = bytearray(uint32(len(sub_epoch_data)).to_bytes(4, "big"))
+        for data in sub_epoch_data:
+            wp_bytes += bytes(data)
+        wp_bytes += uint32(len(sub_epoch_segments)).to_bytes(4, "big")
+        for segment_bytes in segments_bytes:
+            wp_bytes += segment_bytes
+        wp_bytes += uint32(len(recent_chain)).to_bytes(4, "big")
+        for header_block in recent_chain:
+            wp_bytes += self.recent_headers[header_block.header_hash][1]
+        return wp, bytes(wp_bytes)
+
+    def _get_segments_bytes(self, ses_block_hash: bytes32, segments: List[SubEpochChallengeSegment]) -> bytes:
+        segments_bytes: Optional[bytes] = self.segment_bytes.get(ses_block_hash)
+        if segments_bytes is None:
+            segments_bytes = b"".join(bytes(segment) for segment in segments)
+            self.segment_bytes.put(ses_block_hash, segments_bytes, len(segments_bytes))
+        return segments_bytes
 
     def get_seed_for_proof(self, summary_heights: List[uint32], tip_height) -> bytes32:
         count = 0
@@ -176,29 +236,38 @@ class WeightProofHandler:
             if count_ses == 2:
                 min_height = ses_height - 1
                 break
-        log.debug(f"start {min_height} end {tip_height}")
-        headers = await self.blockchain.get_header_blocks_in_range(min_height, tip_height, tx_filter=False)
-        blocks = await self.blockchain.get_block_records_in_range(min_height, tip_height)
+        # The headers of the previous recent chain that are still in the chain are not loaded again
+        load_from = min_height
+        while load_from <= tip_height and self.blockchain.height_to_hash(uint32(load_from)) in self.recent_headers:
+            load_from += 1
+        log.debug(f"start {min_height} end {tip_height}, loading from {load_from}")
+        headers: Dict[bytes32, Tuple[HeaderBlock, bytes]] = {}
+        if load_from <= tip_height:
+            async for header in self.blockchain.stream_header_blocks_in_range(load_from, tip_height, tx_filter=False):
+                headers[header.header_hash] = (header, bytes(header))
+        ses_heights_set = set(ses_heights)
+        recent_headers: Dict[bytes32, Tuple[HeaderBlock, bytes]] = {}
         ses_count = 0
         curr_height = tip_height
-        blocks_n = 0
-        while ses_count < 2:
-            if curr_height == 0:
-                break
+        while True:
             # add to needed reward chain recent blocks
-            header_block = headers[self.blockchain.height_to_hash(curr_height)]
-            block_rec = blocks[header_block.header_hash]
-            if header_block is None:
+            header_hash = self.blockchain.height_to_hash(curr_height)
+            assert header_hash is not None
+            if header_hash in self.recent_headers:
+                recent_headers[header_hash] = self.recent_headers[header_hash]
+            elif header_hash in headers:
+                recent_headers[header_hash] = headers[header_hash]
+            else:
                 log.error("creating recent chain failed")
                 return None
-            recent_chain.insert(0, header_block)
-            if block_rec.sub_epoch_summary_included:
+            recent_chain.append(recent_headers[header_hash][0])
+            if ses_count >= 2 or curr_height == 0:
+                break
+            if curr_height in ses_heights_set:
                 ses_count += 1
-            curr_height = uint32(curr_height - 1)  # type: ignore
-            blocks_n += 1
-
-        header_block = headers[self.blockchain.height_to_hash(curr_height)]
-        recent_chain.insert(0, header_block)
+            curr_height = uint32(curr_height - 1)
+        recent_chain.reverse()
+        self.recent_headers = recent_headers
 
         log.info(
             f"recent chain, "
@@ -589,32 +658,43 @@ class WeightProofHandler:
             log.error("failed weight proof sub epoch sample validation")
             return False, uint32(0), []
 
-        executor = ProcessPoolExecutor(1)
-        constants, summary_bytes, wp_segment_bytes, wp_recent_chain_bytes = vars_to_bytes(
-            self.constants, summaries, weight_proof
-        )
-        segment_validation_task = asyncio.get_running_loop().run_in_executor(
-            executor, _validate_sub_epoch_segments, constants, rng, wp_segment_bytes, summary_bytes
-        )
-
-        recent_blocks_validation_task = asyncio.get_running_loop().run_in_executor(
-            executor, _validate_recent_blocks, constants, wp_recent_chain_bytes, summary_bytes
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(self.num_workers)
+        constants = recurse_jsonify(dataclasses.asdict(self.constants))
+        summary_bytes = [bytes(summary) for summary in summaries]
+        wp_recent_chain_bytes = bytes(RecentChainData(weight_proof.recent_chain_data))
+        loop = asyncio.get_running_loop()
+        recent_blocks_validation_task = loop.run_in_executor(
+            self.executor, _validate_recent_blocks, constants, wp_recent_chain_bytes, summary_bytes
         )
-
-        valid_segment_task = segment_validation_task
-        valid_recent_blocks_task = recent_blocks_validation_task
-        valid_recent_blocks = await valid_recent_blocks_task
-        if not valid_recent_blocks:
-            log.error("failed validating weight proof recent blocks")
-            return False, uint32(0), []
-
-        valid_segments = await valid_segment_task
-        if not valid_segments:
-            log.error("failed validating weight proof sub epoch segments")
-            return False, uint32(0), []
+        # The segments of each sampled sub epoch are validated on their own
+        segment_validation_tasks: List[asyncio.Future] = [
+            asyncio.ensure_future(loop.run_in_executor(self.executor, _validate_sub_epoch_chunk, constants, *chunk))
+            for chunk in _get_sub_epoch_chunks(self.constants, rng, weight_proof.sub_epoch_segments, summaries)
+        ]
+
+        try:
+            valid_recent_blocks = await recent_blocks_validation_task
+            if not valid_recent_blocks:
+                log.error("failed validating weight proof recent blocks")
+                return False, uint32(0), []
+
+            for segment_validation_task in asyncio.as_completed(segment_validation_tasks):
+                if not await segment_validation_task:
+                    log.error("failed validating weight proof sub epoch segments")
+                    return False, uint32(0), []
+        finally:
+            # Does not start validating the other sub epochs once the proof is known to be invalid
+            for task in segment_validation_tasks:
+                task.cancel()
 
         return True, self.get_fork_point(summaries), summaries
 
+    def shut_down(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
     def get_fork_point(self, received_summaries: List[SubEpochSummary]) -> uint32:
         # iterate through sub epoch summaries to find fork point
         fork_point_index = 0
@@ -924,38 +1004,83 @@ def _validate_sub_epoch_segments(
 ):
     constants, summaries = bytes_to_vars(constants_dict, summaries_bytes)
     sub_epoch_segments: SubEpochSegments = SubEpochSegments.from_bytes(weight_proof_bytes)
-    rc_sub_slot_hash = constants.GENESIS_CHALLENGE
-    total_blocks, total_ip_iters = 0, 0
-    total_slot_iters, total_slots = 0, 0
-    total_ip_iters = 0
-    prev_ses: Optional[SubEpochSummary] = None
-    segments_by_sub_epoch = map_segments_by_sub_epoch(sub_epoch_segments.challenge_segments)
+    for chunk in _get_sub_epoch_chunks(constants, rng, sub_epoch_segments.challenge_segments, summaries):
+        if not _validate_sub_epoch_chunk(constants_dict, *chunk):
+            return False
+    return True
+
+
+def _get_sub_epoch_chunks(
+    constants: ConsensusConstants,
+    rng: random.Random,
+    challenge_segments: List[SubEpochChallengeSegment],
+    summaries: List[SubEpochSummary],
+) -> List[Tuple[int, bytes, Optional[bytes], bytes32, uint64, uint64, uint64, int]]:
+    """
+    Splits the segments by sub epoch, with what is needed to validate the segments of a sub epoch on their own:
+    (sub epoch, segments bytes, previous summary bytes, reward chain hash, difficulty, sub slot iters, previous
+    sub slot iters, index of the sampled segment).
+    """
+    chunks = []
+    segments_by_sub_epoch = map_segments_by_sub_epoch(challenge_segments)
     curr_ssi = constants.SUB_SLOT_ITERS_STARTING
     for sub_epoch_n, segments in segments_by_sub_epoch.items():
         prev_ssi = curr_ssi
         curr_difficulty, curr_ssi = _get_curr_diff_ssi(constants, sub_epoch_n, summaries)
-        log.debug(f"validate sub epoch {sub_epoch_n}")
-        # recreate RewardChainSubSlot for next ses rc_hash
+        # The segments are sampled from rng in the order of the sub epochs
         sampled_seg_index = rng.choice(range(len(segments)))
-        if sub_epoch_n > 0:
-            rc_sub_slot = __get_rc_sub_slot(constants, segments[0], summaries, curr_ssi)
-            prev_ses = summaries[sub_epoch_n - 1]
-            rc_sub_slot_hash = rc_sub_slot.get_hash()
-        if not summaries[sub_epoch_n].reward_chain_hash == rc_sub_slot_hash:
-            log.error(f"failed reward_chain_hash validation sub_epoch {sub_epoch_n}")
-            return False
-        for idx, segment in enumerate(segments):
-            valid_segment, ip_iters, slot_iters, slots = _validate_segment(
-                constants, segment, curr_ssi, prev_ssi, curr_difficulty, prev_ses, idx == 0, sampled_seg_index == idx
+        prev_ses_bytes = bytes(summaries[sub_epoch_n - 1]) if sub_epoch_n > 0 else None
+        chunks.append(
+            (
+                sub_epoch_n,
+                bytes(SubEpochSegments(segments)),
+                prev_ses_bytes,
+                summaries[sub_epoch_n].reward_chain_hash,
+                curr_difficulty,
+                curr_ssi,
+                prev_ssi,
+                sampled_seg_index,
             )
-            if not valid_segment:
-                log.error(f"failed to validate sub_epoch {segment.sub_epoch_n} segment {idx} slots")
-                return False
-            prev_ses = None
-            total_blocks += 1
-            total_slot_iters += slot_iters
-            total_slots += slots
-            total_ip_iters += ip_iters
+        )
+    return chunks
+
+
+def _validate_sub_epoch_chunk(
+    constants_dict: Dict,
+    sub_epoch_n: int,
+    segments_bytes: bytes,
+    prev_ses_bytes: Optional[bytes],
+    reward_chain_hash: bytes32,
+    curr_difficulty: uint64,
+    curr_ssi: uint64,
+    prev_ssi: uint64,
+    sampled_seg_index: int,
+) -> bool:
+    """
+    Validates the segments of one sub epoch, stops at the first invalid segment.
+    """
+    constants: ConsensusConstants = dataclass_from_dict(ConsensusConstants, constants_dict)
+    segments = SubEpochSegments.from_bytes(segments_bytes).challenge_segments
+    log.debug(f"validate sub epoch {sub_epoch_n}")
+    # recreate RewardChainSubSlot for next ses rc_hash
+    prev_ses: Optional[SubEpochSummary] = None
+    rc_sub_slot_hash = constants.GENESIS_CHALLENGE
+    if prev_ses_bytes is not None:
+        ses = SubEpochSummary.from_bytes(prev_ses_bytes)
+        rc_sub_slot = __get_rc_sub_slot(constants, segments[0], ses, curr_ssi)
+        rc_sub_slot_hash = rc_sub_slot.get_hash()
+        prev_ses = ses
+    if not reward_chain_hash == rc_sub_slot_hash:
+        log.error(f"failed reward_chain_hash validation sub_epoch {sub_epoch_n}")
+        return False
+    for idx, segment in enumerate(segments):
+        valid_segment, _, _, _ = _validate_segment(
+            constants, segment, curr_ssi, prev_ssi, curr_difficulty, prev_ses, idx == 0, sampled_seg_index == idx
+        )
+        if not valid_segment:
+            log.error(f"failed to validate sub_epoch {segment.sub_epoch_n} segment {idx} slots")
+            return False
+        prev_ses = None
     return True
 
 
@@ -1328,11 +1453,12 @@ def __validate_pospace(
 def __get_rc_sub_slot(
     constants: ConsensusConstants,
     segment: SubEpochChallengeSegment,
-    summaries: List[SubEpochSummary],
+    ses: SubEpochSummary,
     curr_ssi: uint64,
 ) -> RewardChainSubSlot:
-
-    ses = summaries[uint32(segment.sub_epoch_n - 1)]
+    """
+    ses is the summary of the sub epoch before the one of segment.
+    """
     # find first challenge in sub epoch
     first_idx = None
     first = None
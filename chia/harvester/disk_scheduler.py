@@ -0,0 +1,143 @@
+import asyncio
+import bisect
+import itertools
+import time
+from concurrent.futures.thread import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+# Lookups with a lower value are done first, qualities are needed for every plot that passes the filter, while a
+# full proof is only fetched for the rare qualities that are good enough
+QUALITY_LOOKUP = 0
+FULL_PROOF_LOOKUP = 1
+LOOKUP_NAMES = {QUALITY_LOOKUP: "qualities", FULL_PROOF_LOOKUP: "full_proof"}
+
+# Lane of the plots whose device was not given to update_plots
+UNKNOWN_DEVICE = -1
+
+# Upper bounds in seconds of the buckets of the latency histograms, the last bucket has no upper bound
+LATENCY_BUCKETS = [0.01, 0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10]
+
+
+class LatencyHistogram:
+    def __init__(self, buckets: List[float] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts: List[int] = [0] * (len(buckets) + 1)
+        self.total_seconds: float = 0
+        self.max_seconds: float = 0
+
+    def record(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def to_json_dict(self) -> Dict[str, Any]:
+        count = sum(self.counts)
+        return {
+            "buckets": self.buckets,
+            "counts": self.counts,
+            "count": count,
+            "average": self.total_seconds / count if count > 0 else 0,
+            "max": self.max_seconds,
+        }
+
+
+class DiskLane:
+    """
+    The lookups of the plots on one device. They run on the threads of the lane, so a slow disk only delays its own
+    lookups, and waiting quality lookups go before waiting full proof lookups.
+    """
+
+    def __init__(self, device: int, threads: int):
+        self.device = device
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix=f"disk-{device}-")
+        # (kind, order, function, args, future)
+        self.queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self.histograms: Dict[int, LatencyHistogram] = {kind: LatencyHistogram() for kind in LOOKUP_NAMES}
+        self.workers: List[asyncio.Task] = [asyncio.create_task(self._worker()) for _ in range(threads)]
+
+    async def _worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            kind, _, function, args, future = await self.queue.get()
+            if future.done():
+                continue
+            start = time.time()
+            try:
+                result = await loop.run_in_executor(self.executor, function, *args)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+            self.histograms[kind].record(time.time() - start)
+
+    def close(self) -> None:
+        for worker in self.workers:
+            worker.cancel()
+        while not self.queue.empty():
+            self.queue.get_nowait()[4].cancel()
+        # Called on the event loop, a lookup stuck on a hung disk must not block it
+        self.executor.shutdown(wait=False)
+
+
+class DiskScheduler:
+    """
+    Runs the blocking lookups of the harvester on one lane for each device (st_dev) that holds plots, with
+    threads_per_disk threads for each lane. The devices come from the stat done when the plots are loaded, so that a
+    slow disk is never touched from the event loop.
+    """
+
+    def __init__(self, threads_per_disk: int):
+        self.threads_per_disk = max(threads_per_disk, 1)
+        self.devices: Dict[Path, int] = {}
+        self.lanes: Dict[int, DiskLane] = {}
+        self._order = itertools.count()
+        self._closed = False
+
+    def update_plots(self, devices: Dict[Path, int]) -> None:
+        """
+        Sets the device of each farmed plot, plots that are no longer farmed are forgotten.
+        """
+        self.devices = dict(devices)
+
+    async def run(self, path: Path, kind: int, function: Callable, *args) -> Any:
+        """
+        Runs function(*args) on the lane of the device of the plot at path, and returns its result.
+        """
+        if self._closed:
+            raise RuntimeError("The disk scheduler is closed")
+        device = self.devices.get(path, UNKNOWN_DEVICE)
+        lane = self.lanes.get(device)
+        if lane is None:
+            lane = DiskLane(device, self.threads_per_disk)
+            self.lanes[device] = lane
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        lane.queue.put_nowait((kind, next(self._order), function, args, future))
+        return await future
+
+    def get_stats(self) -> List[Dict[str, Any]]:
+        plots: Dict[int, int] = {}
+        for device in self.devices.values():
+            plots[device] = plots.get(device, 0) + 1
+        return [
+            {
+                "device": device,
+                "plots": plots.get(device, 0),
+                "queued_lookups": lane.queue.qsize(),
+                "latency": {
+                    LOOKUP_NAMES[kind]: histogram.to_json_dict() for kind, histogram in lane.histograms.items()
+                },
+            }
+            for device, lane in self.lanes.items()
+        ]
+
+    def close(self) -> None:
+        self._closed = True
+        for lane in self.lanes.values():
+            lane.close()
+        self.lanes = {}
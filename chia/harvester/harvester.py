@@ -1,7 +1,7 @@
 import asyncio
-import concurrent
+import functools
 import logging
-from concurrent.futures.thread import ThreadPoolExecutor
+import time
 from pathlib import Path
 from typing import Callable, Dict, List, Optional, Set, Tuple
 
@@ -9,34 +9,43 @@ from blspy import G1Element
 
 import chia.server.ws_connection as ws  # lgtm [py/import-and-import-from]
 from chia.consensus.constants import ConsensusConstants
+from chia.harvester.disk_scheduler import DiskScheduler
+from chia.harvester.plot_filter import PlotFilterIndex
+from chia.harvester.plot_watcher import InotifyWaker, PlotChanges, PlotDirectoryWatcher, PlotRefreshStats
+from chia.plotting.plot_cache import PlotCache
 from chia.plotting.plot_tools import PlotInfo
 from chia.plotting.plot_tools import add_plot_directory as add_plot_directory_pt
 from chia.plotting.plot_tools import get_plot_directories as get_plot_directories_pt
 from chia.plotting.plot_tools import load_plots
 from chia.plotting.plot_tools import remove_plot_directory as remove_plot_directory_pt
+from chia.util.path import path_from_root
 
 log = logging.getLogger(__name__)
 
 
 class Harvester:
     provers: Dict[Path, PlotInfo]
+    plot_filter_index: PlotFilterIndex
     failed_to_open_filenames: Dict[Path, int]
     no_key_filenames: Set[Path]
     farmer_public_keys: List[G1Element]
     pool_public_keys: List[G1Element]
     root_path: Path
     _is_shutdown: bool
-    executor: ThreadPoolExecutor
+    disk_scheduler: DiskScheduler
     state_changed_callback: Optional[Callable]
     cached_challenges: List
     constants: ConsensusConstants
     _refresh_lock: asyncio.Lock
+    plot_watcher: PlotDirectoryWatcher
+    refresh_stats: PlotRefreshStats
 
     def __init__(self, root_path: Path, config: Dict, constants: ConsensusConstants):
         self.root_path = root_path
 
         # From filename to prover
         self.provers = {}
+        self.plot_filter_index = PlotFilterIndex(self.provers)
         self.failed_to_open_filenames = {}
         self.no_key_filenames = set()
 
@@ -45,25 +54,42 @@ class Harvester:
         self.pool_public_keys = []
         self.match_str = None
         self.show_memo: bool = False
-        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=config["num_threads"])
+        self.disk_scheduler = DiskScheduler(config.get("num_threads_per_disk", 4))
+        self.plot_cache = PlotCache(path_from_root(root_path, config.get("plot_cache_path", "cache/plot_cache.dat")))
+        self.plot_cache.load()
         self.state_changed_callback = None
         self.server = None
         self.constants = constants
         self.cached_challenges = []
         self.log = log
         self.state_changed_callback: Optional[Callable] = None
-        self.last_load_time: float = 0
         self.plot_load_frequency = config.get("plot_loading_frequency_seconds", 120)
+        self.plot_load_batch_size = max(config.get("plot_load_batch_size", 100), 1)
+        self.plot_watcher = PlotDirectoryWatcher()
+        self.refresh_stats = PlotRefreshStats()
+        self._watch_task: Optional[asyncio.Task] = None
+        self._inotify: Optional[InotifyWaker] = None
 
     async def _start(self):
         self._refresh_lock = asyncio.Lock()
+        self._plots_changed = asyncio.Event()
+        self._inotify = InotifyWaker(self._plots_changed)
+        self._watch_task = asyncio.create_task(self._watch_plots())
 
     def _close(self):
         self._is_shutdown = True
-        self.executor.shutdown(wait=True)
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+        if self._inotify is not None:
+            self._inotify.close()
+        self.disk_scheduler.close()
 
     async def _await_closed(self):
-        pass
+        if self._watch_task is not None:
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
 
     def _set_state_changed_callback(self, callback: Callable):
         self.state_changed_callback = callback
@@ -99,28 +125,134 @@ class Harvester:
             [str(s) for s in self.no_key_filenames],
         )
 
+    def _load_plots(self, filenames: Optional[List[Path]] = None):
+        return load_plots(
+            self.provers,
+            self.failed_to_open_filenames,
+            self.farmer_public_keys,
+            self.pool_public_keys,
+            self.match_str,
+            self.show_memo,
+            self.root_path,
+            plot_cache=self.plot_cache,
+            filenames=filenames,
+        )
+
+    def _set_provers(self, provers: Dict[Path, PlotInfo]) -> None:
+        self.provers = provers
+        self.plot_filter_index = PlotFilterIndex(self.provers)
+        self.disk_scheduler.update_plots({path: plot_info.device for path, plot_info in self.provers.items()})
+
+    async def _poll_plot_directories(self) -> PlotChanges:
+        # Called with the refresh lock held, so that only one poll runs at a time
+        def blocking_poll() -> Tuple[List[Path], PlotChanges, float, float]:
+            start, start_cpu = time.time(), time.thread_time()
+            directories = [Path(directory) for directory in get_plot_directories_pt(self.root_path)]
+            changes = self.plot_watcher.poll(directories)
+            return directories, changes, time.time() - start, time.thread_time() - start_cpu
+
+        directories, changes, seconds, cpu_seconds = await asyncio.get_running_loop().run_in_executor(
+            None, blocking_poll
+        )
+        if self._inotify is not None:
+            self._inotify.set_directories(directories)
+        self.refresh_stats.record_poll(seconds, cpu_seconds)
+        return changes
+
     async def refresh_plots(self):
         locked: bool = self._refresh_lock.locked()
         changed: bool = False
         if not locked:
             async with self._refresh_lock:
                 # Avoid double refreshing of plots
-                (changed, self.provers, self.failed_to_open_filenames, self.no_key_filenames,) = load_plots(
-                    self.provers,
+                # Polled first, so that a plot added during the load is seen as added by the next poll
+                await self._poll_plot_directories()
+                (
+                    changed,
+                    provers,
                     self.failed_to_open_filenames,
-                    self.farmer_public_keys,
-                    self.pool_public_keys,
-                    self.match_str,
-                    self.show_memo,
-                    self.root_path,
-                )
+                    self.no_key_filenames,
+                ) = await asyncio.get_running_loop().run_in_executor(None, self._load_plots)
+                self._set_provers(provers)
         if changed:
             self._state_changed("plots")
 
+    async def _refresh_changed_plots(self, changes: PlotChanges) -> bool:
+        """
+        Removes the plots that are gone, and loads the added or modified plots (and the ones that failed to open a while
+        ago) in batches, off the event loop. The plots of each batch are farmed as soon as it is loaded. Called with the
+        refresh lock held.
+        """
+        changed = False
+        if len(changes.removed) > 0:
+            removed = set(changes.removed)
+            for filename in removed:
+                self.failed_to_open_filenames.pop(filename, None)
+            self.no_key_filenames -= removed
+            self._set_provers({path: info for path, info in self.provers.items() if path not in removed})
+            changed = True
+
+        for filename in changes.modified:
+            # Tried again right away, a plot that failed to open while it was copied in can be complete now
+            self.failed_to_open_filenames.pop(filename, None)
+        now = time.time()
+        # Plots that failed to open are tried again once every 20 minutes, like in load_plots
+        retry = [path for path, failed_time in self.failed_to_open_filenames.items() if now - failed_time >= 1200]
+        to_load = list(dict.fromkeys(changes.added + changes.modified + retry))
+        for i in range(0, len(to_load), self.plot_load_batch_size):
+            if self._is_shutdown:
+                break
+            batch = to_load[i : i + self.plot_load_batch_size]
+            start = time.time()
+            (
+                batch_changed,
+                batch_provers,
+                self.failed_to_open_filenames,
+                batch_no_key,
+            ) = await asyncio.get_running_loop().run_in_executor(None, functools.partial(self._load_plots, batch))
+            batch_set = set(batch)
+            provers = {path: info for path, info in self.provers.items() if path not in batch_set}
+            provers.update(batch_provers)
+            self._set_provers(provers)
+            self.no_key_filenames = (self.no_key_filenames - batch_set) | batch_no_key
+            farming_time = time.time()
+            self.refresh_stats.record_batch(len(batch), farming_time - start)
+            for path in batch_provers.keys():
+                if path in changes.seen_time:
+                    self.refresh_stats.farming_latency.record(farming_time - changes.seen_time[path])
+            changed = changed or batch_changed
+        return changed
+
+    async def _watch_plots(self):
+        """
+        Polls the plot directories every plot_load_frequency seconds, or sooner when inotify sees a change, and
+        refreshes the plots that changed. Nothing is loaded before the farmer sends the keys in the handshake.
+        """
+        while not self._is_shutdown:
+            try:
+                await asyncio.wait_for(self._plots_changed.wait(), self.plot_load_frequency)
+                # A plot being copied in shows up as several changes, wait for them to settle
+                await asyncio.sleep(1)
+            except asyncio.TimeoutError:
+                pass
+            self._plots_changed.clear()
+            if len(self.farmer_public_keys) == 0 or len(self.pool_public_keys) == 0 or self._refresh_lock.locked():
+                continue
+            changed = False
+            try:
+                async with self._refresh_lock:
+                    changes = await self._poll_plot_directories()
+                    if changes or len(self.failed_to_open_filenames) > 0:
+                        changed = await self._refresh_changed_plots(changes)
+            except Exception as e:
+                self.log.error(f"Error refreshing the plots: {e}")
+            if changed:
+                self._state_changed("plots")
+
     def delete_plot(self, str_path: str):
         path = Path(str_path).resolve()
         if path in self.provers:
-            del self.provers[path]
+            self._set_provers({filename: info for filename, info in self.provers.items() if filename != path})
 
         # Remove absolute and relative paths
         if path.exists():
@@ -141,5 +273,13 @@ class Harvester:
         remove_plot_directory_pt(str_path, self.root_path)
         return True
 
+    def get_disk_stats(self) -> List[Dict]:
+        return self.disk_scheduler.get_stats()
+
+    def get_plot_refresh_stats(self) -> Dict:
+        stats = self.refresh_stats.to_json_dict()
+        stats["inotify"] = self._inotify is not None and self._inotify.enabled
+        return stats
+
     def set_server(self, server):
         self.server = server
@@ -1,13 +1,14 @@
 import asyncio
 import time
 from pathlib import Path
-from typing import Callable, List, Tuple
+from typing import Callable, List, Optional, Tuple
 
 from blspy import AugSchemeMPL, G2Element
 
 from chia.consensus.pot_iterations import calculate_iterations_quality, calculate_sp_interval_iters
+from chia.harvester.disk_scheduler import FULL_PROOF_LOOKUP, QUALITY_LOOKUP
 from chia.harvester.harvester import Harvester
-from chia.plotting.plot_tools import PlotInfo, parse_plot_info
+from chia.plotting.plot_tools import PlotInfo, get_plot_local_sk
 from chia.protocols import harvester_protocol
 from chia.protocols.farmer_protocol import FarmingInfo
 from chia.protocols.protocol_message_types import ProtocolMessageTypes
@@ -17,7 +18,6 @@ from chia.types.blockchain_format.proof_of_space import ProofOfSpace
 from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.util.api_decorators import api_request, peer_required
 from chia.util.ints import uint8, uint32, uint64
-from chia.wallet.derive_keys import master_sk_to_local_sk
 
 
 class HarvesterAPI:
@@ -69,127 +69,113 @@ class HarvesterAPI:
         start = time.time()
         assert len(new_challenge.challenge_hash) == 32
 
-        # Refresh plots to see if there are any new ones
-        if start - self.harvester.last_load_time > self.harvester.plot_load_frequency:
-            await self.harvester.refresh_plots()
-            self.harvester.last_load_time = time.time()
+        sp_interval_iters = calculate_sp_interval_iters(self.harvester.constants, new_challenge.sub_slot_iters)
 
-        loop = asyncio.get_running_loop()
-
-        def blocking_lookup(filename: Path, plot_info: PlotInfo) -> List[Tuple[bytes32, ProofOfSpace]]:
+        def blocking_qualities(filename: Path, plot_info: PlotInfo) -> Tuple[bytes32, List[bytes32]]:
             # Uses the DiskProver object to lookup qualities. This is a blocking call,
-            # so it should be run in a thread pool.
+            # so it is run on the lane of the disk of the plot.
+            plot_id = plot_info.prover.get_id()
+            sp_challenge_hash = ProofOfSpace.calculate_pos_challenge(
+                plot_id,
+                new_challenge.challenge_hash,
+                new_challenge.sp_hash,
+            )
             try:
-                plot_id = plot_info.prover.get_id()
-                sp_challenge_hash = ProofOfSpace.calculate_pos_challenge(
-                    plot_id,
-                    new_challenge.challenge_hash,
-                    new_challenge.sp_hash,
+                quality_strings = plot_info.prover.get_qualities_for_challenge(sp_challenge_hash)
+            except Exception as e:
+                self.harvester.log.error(f"Error using prover object {e}")
+                self.harvester.log.error(
+                    f"File: {filename} Plot ID: {plot_id.hex()}, "
+                    f"challenge: {sp_challenge_hash}, plot_info: {plot_info}"
                 )
-                try:
-                    quality_strings = plot_info.prover.get_qualities_for_challenge(sp_challenge_hash)
-                except Exception as e:
-                    self.harvester.log.error(f"Error using prover object {e}")
-                    self.harvester.log.error(
-                        f"File: {filename} Plot ID: {plot_id.hex()}, "
-                        f"challenge: {sp_challenge_hash}, plot_info: {plot_info}"
-                    )
-                    return []
-
-                responses: List[Tuple[bytes32, ProofOfSpace]] = []
-                if quality_strings is not None:
-                    # Found proofs of space (on average 1 is expected per plot)
-                    for index, quality_str in enumerate(quality_strings):
-                        required_iters: uint64 = calculate_iterations_quality(
-                            self.harvester.constants.DIFFICULTY_CONSTANT_FACTOR,
-                            quality_str,
-                            plot_info.prover.get_size(),
-                            new_challenge.difficulty,
-                            new_challenge.sp_hash,
-                        )
-                        sp_interval_iters = calculate_sp_interval_iters(
-                            self.harvester.constants, new_challenge.sub_slot_iters
-                        )
-                        if required_iters < sp_interval_iters:
-                            # Found a very good proof of space! will fetch the whole proof from disk,
-                            # then send to farmer
-                            try:
-                                proof_xs = plot_info.prover.get_full_proof(sp_challenge_hash, index)
-                            except Exception as e:
-                                self.harvester.log.error(f"Exception fetching full proof for {filename}. {e}")
-                                self.harvester.log.error(
-                                    f"File: {filename} Plot ID: {plot_id.hex()}, challenge: {sp_challenge_hash}, "
-                                    f"plot_info: {plot_info}"
-                                )
-                                continue
-
-                            # Look up local_sk from plot to save locked memory
-                            (
-                                pool_public_key_or_puzzle_hash,
-                                farmer_public_key,
-                                local_master_sk,
-                            ) = parse_plot_info(plot_info.prover.get_memo())
-                            local_sk = master_sk_to_local_sk(local_master_sk)
-                            plot_public_key = ProofOfSpace.generate_plot_public_key(
-                                local_sk.get_g1(), farmer_public_key
-                            )
-                            responses.append(
-                                (
-                                    quality_str,
-                                    ProofOfSpace(
-                                        sp_challenge_hash,
-                                        plot_info.pool_public_key,
-                                        plot_info.pool_contract_puzzle_hash,
-                                        plot_public_key,
-                                        uint8(plot_info.prover.get_size()),
-                                        proof_xs,
-                                    ),
-                                )
-                            )
-                return responses
+                return sp_challenge_hash, []
+            if quality_strings is None:
+                return sp_challenge_hash, []
+            return sp_challenge_hash, quality_strings
+
+        def blocking_full_proof(
+            filename: Path, plot_info: PlotInfo, sp_challenge_hash: bytes32, index: int
+        ) -> Optional[ProofOfSpace]:
+            # Found a very good proof of space! will fetch the whole proof from disk, then send to farmer
+            try:
+                proof_xs = plot_info.prover.get_full_proof(sp_challenge_hash, index)
             except Exception as e:
-                self.harvester.log.error(f"Unknown error: {e}")
-                return []
+                self.harvester.log.error(f"Exception fetching full proof for {filename}. {e}")
+                self.harvester.log.error(
+                    f"File: {filename} Plot ID: {plot_info.prover.get_id().hex()}, challenge: {sp_challenge_hash}, "
+                    f"plot_info: {plot_info}"
+                )
+                return None
+
+            return ProofOfSpace(
+                sp_challenge_hash,
+                plot_info.pool_public_key,
+                plot_info.pool_contract_puzzle_hash,
+                plot_info.plot_public_key,
+                uint8(plot_info.prover.get_size()),
+                proof_xs,
+            )
 
         async def lookup_challenge(
             filename: Path, plot_info: PlotInfo
         ) -> Tuple[Path, List[harvester_protocol.NewProofOfSpace]]:
-            # Executes a DiskProverLookup in a thread pool, and returns responses
+            # Runs the lookups on the lane of the disk of the plot, and returns responses
             all_responses: List[harvester_protocol.NewProofOfSpace] = []
             if self.harvester._is_shutdown:
                 return filename, []
-            proofs_of_space_and_q: List[Tuple[bytes32, ProofOfSpace]] = await loop.run_in_executor(
-                self.harvester.executor, blocking_lookup, filename, plot_info
-            )
-            for quality_str, proof_of_space in proofs_of_space_and_q:
-                all_responses.append(
-                    harvester_protocol.NewProofOfSpace(
-                        new_challenge.challenge_hash,
+            scheduler = self.harvester.disk_scheduler
+            try:
+                sp_challenge_hash, quality_strings = await scheduler.run(
+                    filename, QUALITY_LOOKUP, blocking_qualities, filename, plot_info
+                )
+                # Found proofs of space (on average 1 is expected per plot)
+                for index, quality_str in enumerate(quality_strings):
+                    required_iters: uint64 = calculate_iterations_quality(
+                        self.harvester.constants.DIFFICULTY_CONSTANT_FACTOR,
+                        quality_str,
+                        plot_info.prover.get_size(),
+                        new_challenge.difficulty,
                         new_challenge.sp_hash,
-                        quality_str.hex() + str(filename.resolve()),
-                        proof_of_space,
-                        new_challenge.signage_point_index,
                     )
-                )
+                    if required_iters >= sp_interval_iters:
+                        continue
+                    proof_of_space = await scheduler.run(
+                        filename, FULL_PROOF_LOOKUP, blocking_full_proof, filename, plot_info, sp_challenge_hash, index
+                    )
+                    if proof_of_space is None:
+                        continue
+                    all_responses.append(
+                        harvester_protocol.NewProofOfSpace(
+                            new_challenge.challenge_hash,
+                            new_challenge.sp_hash,
+                            quality_str.hex() + str(filename.resolve()),
+                            proof_of_space,
+                            new_challenge.signage_point_index,
+                        )
+                    )
+            except Exception as e:
+                self.harvester.log.error(f"Unknown error: {e}")
             return filename, all_responses
 
         awaitables = []
         passed = 0
-        total = 0
-        for try_plot_filename, try_plot_info in self.harvester.provers.items():
+        # Passes the plot filter (does not check sp filter yet though, since we have not reached sp)
+        # This is being executed at the beginning of the slot
+        total = len(self.harvester.plot_filter_index)
+        passing_filenames = self.harvester.plot_filter_index.passing_plots(
+            self.harvester.constants.NUMBER_ZERO_BITS_PLOT_FILTER,
+            new_challenge.challenge_hash,
+            new_challenge.sp_hash,
+        )
+        for try_plot_filename in passing_filenames:
+            try_plot_info = self.harvester.provers.get(try_plot_filename)
+            if try_plot_info is None:
+                continue
             try:
+                # Missing files are removed when the plots are refreshed, only the plots that pass are checked here
                 if try_plot_filename.exists():
-                    # Passes the plot filter (does not check sp filter yet though, since we have not reached sp)
-                    # This is being executed at the beginning of the slot
-                    total += 1
-                    if ProofOfSpace.passes_plot_filter(
-                        self.harvester.constants,
-                        try_plot_info.prover.get_id(),
-                        new_challenge.challenge_hash,
-                        new_challenge.sp_hash,
-                    ):
-                        passed += 1
-                        awaitables.append(lookup_challenge(try_plot_filename, try_plot_info))
+                    passed += 1
+                    awaitables.append(lookup_challenge(try_plot_filename, try_plot_info))
             except Exception as e:
                 self.harvester.log.error(f"Error plot file {try_plot_filename} may no longer exist {e}")
 
@@ -243,15 +229,8 @@ class HarvesterAPI:
             self.harvester.log.warning(f"KeyError plot {plot_filename} does not exist.")
             return None
 
-        # Look up local_sk from plot to save locked memory
-        (
-            pool_public_key_or_puzzle_hash,
-            farmer_public_key,
-            local_master_sk,
-        ) = parse_plot_info(plot_info.prover.get_memo())
-        local_sk = master_sk_to_local_sk(local_master_sk)
-
-        agg_pk = ProofOfSpace.generate_plot_public_key(local_sk.get_g1(), farmer_public_key)
+        local_sk = get_plot_local_sk(plot_info)
+        agg_pk = plot_info.plot_public_key
 
         # This is only a partial signature. When combined with the farmer's half, it will
         # form a complete PrependSignature.
@@ -265,7 +244,7 @@ class HarvesterAPI:
             request.challenge_hash,
             request.sp_hash,
             local_sk.get_g1(),
-            farmer_public_key,
+            plot_info.farmer_public_key,
             message_signatures,
         )
 
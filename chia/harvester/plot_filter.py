@@ -0,0 +1,42 @@
+from hashlib import sha256
+from pathlib import Path
+from typing import Dict, List
+
+from chia.plotting.plot_tools import PlotInfo
+from chia.types.blockchain_format.sized_bytes import bytes32
+
+
+def plots_passing_filter(
+    plot_ids: bytes, number_zero_bits: int, challenge_hash: bytes32, signage_point: bytes32
+) -> List[int]:
+    """
+    Returns the indexes of the plots that pass the plot filter, where plot_ids holds the ids of the plots back to back.
+    Gives the same result as ProofOfSpace.passes_plot_filter for each plot, without a BitArray for each hash.
+    """
+    count = len(plot_ids) // 32
+    if number_zero_bits <= 0:
+        return list(range(count))
+    suffix = challenge_hash + signage_point
+    # A hash starts with number_zero_bits zeroes if its first bytes are below this
+    prefix_length = (number_zero_bits + 7) // 8
+    threshold = (1 << (prefix_length * 8 - number_zero_bits)).to_bytes(prefix_length, "big")
+    return [i for i in range(count) if sha256(plot_ids[i * 32 : i * 32 + 32] + suffix).digest() < threshold]
+
+
+class PlotFilterIndex:
+    """
+    The ids of the farmed plots back to back, with the path of each plot, so that the plot filter is applied to all the
+    plots with one call for each signage point. Rebuilt when the plots are refreshed.
+    """
+
+    def __init__(self, provers: Dict[Path, PlotInfo]):
+        self.paths: List[Path] = list(provers.keys())
+        self.plot_ids: bytes = b"".join(plot_info.prover.get_id() for plot_info in provers.values())
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def passing_plots(self, number_zero_bits: int, challenge_hash: bytes32, signage_point: bytes32) -> List[Path]:
+        return [
+            self.paths[i] for i in plots_passing_filter(self.plot_ids, number_zero_bits, challenge_hash, signage_point)
+        ]
@@ -0,0 +1,199 @@
+import asyncio
+import ctypes
+import ctypes.util
+import logging
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from chia.harvester.disk_scheduler import LatencyHistogram
+
+log = logging.getLogger(__name__)
+
+# Upper bounds in seconds of the buckets of the time from seeing a plot change to farming the plot
+FARMING_LATENCY_BUCKETS = [1, 5, 10, 30, 60, 120, 300, 600]
+
+# inotify events that add, remove or finish writing a file, or remove the watched directory
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+INOTIFY_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+
+
+@dataclass
+class PlotChanges:
+    added: List[Path] = field(default_factory=list)
+    removed: List[Path] = field(default_factory=list)
+    modified: List[Path] = field(default_factory=list)
+    # When each added or modified plot was seen
+    seen_time: Dict[Path, float] = field(default_factory=dict)
+
+    def __bool__(self) -> bool:
+        return len(self.added) > 0 or len(self.removed) > 0 or len(self.modified) > 0
+
+
+def _scan_directory(directory: Path) -> Dict[Path, Tuple[int, int]]:
+    """
+    Returns the size and modification time (ns) of the plots in the directory, like _get_filenames in plot_tools.
+    """
+    files: Dict[Path, Tuple[int, int]] = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            # Work around MacOS ._ files
+            if not entry.name.endswith(".plot") or entry.name.startswith("._"):
+                continue
+            try:
+                if entry.is_dir():
+                    continue
+                stat_info = entry.stat()
+            except OSError:
+                # Removed while scanning
+                continue
+            files[directory / entry.name] = (stat_info.st_size, stat_info.st_mtime_ns)
+    return files
+
+
+class PlotDirectoryWatcher:
+    """
+    Finds the plots that were added, removed or modified in the plot directories since the last poll, from the size
+    and modification time of the files. This is one scandir for each directory, no plot is opened.
+    """
+
+    def __init__(self):
+        self.files: Dict[Path, Tuple[int, int]] = {}
+        self.unreadable: Set[Path] = set()
+
+    def poll(self, directories: List[Path]) -> PlotChanges:
+        now = time.time()
+        current: Dict[Path, Tuple[int, int]] = {}
+        unreadable: Set[Path] = set()
+        for directory in directories:
+            try:
+                current.update(_scan_directory(directory))
+            except OSError as e:
+                unreadable.add(directory)
+                if directory not in self.unreadable:
+                    log.warning(f"Error reading plot directory {directory}: {e}")
+        for directory in unreadable:
+            # Keep the plots of a directory that can not be read for now, instead of dropping them all
+            current.update({path: value for path, value in self.files.items() if path.parent == directory})
+        self.unreadable = unreadable
+
+        changes = PlotChanges()
+        for path, value in current.items():
+            previous = self.files.get(path)
+            if previous is None:
+                changes.added.append(path)
+            elif previous != value:
+                changes.modified.append(path)
+            else:
+                continue
+            changes.seen_time[path] = now
+        changes.removed = [path for path in self.files.keys() if path not in current]
+        self.files = current
+        return changes
+
+
+class InotifyWaker:
+    """
+    Sets event when a plot directory changes, with inotify on Linux. Changes made over a network file system by other
+    machines are not seen, so the directories are still polled, this only makes local changes show up sooner.
+    """
+
+    def __init__(self, event: asyncio.Event):
+        self.event = event
+        self.watches: Dict[Path, int] = {}
+        self.fd: Optional[int] = None
+        if not sys.platform.startswith("linux"):
+            return
+        try:
+            self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+            fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd < 0:
+                raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+            asyncio.get_running_loop().add_reader(fd, self._on_readable)
+        except Exception as e:
+            log.info(f"Not watching the plot directories with inotify, only polling them: {e}")
+            return
+        self.fd = fd
+
+    @property
+    def enabled(self) -> bool:
+        return self.fd is not None
+
+    def _on_readable(self) -> None:
+        assert self.fd is not None
+        try:
+            while len(os.read(self.fd, 65536)) > 0:
+                pass
+        except BlockingIOError:
+            pass
+        self.event.set()
+
+    def set_directories(self, directories: List[Path]) -> None:
+        if self.fd is None:
+            return
+        for directory in [directory for directory in self.watches.keys() if directory not in directories]:
+            self.libc.inotify_rm_watch(self.fd, self.watches.pop(directory))
+        for directory in directories:
+            # Added again each time, since a directory can be removed and created again
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), INOTIFY_MASK)
+            if wd >= 0:
+                self.watches[directory] = wd
+            else:
+                self.watches.pop(directory, None)
+
+    def close(self) -> None:
+        if self.fd is None:
+            return
+        asyncio.get_running_loop().remove_reader(self.fd)
+        os.close(self.fd)
+        self.fd = None
+        self.watches = {}
+
+
+class PlotRefreshStats:
+    def __init__(self):
+        self.polls: int = 0
+        self.poll_seconds: float = 0
+        self.poll_cpu_seconds: float = 0
+        self.last_poll_seconds: float = 0
+        self.last_poll_cpu_seconds: float = 0
+        self.batches: int = 0
+        self.plots_loaded: int = 0
+        self.load_seconds: float = 0
+        self.farming_latency = LatencyHistogram(FARMING_LATENCY_BUCKETS)
+
+    def record_poll(self, seconds: float, cpu_seconds: float) -> None:
+        self.polls += 1
+        self.poll_seconds += seconds
+        self.poll_cpu_seconds += cpu_seconds
+        self.last_poll_seconds = seconds
+        self.last_poll_cpu_seconds = cpu_seconds
+
+    def record_batch(self, plots: int, seconds: float) -> None:
+        self.batches += 1
+        self.plots_loaded += plots
+        self.load_seconds += seconds
+
+    def to_json_dict(self) -> Dict[str, Any]:
+        return {
+            "polls": self.polls,
+            "poll_seconds": self.poll_seconds,
+            "poll_cpu_seconds": self.poll_cpu_seconds,
+            "last_poll_seconds": self.last_poll_seconds,
+            "last_poll_cpu_seconds": self.last_poll_cpu_seconds,
+            "batches": self.batches,
+            "plots_loaded": self.plots_loaded,
+            "load_seconds": self.load_seconds,
+            "farming_latency": self.farming_latency.to_json_dict(),
+        }
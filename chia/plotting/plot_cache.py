@@ -0,0 +1,116 @@
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from blspy import G1Element
+
+from chia.types.blockchain_format.sized_bytes import bytes32
+from chia.util.ints import uint8, uint64
+from chia.util.path import mkdir
+from chia.util.streamable import Streamable, streamable
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+@streamable
+class PlotCacheEntry(Streamable):
+    """
+    What load_plots reads from the memo of a plot and derives from it. The local private key is not stored.
+    """
+
+    filename: str
+    file_size: uint64
+    time_modified_ns: uint64
+    plot_id: bytes32
+    size: uint8
+    pool_public_key: Optional[G1Element]
+    pool_contract_puzzle_hash: Optional[bytes32]
+    farmer_public_key: G1Element
+    plot_public_key: G1Element
+
+
+@dataclass(frozen=True)
+@streamable
+class PlotCacheData(Streamable):
+    version: uint8
+    entries: List[PlotCacheEntry]
+
+
+CACHE_VERSION = 1
+
+
+class PlotCache:
+    """
+    The keys of the plots, saved to a file, so that load_plots only parses the memos and derives the keys of the plots
+    that are new or changed (by size or modification time) after a restart.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.entries: Dict[str, PlotCacheEntry] = {}
+        self.changed = False
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def load(self) -> None:
+        try:
+            data = PlotCacheData.from_bytes(self.path.read_bytes())
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            log.warning(f"Could not read the plot cache {self.path}, the plots will be opened again: {e}")
+            return
+        if data.version != CACHE_VERSION:
+            return
+        with self.lock:
+            self.entries = {entry.filename: entry for entry in data.entries}
+            self.changed = False
+
+    def save(self) -> None:
+        with self.lock:
+            data = PlotCacheData(uint8(CACHE_VERSION), list(self.entries.values()))
+            self.changed = False
+        try:
+            mkdir(self.path.parent)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_bytes(bytes(data))
+            tmp_path.replace(self.path)
+        except OSError as e:
+            log.error(f"Could not save the plot cache {self.path}: {e}")
+
+    def get(self, filename: Path, stat_info: os.stat_result, plot_id: bytes32) -> Optional[PlotCacheEntry]:
+        """
+        Returns the entry of the plot, if it was saved for the same file size, modification time and plot id.
+        """
+        with self.lock:
+            entry = self.entries.get(str(filename))
+            if (
+                entry is None
+                or entry.file_size != stat_info.st_size
+                or entry.time_modified_ns != stat_info.st_mtime_ns
+                or entry.plot_id != plot_id
+            ):
+                self.misses += 1
+                return None
+            self.hits += 1
+            return entry
+
+    def put(self, entry: PlotCacheEntry) -> None:
+        with self.lock:
+            self.entries[entry.filename] = entry
+            self.changed = True
+
+    def remove_missing(self, filenames: List[Path]) -> None:
+        """
+        Removes the entries of the plots that are not in filenames.
+        """
+        current = set(str(filename) for filename in filenames)
+        with self.lock:
+            for filename in [filename for filename in self.entries.keys() if filename not in current]:
+                del self.entries[filename]
+                self.changed = True
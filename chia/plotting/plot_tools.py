@@ -2,7 +2,7 @@ import logging
 import threading
 import time
 import traceback
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from functools import reduce
 from pathlib import Path
 from typing import Dict, List, Optional, Set, Tuple, Union
@@ -12,9 +12,11 @@ from blspy import G1Element, PrivateKey
 from chiapos import DiskProver
 
 from chia.consensus.pos_quality import UI_ACTUAL_SPACE_CONSTANT_FACTOR, _expected_plot_size
+from chia.plotting.plot_cache import PlotCache, PlotCacheEntry
 from chia.types.blockchain_format.proof_of_space import ProofOfSpace
 from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.util.config import load_config, save_config
+from chia.util.ints import uint8, uint64
 from chia.wallet.derive_keys import master_sk_to_local_sk
 
 log = logging.getLogger(__name__)
@@ -25,9 +27,15 @@ class PlotInfo:
     prover: DiskProver
     pool_public_key: Optional[G1Element]
     pool_contract_puzzle_hash: Optional[bytes32]
+    farmer_public_key: G1Element
     plot_public_key: G1Element
     file_size: int
     time_modified: float
+    # st_dev of the file, the harvester runs the lookups of the plots of each device on their own threads
+    device: int
+    # Derived from the memo by get_plot_local_sk the first time the plot signs, so only plots that won keep it.
+    # Not in the repr, plot infos are logged
+    local_sk: Optional[PrivateKey] = field(default=None, repr=False)
 
 
 def _get_filenames(directory: Path) -> List[Path]:
@@ -82,6 +90,13 @@ def parse_plot_info(memo: bytes) -> Tuple[Union[G1Element, bytes32], G1Element,
         raise ValueError(f"Invalid number of bytes {len(memo)}")
 
 
+def get_plot_local_sk(plot_info: PlotInfo) -> PrivateKey:
+    if plot_info.local_sk is None:
+        _, _, local_master_sk = parse_plot_info(plot_info.prover.get_memo())
+        plot_info.local_sk = master_sk_to_local_sk(local_master_sk)
+    return plot_info.local_sk
+
+
 def stream_plot_info_pk(
     pool_public_key: G1Element,
     farmer_public_key: G1Element,
@@ -144,18 +159,26 @@ def load_plots(
     show_memo: bool,
     root_path: Path,
     open_no_key_filenames=False,
+    plot_cache: Optional[PlotCache] = None,
+    filenames: Optional[List[Path]] = None,
 ) -> Tuple[bool, Dict[Path, PlotInfo], Dict[Path, int], Set[Path]]:
+    # If filenames is given, only those plots are loaded, instead of all the plots in the plot directories, and the
+    # other plots in provers are only used to find duplicates
     start_time = time.time()
-    config_file = load_config(root_path, "config.yaml", "harvester")
     changed = False
     no_key_filenames: Set[Path] = set()
-    log.info(f'Searching directories {config_file["plot_directories"]}')
-
-    plot_filenames: Dict[Path, List[Path]] = get_plot_filenames(config_file)
     all_filenames: List[Path] = []
-    for paths in plot_filenames.values():
-        all_filenames += paths
     plot_ids: Set[bytes32] = set()
+    if filenames is None:
+        config_file = load_config(root_path, "config.yaml", "harvester")
+        log.info(f'Searching directories {config_file["plot_directories"]}')
+        plot_filenames: Dict[Path, List[Path]] = get_plot_filenames(config_file)
+        for paths in plot_filenames.values():
+            all_filenames += paths
+    else:
+        all_filenames = filenames
+        filenames_set = set(filenames)
+        plot_ids = {plot_info.prover.get_id() for path, plot_info in provers.items() if path not in filenames_set}
     plot_ids_lock = threading.Lock()
 
     if match_str is not None:
@@ -187,25 +210,62 @@ def load_plots(
                     return stat_info.st_size, new_provers
             try:
                 prover = DiskProver(str(filename))
-
-                expected_size = _expected_plot_size(prover.get_size()) * UI_ACTUAL_SPACE_CONSTANT_FACTOR
                 stat_info = filename.stat()
 
-                # TODO: consider checking if the file was just written to (which would mean that the file is still
-                # being copied). A segfault might happen in this edge case.
+                cache_entry: Optional[PlotCacheEntry] = None
+                if plot_cache is not None and not show_memo:
+                    cache_entry = plot_cache.get(filename, stat_info, prover.get_id())
 
-                if prover.get_size() >= 30 and stat_info.st_size < 0.98 * expected_size:
-                    log.warning(
-                        f"Not farming plot {filename}. Size is {stat_info.st_size / (1024**3)} GiB, but expected"
-                        f" at least: {expected_size / (1024 ** 3)} GiB. We assume the file is being copied."
-                    )
-                    return 0, new_provers
+                if cache_entry is None:
+                    expected_size = _expected_plot_size(prover.get_size()) * UI_ACTUAL_SPACE_CONSTANT_FACTOR
 
-                (
-                    pool_public_key_or_puzzle_hash,
-                    farmer_public_key,
-                    local_master_sk,
-                ) = parse_plot_info(prover.get_memo())
+                    # TODO: consider checking if the file was just written to (which would mean that the file is
+                    # still being copied). A segfault might happen in this edge case.
+
+                    if prover.get_size() >= 30 and stat_info.st_size < 0.98 * expected_size:
+                        log.warning(
+                            f"Not farming plot {filename}. Size is {stat_info.st_size / (1024**3)} GiB, but expected"
+                            f" at least: {expected_size / (1024 ** 3)} GiB. We assume the file is being copied."
+                        )
+                        return 0, new_provers
+
+                    (
+                        pool_public_key_or_puzzle_hash,
+                        farmer_public_key,
+                        local_master_sk,
+                    ) = parse_plot_info(prover.get_memo())
+
+                    if isinstance(pool_public_key_or_puzzle_hash, G1Element):
+                        pool_public_key = pool_public_key_or_puzzle_hash
+                        pool_contract_puzzle_hash = None
+                    else:
+                        assert isinstance(pool_public_key_or_puzzle_hash, bytes32)
+                        pool_public_key = None
+                        pool_contract_puzzle_hash = pool_public_key_or_puzzle_hash
+
+                    local_sk = master_sk_to_local_sk(local_master_sk)
+                    plot_public_key: G1Element = ProofOfSpace.generate_plot_public_key(
+                        local_sk.get_g1(), farmer_public_key
+                    )
+                    if plot_cache is not None:
+                        plot_cache.put(
+                            PlotCacheEntry(
+                                str(filename),
+                                uint64(stat_info.st_size),
+                                uint64(stat_info.st_mtime_ns),
+                                prover.get_id(),
+                                uint8(prover.get_size()),
+                                pool_public_key,
+                                pool_contract_puzzle_hash,
+                                farmer_public_key,
+                                plot_public_key,
+                            )
+                        )
+                else:
+                    pool_public_key = cache_entry.pool_public_key
+                    pool_contract_puzzle_hash = cache_entry.pool_contract_puzzle_hash
+                    farmer_public_key = cache_entry.farmer_public_key
+                    plot_public_key = cache_entry.plot_public_key
 
                 # Only use plots that correct keys associated with them
                 if farmer_public_keys is not None and farmer_public_key not in farmer_public_keys:
@@ -214,14 +274,6 @@ def load_plots(
                     if not open_no_key_filenames:
                         return 0, new_provers
 
-                if isinstance(pool_public_key_or_puzzle_hash, G1Element):
-                    pool_public_key = pool_public_key_or_puzzle_hash
-                    pool_contract_puzzle_hash = None
-                else:
-                    assert isinstance(pool_public_key_or_puzzle_hash, bytes32)
-                    pool_public_key = None
-                    pool_contract_puzzle_hash = pool_public_key_or_puzzle_hash
-
                 if (
                     pool_public_keys is not None
                     and pool_public_key is not None
@@ -232,10 +284,6 @@ def load_plots(
                     if not open_no_key_filenames:
                         return 0, new_provers
 
-                stat_info = filename.stat()
-                local_sk = master_sk_to_local_sk(local_master_sk)
-                plot_public_key: G1Element = ProofOfSpace.generate_plot_public_key(local_sk.get_g1(), farmer_public_key)
-
                 with plot_ids_lock:
                     if prover.get_id() in plot_ids:
                         log.warning(f"Have multiple copies of the plot {filename}, not adding it.")
@@ -246,9 +294,11 @@ def load_plots(
                     prover,
                     pool_public_key,
                     pool_contract_puzzle_hash,
+                    farmer_public_key,
                     plot_public_key,
                     stat_info.st_size,
                     stat_info.st_mtime,
+                    stat_info.st_dev,
                 )
 
                 changed = True
@@ -276,6 +326,9 @@ def load_plots(
         (total_size2, new_provers2) = y
         return total_size1 + total_size2, {**new_provers1, **new_provers2}
 
+    if plot_cache is not None:
+        cache_hits, cache_misses = plot_cache.hits, plot_cache.misses
+
     with ThreadPoolExecutor() as executor:
         initial_value: Tuple[int, Dict[Path, PlotInfo]] = (0, {})
         total_size, new_provers = reduce(reduce_function, executor.map(process_file, all_filenames), initial_value)
@@ -284,6 +337,15 @@ def load_plots(
         f"Loaded a total of {len(new_provers)} plots of size {total_size / (1024 ** 4)} TiB, in"
         f" {time.time()-start_time} seconds"
     )
+    if plot_cache is not None:
+        log.info(
+            f"Opened plots with {plot_cache.hits - cache_hits} plot cache hits and"
+            f" {plot_cache.misses - cache_misses} misses"
+        )
+        if filenames is None:
+            plot_cache.remove_missing(all_filenames)
+        if plot_cache.changed:
+            plot_cache.save()
     return changed, new_provers, failed_to_open_filenames, no_key_filenames
 
 
@@ -4,6 +4,7 @@ from chia.consensus.block_record import BlockRecord
 from chia.consensus.pos_quality import UI_ACTUAL_SPACE_CONSTANT_FACTOR
 from chia.full_node.full_node import FullNode
 from chia.types.blockchain_format.sized_bytes import bytes32
+from chia.types.blockchain_format.vdf import get_verified_vdf_cache_stats
 from chia.types.coin_record import CoinRecord
 from chia.types.full_block import FullBlock
 from chia.types.mempool_inclusion_status import MempoolInclusionStatus
@@ -34,6 +35,9 @@ class FullNodeRpcApi:
             "/get_additions_and_removals": self.get_additions_and_removals,
             "/get_initial_freeze_period": self.get_initial_freeze_period,
             "/get_network_info": self.get_network_info,
+            "/get_db_metrics": self.get_db_metrics,
+            "/get_cache_stats": self.get_cache_stats,
+            "/get_pre_validation_stats": self.get_pre_validation_stats,
             # Coins
             "/get_coin_records_by_puzzle_hash": self.get_coin_records_by_puzzle_hash,
             "/get_coin_records_by_puzzle_hashes": self.get_coin_records_by_puzzle_hashes,
@@ -157,6 +161,34 @@ class FullNodeRpcApi:
         address_prefix = self.service.config["network_overrides"]["config"][network_name]["address_prefix"]
         return {"network_name": network_name, "network_prefix": address_prefix}
 
+    async def get_db_metrics(self, _: Dict):
+        """
+        Returns the wait times of the read only database connections.
+        """
+        return {"read_pool": self.service.db_wrapper.get_read_pool_metrics()}
+
+    async def get_cache_stats(self, _: Dict):
+        """
+        Returns the number of entries, size, hits, misses and evictions of the block and coin caches, and of the
+        verified VDF cache of the full node process. The VDF cache hits of the pre-validation workers are in
+        get_pre_validation_stats.
+        """
+        return {
+            "caches": {
+                "block_cache": self.service.block_store.block_cache.get_stats(),
+                "ses_challenge_cache": self.service.block_store.ses_challenge_cache.get_stats(),
+                "coin_record_cache": self.service.coin_store.coin_record_cache.get_stats(),
+                "verified_vdf_cache": get_verified_vdf_cache_stats(),
+            }
+        }
+
+    async def get_pre_validation_stats(self, _: Dict):
+        """
+        Returns the number of block pre-validation workers in use, and the work units, blocks, estimated cost, wall
+        time, cpu time and verified VDF cache hits and misses of each worker process.
+        """
+        return {"pre_validation": self.service.blockchain.pre_validation_context.get_stats()}
+
     async def get_block(self, request: Dict) -> Optional[Dict]:
         if "header_hash" not in request:
             raise ValueError("No header_hash in request")
@@ -133,6 +133,15 @@ class FullNodeRpcClient(RpcClient):
     async def push_tx(self, spend_bundle: SpendBundle):
         return await self.fetch("push_tx", {"spend_bundle": spend_bundle.to_json_dict()})
 
+    async def get_db_metrics(self) -> Dict:
+        return await self.fetch("get_db_metrics", {})
+
+    async def get_cache_stats(self) -> Dict:
+        return await self.fetch("get_cache_stats", {})
+
+    async def get_pre_validation_stats(self) -> Dict:
+        return await self.fetch("get_pre_validation_stats", {})
+
     async def get_all_mempool_tx_ids(self) -> List[bytes32]:
         response = await self.fetch("get_all_mempool_tx_ids", {})
         return [bytes32(hexstr_to_bytes(tx_id_hex)) for tx_id_hex in response["tx_ids"]]
@@ -17,6 +17,8 @@ class HarvesterRpcApi:
             "/add_plot_directory": self.add_plot_directory,
             "/get_plot_directories": self.get_plot_directories,
             "/remove_plot_directory": self.remove_plot_directory,
+            "/get_disk_stats": self.get_disk_stats,
+            "/get_plot_refresh_stats": self.get_plot_refresh_stats,
         }
 
     async def _state_changed(self, change: str) -> List[WsRpcMessage]:
@@ -59,3 +61,9 @@ class HarvesterRpcApi:
         if await self.service.remove_plot_directory(directory_name):
             return {}
         raise ValueError(f"Did not remove plot directory {directory_name}")
+
+    async def get_disk_stats(self, request: Dict) -> Dict:
+        return {"disks": self.service.get_disk_stats()}
+
+    async def get_plot_refresh_stats(self, request: Dict) -> Dict:
+        return {"refresh": self.service.get_plot_refresh_stats()}
@@ -29,3 +29,9 @@ class HarvesterRpcClient(RpcClient):
 
     async def remove_plot_directory(self, dirname: str) -> bool:
         return (await self.fetch("remove_plot_directory", {"dirname": dirname}))["success"]
+
+    async def get_disk_stats(self) -> List[Dict[str, Any]]:
+        return (await self.fetch("get_disk_stats", {}))["disks"]
+
+    async def get_plot_refresh_stats(self) -> Dict[str, Any]:
+        return (await self.fetch("get_plot_refresh_stats", {}))["refresh"]
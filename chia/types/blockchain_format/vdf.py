@@ -1,8 +1,9 @@
 import logging
+import threading
 import traceback
 from dataclasses import dataclass
 from enum import IntEnum
-from typing import Optional
+from typing import Any, Dict, Optional
 from functools import lru_cache
 
 from chiavdf import create_discriminant, verify_n_wesolowski
@@ -10,11 +11,36 @@ from chiavdf import create_discriminant, verify_n_wesolowski
 from chia.consensus.constants import ConsensusConstants
 from chia.types.blockchain_format.classgroup import ClassgroupElement
 from chia.types.blockchain_format.sized_bytes import bytes32, bytes100
-from chia.util.ints import uint8, uint64
+from chia.util.hash import std_hash
+from chia.util.ints import uint8, uint16, uint64
+from chia.util.lru_cache import LRUCache
 from chia.util.streamable import Streamable, streamable
 
 log = logging.getLogger(__name__)
 
+# Hashes of the VDF proofs that were verified successfully. The same proofs are seen several times, for example a
+# signage point VDF is verified when the signage point arrives, and again with the unfinished and finished blocks.
+VERIFIED_VDF_CACHE_SIZE = 100000
+_verified_vdfs = LRUCache(VERIFIED_VDF_CACHE_SIZE)
+# Proofs can be checked from several threads during header validation
+_verified_vdfs_lock = threading.Lock()
+
+
+def get_verified_vdf_cache_stats() -> Dict[str, Any]:
+    """
+    Returns the entries, hits and misses of the verified VDF cache of this process.
+    """
+    with _verified_vdfs_lock:
+        stats = _verified_vdfs.get_stats()
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups > 0 else 0
+    return stats
+
+
+def clear_verified_vdf_cache() -> None:
+    with _verified_vdfs_lock:
+        _verified_vdfs.clear()
+
 
 @lru_cache(maxsize=20)
 def get_discriminant(challenge, size_bites) -> int:
@@ -24,7 +50,6 @@ def get_discriminant(challenge, size_bites) -> int:
     )
 
 
-@lru_cache(maxsize=100)
 def verify_vdf(
     disc: int,
     input_el: bytes100,
@@ -75,10 +100,20 @@ class VDFProof(Streamable):
             return False
         if self.witness_type + 1 > constants.MAX_VDF_WITNESS_SIZE:
             return False
+        key = std_hash(
+            bytes(uint16(constants.DISCRIMINANT_SIZE_BITS))
+            + bytes(input_el)
+            + bytes(info)
+            + bytes(uint8(self.witness_type))
+            + bytes(self.witness)
+        )
+        with _verified_vdfs_lock:
+            if _verified_vdfs.get(key) is not None:
+                return True
         try:
             disc: int = get_discriminant(info.challenge, constants.DISCRIMINANT_SIZE_BITS)
             # TODO: parallelize somehow, this might included multiple mini proofs (n weso)
-            return verify_vdf(
+            valid = verify_vdf(
                 disc,
                 input_el.data,
                 info.output.data + bytes(self.witness),
@@ -88,6 +123,10 @@ class VDFProof(Streamable):
             )
         except Exception:
             return False
+        if valid:
+            with _verified_vdfs_lock:
+                _verified_vdfs.put(key, True)
+        return valid
 
 
 # Stores, for a given VDF, the field that uses it.
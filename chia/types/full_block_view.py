@@ -0,0 +1,135 @@
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from chia.types.blockchain_format.coin import Coin
+from chia.types.blockchain_format.foliage import Foliage, FoliageTransactionBlock, TransactionsInfo
+from chia.types.blockchain_format.program import SerializedProgram
+from chia.types.blockchain_format.reward_chain_block import RewardChainBlock
+from chia.types.blockchain_format.sized_bytes import bytes32
+from chia.types.blockchain_format.vdf import VDFProof
+from chia.types.end_of_slot_bundle import EndOfSubSlotBundle
+from chia.types.full_block import FullBlock
+from chia.util.ints import uint32
+from chia.util.streamable import function_to_parse_from_one_item, function_to_skip_from_one_item
+
+# Fields of FullBlock which are only parsed when they are accessed. These are the largest members of a block,
+# and are not needed to look at its header.
+LAZY_FULL_BLOCK_FIELDS = {
+    "challenge_chain_sp_proof",
+    "challenge_chain_ip_proof",
+    "reward_chain_sp_proof",
+    "reward_chain_ip_proof",
+    "infused_challenge_chain_ip_proof",
+    "transactions_generator",
+    "transactions_generator_ref_list",
+}
+
+_PARSE_FUNCTIONS: Dict[str, Callable[[memoryview, int], Tuple[Any, int]]] = {
+    f_name: function_to_parse_from_one_item(f_type) for f_name, f_type in FullBlock.__annotations__.items()
+}
+_SKIP_FUNCTIONS: Dict[str, Callable[[memoryview, int], int]] = {
+    f_name: function_to_skip_from_one_item(f_type)
+    for f_name, f_type in FullBlock.__annotations__.items()
+    if f_name in LAZY_FULL_BLOCK_FIELDS
+}
+
+
+class FullBlockView:
+    """
+    A read only FullBlock backed by its serialization. The header fields are parsed when the view is created,
+    the fields in LAZY_FULL_BLOCK_FIELDS are only located, and parsed the first time they are accessed.
+    Use this instead of a FullBlock when only a few fields of a stored block are needed.
+    """
+
+    finished_sub_slots: List[EndOfSubSlotBundle]
+    reward_chain_block: RewardChainBlock
+    challenge_chain_sp_proof: Optional[VDFProof]
+    challenge_chain_ip_proof: VDFProof
+    reward_chain_sp_proof: Optional[VDFProof]
+    reward_chain_ip_proof: VDFProof
+    infused_challenge_chain_ip_proof: Optional[VDFProof]
+    foliage: Foliage
+    foliage_transaction_block: Optional[FoliageTransactionBlock]
+    transactions_info: Optional[TransactionsInfo]
+    transactions_generator: Optional[SerializedProgram]
+    transactions_generator_ref_list: List[uint32]
+
+    _blob: Optional[bytes]
+    _full_block: Optional[FullBlock]
+    _lazy_offsets: Dict[str, int]
+
+    def __init__(self, blob: bytes):
+        self._blob = blob
+        self._full_block = None
+        self._lazy_offsets = {}
+        buf = memoryview(blob)
+        pos = 0
+        for f_name in FullBlock.__annotations__:
+            if f_name in LAZY_FULL_BLOCK_FIELDS:
+                self._lazy_offsets[f_name] = pos
+                pos = _SKIP_FUNCTIONS[f_name](buf, pos)
+            else:
+                self.__dict__[f_name], pos = _PARSE_FUNCTIONS[f_name](buf, pos)
+        assert pos == len(buf)
+
+    @classmethod
+    def from_full_block(cls, block: FullBlock) -> "FullBlockView":
+        """
+        Makes a view of an already parsed block, for example one from the block cache, without serializing it.
+        """
+        view = cls.__new__(cls)
+        view._blob = None
+        view._full_block = block
+        view._lazy_offsets = {}
+        for f_name in FullBlock.__annotations__:
+            view.__dict__[f_name] = getattr(block, f_name)
+        return view
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for the lazy fields which have not been parsed yet
+        if name not in LAZY_FULL_BLOCK_FIELDS:
+            raise AttributeError(f"{type(self).__name__} has no attribute {name}")
+        assert self._blob is not None
+        value, _ = _PARSE_FUNCTIONS[name](memoryview(self._blob), self._lazy_offsets[name])
+        self.__dict__[name] = value
+        return value
+
+    @property
+    def prev_header_hash(self) -> bytes32:
+        return self.foliage.prev_block_hash
+
+    @property
+    def height(self) -> uint32:
+        return self.reward_chain_block.height
+
+    @property
+    def weight(self):
+        return self.reward_chain_block.weight
+
+    @property
+    def total_iters(self):
+        return self.reward_chain_block.total_iters
+
+    @property
+    def header_hash(self) -> bytes32:
+        return self.foliage.get_hash()
+
+    def is_transaction_block(self) -> bool:
+        return self.foliage_transaction_block is not None
+
+    def get_included_reward_coins(self) -> Set[Coin]:
+        if not self.is_transaction_block():
+            return set()
+        assert self.transactions_info is not None
+        return set(self.transactions_info.reward_claims_incorporated)
+
+    def to_full_block(self) -> FullBlock:
+        if self._full_block is None:
+            assert self._blob is not None
+            self._full_block = FullBlock.from_bytes(self._blob)
+        return self._full_block
+
+    def __bytes__(self) -> bytes:
+        if self._blob is None:
+            assert self._full_block is not None
+            self._blob = bytes(self._full_block)
+        return self._blob
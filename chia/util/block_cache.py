@@ -1,5 +1,5 @@
 import logging
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional
 
 from chia.consensus.block_record import BlockRecord
 from chia.consensus.blockchain_interface import BlockchainInterface
@@ -79,6 +79,14 @@ class BlockCache(BlockchainInterface):
     ) -> Dict[bytes32, HeaderBlock]:
         return self._headers
 
+    async def stream_header_blocks_in_range(
+        self, start: int, stop: int, tx_filter: bool = True, batch_size: int = 32
+    ) -> AsyncIterator[HeaderBlock]:
+        for height in range(start, stop + 1):
+            header_hash = self._height_to_hash.get(uint32(height))
+            if header_hash is not None and header_hash in self._headers:
+                yield self._headers[header_hash]
+
     async def persist_sub_epoch_challenge_segments(
         self, sub_epoch_summary_height: uint32, segments: List[SubEpochChallengeSegment]
     ):
@@ -1,5 +1,4 @@
-import io
-from typing import Any, BinaryIO
+from typing import Any, BinaryIO, Tuple
 
 
 def hexstr_to_bytes(input_str: str) -> bytes:
@@ -30,21 +29,23 @@ def make_sized_bytes(size: int):
         assert len(b) == size
         return cls(b)
 
+    @classmethod  # type: ignore
+    def parse_from(cls, buf: Any, offset: int) -> Tuple[Any, int]:
+        # Makes the value straight from the slice of buf, which can be a memoryview
+        end = offset + size
+        assert end <= len(buf)
+        return bytes.__new__(cls, buf[offset:end]), end
+
     def stream(self, f):
         f.write(self)
 
     @classmethod  # type: ignore
     def from_bytes(cls: Any, blob: bytes) -> Any:
-        # pylint: disable=no-member
-        f = io.BytesIO(blob)
-        result = cls.parse(f)
-        assert f.read() == b""
-        return result
+        assert len(blob) == size
+        return bytes.__new__(cls, blob)
 
     def __bytes__(self: Any) -> bytes:
-        f = io.BytesIO()
-        self.stream(f)
-        return bytes(f.getvalue())
+        return bytes(memoryview(self))
 
     def __str__(self):
         return self.hex()
@@ -53,8 +54,10 @@ def make_sized_bytes(size: int):
         return "<%s: %s>" % (self.__class__.__name__, str(self))
 
     namespace = dict(
+        SIZE=size,
         __new__=__new__,
         parse=parse,
+        parse_from=parse_from,
         stream=stream,
         from_bytes=from_bytes,
         __bytes__=__bytes__,
@@ -1,29 +1,142 @@
 import asyncio
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional
 
 import aiosqlite
 
 
+class ReadConnectionStats:
+    """
+    Wait time (until a reader got the connection) and number of uses of one read connection.
+    """
+
+    def __init__(self):
+        self.uses = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float) -> None:
+        self.uses += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+    def to_json_dict(self) -> Dict:
+        return {
+            "uses": self.uses,
+            "total_wait": self.total_wait,
+            "max_wait": self.max_wait,
+            "average_wait": self.total_wait / self.uses if self.uses > 0 else 0.0,
+        }
+
+
 class DBWrapper:
     """
     This object handles HeaderBlocks and Blocks stored in DB used by wallet.
+
+    All writes go through db, the single writer connection. Optionally, a pool of read only connections
+    can be opened with open_read_pool, which stores use through reader() for their SELECTs, so that reads do
+    not queue behind the writer. Read connections only see committed data, so reader() hands out the writer
+    connection to the task that has a transaction open on it, or while an implicit transaction is pending.
+
+    A read can finish after a write that it does not see, so stores only put read results into caches shared with
+    writers if cache_generation() before the read and can_cache() after it say that no write happened meanwhile.
+    Writers commit through commit_transaction, also for writes outside of begin_transaction, to change the generation.
     """
 
     db: aiosqlite.Connection
     lock: asyncio.Lock
+    read_connections: List[aiosqlite.Connection]
+    read_stats: List[ReadConnectionStats]
 
     def __init__(self, connection: aiosqlite.Connection):
         self.db = connection
         self.lock = asyncio.Lock()
+        self.read_connections = []
+        self.read_stats = []
+        self._read_queue: Optional[asyncio.Queue] = None
+        self._transaction_task: Optional[asyncio.Task] = None
+        # Changed when a transaction begins, commits or rolls back
+        self._write_generation = 0
+
+    async def open_read_pool(self, db_path: Path, size: int) -> None:
+        """
+        Opens size read only connections to db_path. The database must be in WAL mode, so that readers
+        do not block the writer. A size of 0 keeps all reads on the writer connection.
+        """
+        self._read_queue = asyncio.Queue()
+        for index in range(size):
+            connection = await aiosqlite.connect(Path(db_path).resolve().as_uri() + "?mode=ro", uri=True)
+            self.read_connections.append(connection)
+            self.read_stats.append(ReadConnectionStats())
+            self._read_queue.put_nowait(index)
+
+    async def close_read_pool(self) -> None:
+        for connection in self.read_connections:
+            await connection.close()
+        self.read_connections = []
+        self.read_stats = []
+        self._read_queue = None
+
+    @asynccontextmanager
+    async def reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        if self._read_queue is None or len(self.read_connections) == 0 or self._must_read_from_writer():
+            yield self.db
+            return
+
+        start = time.monotonic()
+        index = await self._read_queue.get()
+        self.read_stats[index].record(time.monotonic() - start)
+        try:
+            yield self.read_connections[index]
+        finally:
+            self._read_queue.put_nowait(index)
+
+    def _must_read_from_writer(self) -> bool:
+        if not self.db.in_transaction:
+            return False
+        # Implicit transactions (writes without begin_transaction) have no known owner
+        if self._transaction_task is None or self._transaction_task.done():
+            return True
+        return self._transaction_task is asyncio.current_task()
+
+    def cache_generation(self) -> Optional[int]:
+        """
+        Called before a read whose results may be cached, None if a write is pending, so they must not be.
+        """
+        if self.db.in_transaction:
+            return None
+        return self._write_generation
+
+    def can_cache(self, generation: Optional[int]) -> bool:
+        """
+        True if no write began or was pending since cache_generation() returned generation.
+        """
+        return generation is not None and generation == self._write_generation and not self.db.in_transaction
+
+    def get_read_pool_metrics(self) -> Dict:
+        return {
+            "size": len(self.read_connections),
+            "available": self._read_queue.qsize() if self._read_queue is not None else 0,
+            "connections": [stats.to_json_dict() for stats in self.read_stats],
+        }
 
     async def begin_transaction(self):
+        self._write_generation += 1
         cursor = await self.db.execute("BEGIN TRANSACTION")
         await cursor.close()
+        self._transaction_task = asyncio.current_task()
 
     async def rollback_transaction(self):
         # Also rolls back the coin store, since both stores must be updated at once
         if self.db.in_transaction:
             cursor = await self.db.execute("ROLLBACK")
             await cursor.close()
+        self._transaction_task = None
+        self._write_generation += 1
 
     async def commit_transaction(self):
         await self.db.commit()
+        self._transaction_task = None
+        self._write_generation += 1
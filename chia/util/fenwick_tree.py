@@ -0,0 +1,46 @@
+from typing import List
+
+
+class FenwickTree:
+    """
+    Binary indexed tree over a fixed number of integer slots. Adding to a slot, summing a prefix of the slots,
+    and finding the slot where the prefix sums reach a target all take O(log size).
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self.tree: List[int] = [0] * (size + 1)
+        self.highest_bit = 1 << (size.bit_length() - 1) if size > 0 else 0
+
+    def add(self, index: int, delta: int) -> None:
+        i = index + 1
+        while i <= self.size:
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix_sum(self, end: int) -> int:
+        """
+        Returns the sum of the slots with index lower than end.
+        """
+        total = 0
+        i = end
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def find(self, target: int) -> int:
+        """
+        Returns the lowest index such that the slots up to and including it add up to at least target, or size if
+        all the slots add up to less than target. All the slots must be non negative.
+        """
+        pos = 0
+        remaining = target
+        step = self.highest_bit
+        while step > 0:
+            nxt = pos + step
+            if nxt <= self.size and self.tree[nxt] < remaining:
+                pos = nxt
+                remaining -= self.tree[nxt]
+            step >>= 1
+        return pos
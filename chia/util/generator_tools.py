@@ -1,15 +1,18 @@
-from typing import List, Tuple
+from typing import List, Tuple, Union
 from chiabip158 import PyBIP158
 
 from chia.types.blockchain_format.coin import Coin
 from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.types.full_block import FullBlock
+from chia.types.full_block_view import FullBlockView
 from chia.types.header_block import HeaderBlock
 from chia.types.name_puzzle_condition import NPC
 from chia.util.condition_tools import created_outputs_for_conditions_dict
 
 
-def get_block_header(block: FullBlock, tx_addition_coins: List[Coin], removals_names: List[bytes32]) -> HeaderBlock:
+def get_block_header(
+    block: Union[FullBlock, FullBlockView], tx_addition_coins: List[Coin], removals_names: List[bytes32]
+) -> HeaderBlock:
     # Create filter
     byte_array_tx: List[bytes32] = []
     addition_coins = tx_addition_coins + list(block.get_included_reward_coins())
@@ -1,4 +1,4 @@
-from typing import Any, BinaryIO
+from typing import Any, BinaryIO, Tuple
 
 from chia.util.struct_stream import StructStream
 
@@ -44,6 +44,12 @@ class uint128(int):
         assert n <= (2 ** 128) - 1 and n >= 0
         return cls(n)
 
+    @classmethod
+    def parse_from(cls, buf: Any, offset: int) -> Tuple[Any, int]:
+        end = offset + 16
+        assert end <= len(buf)
+        return cls(int.from_bytes(buf[offset:end], "big", signed=False)), end
+
     def stream(self, f):
         assert self <= (2 ** 128) - 1 and self >= 0
         f.write(self.to_bytes(16, "big", signed=False))
@@ -59,6 +65,14 @@ class int512(int):
         assert n <= (2 ** 512) - 1 and n >= -(2 ** 512)
         return cls(n)
 
+    @classmethod
+    def parse_from(cls, buf: Any, offset: int) -> Tuple[Any, int]:
+        end = offset + 65
+        assert end <= len(buf)
+        n = int.from_bytes(buf[offset:end], "big", signed=True)
+        assert n <= (2 ** 512) - 1 and n >= -(2 ** 512)
+        return cls(n), end
+
     def stream(self, f):
         assert self <= (2 ** 512) - 1 and self >= -(2 ** 512)
         f.write(self.to_bytes(65, "big", signed=True))
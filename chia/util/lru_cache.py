@@ -1,24 +1,190 @@
+import time
 from collections import OrderedDict
-from typing import Any, Optional
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
 
 
 class LRUCache:
-    def __init__(self, capacity: int):
+    """
+    Least recently used cache. It holds at most capacity entries and, if max_size is set, values whose sizes add
+    up to at most max_size. The size of a value is passed to put, or computed with size_of. If ttl is set, entries
+    are dropped ttl seconds after they were put.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        max_size: Optional[int] = None,
+        size_of: Optional[Callable[[Any], int]] = None,
+        ttl: Optional[float] = None,
+    ):
         self.cache: OrderedDict = OrderedDict()
         self.capacity = capacity
+        self.max_size = max_size
+        self.size_of = size_of
+        self.ttl = ttl
+        self.size = 0
+        self.sizes: Dict[Any, int] = {}
+        self.expiry: Dict[Any, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
 
     def get(self, key: Any) -> Optional[Any]:
-        if key not in self.cache:
+        if key not in self.cache or self._expire(key):
+            self.misses += 1
             return None
-        else:
-            self.cache.move_to_end(key)
-            return self.cache[key]
+        self.hits += 1
+        self.cache.move_to_end(key)
+        return self.cache[key]
 
-    def put(self, key: Any, value: Any) -> None:
+    def put(self, key: Any, value: Any, size: Optional[int] = None) -> None:
+        if key in self.cache:
+            self._forget(key)
         self.cache[key] = value
         self.cache.move_to_end(key)
-        if len(self.cache) > self.capacity:
-            self.cache.popitem(last=False)
+        self._account(key, value, size)
+        self._evict()
 
     def remove(self, key: Any) -> None:
         self.cache.pop(key)
+        self._forget(key)
+
+    def clear(self) -> None:
+        self.cache.clear()
+        self.sizes.clear()
+        self.expiry.clear()
+        self.size = 0
+
+    def items(self) -> Iterator[Tuple[Any, Any]]:
+        return iter(list(self.cache.items()))
+
+    def __len__(self) -> int:
+        return len(self.cache)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self),
+            "capacity": self.capacity,
+            "size": self.size,
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _account(self, key: Any, value: Any, size: Optional[int]) -> None:
+        if size is None and self.size_of is not None:
+            size = self.size_of(value)
+        if size is not None:
+            self.sizes[key] = size
+            self.size += size
+        if self.ttl is not None:
+            self.expiry[key] = time.monotonic() + self.ttl
+
+    def _forget(self, key: Any) -> None:
+        self.size -= self.sizes.pop(key, 0)
+        self.expiry.pop(key, None)
+
+    def _expire(self, key: Any) -> bool:
+        expiry = self.expiry.get(key)
+        if expiry is None or expiry > time.monotonic():
+            return False
+        self.remove(key)
+        return True
+
+    def _over_budget(self) -> bool:
+        return len(self) > self.capacity or (self.max_size is not None and self.size > self.max_size)
+
+    def _evict(self) -> None:
+        # Always keeps the entry that was just put, even if it is larger than max_size on its own
+        while len(self) > 1 and self._over_budget():
+            key, _ = self.cache.popitem(last=False)
+            self._forget(key)
+            self.evictions += 1
+
+
+class TwoQueueCache(LRUCache):
+    """
+    2Q cache, with the same bounds as LRUCache. New entries go into a FIFO probation queue, which holds at most
+    probation_fraction of the budget, and are moved to the main LRU queue (self.cache) when they are read again
+    or put again soon after being evicted. A scan of many keys that are used once, such as the blocks and coins
+    touched during a long sync, only cycles the probation queue and does not push out the entries in use.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        max_size: Optional[int] = None,
+        size_of: Optional[Callable[[Any], int]] = None,
+        ttl: Optional[float] = None,
+        probation_fraction: float = 0.25,
+    ):
+        super().__init__(capacity, max_size, size_of, ttl)
+        self.probation: OrderedDict = OrderedDict()
+        self.probation_fraction = probation_fraction
+        self.probation_size = 0
+        # Keys recently evicted from probation, at most as many as the cache can hold
+        self.ghosts: OrderedDict = OrderedDict()
+
+    def get(self, key: Any) -> Optional[Any]:
+        if key in self.probation and not self._expire(key):
+            self.hits += 1
+            value = self.probation.pop(key)
+            self.probation_size -= self.sizes.get(key, 0)
+            self.cache[key] = value
+            return value
+        return super().get(key)
+
+    def put(self, key: Any, value: Any, size: Optional[int] = None) -> None:
+        if key in self.cache:
+            super().put(key, value, size)
+            return
+        if key in self.probation:
+            self.remove(key)
+        if key in self.ghosts:
+            self.ghosts.pop(key)
+            self.cache[key] = value
+            self._account(key, value, size)
+        else:
+            self.probation[key] = value
+            self._account(key, value, size)
+            self.probation_size += self.sizes.get(key, 0)
+        self._evict()
+
+    def remove(self, key: Any) -> None:
+        if key in self.probation:
+            self.probation.pop(key)
+            self.probation_size -= self.sizes.get(key, 0)
+            self._forget(key)
+        else:
+            super().remove(key)
+
+    def clear(self) -> None:
+        super().clear()
+        self.probation.clear()
+        self.probation_size = 0
+        self.ghosts.clear()
+
+    def items(self) -> Iterator[Tuple[Any, Any]]:
+        return iter(list(self.probation.items()) + list(self.cache.items()))
+
+    def __len__(self) -> int:
+        return len(self.cache) + len(self.probation)
+
+    def _probation_over_budget(self) -> bool:
+        if len(self.probation) > self.capacity * self.probation_fraction:
+            return True
+        return self.max_size is not None and self.probation_size > self.max_size * self.probation_fraction
+
+    def _evict(self) -> None:
+        while len(self) > 1 and self._over_budget():
+            if len(self.probation) > 0 and (len(self.cache) <= 1 or self._probation_over_budget()):
+                key, _ = self.probation.popitem(last=False)
+                self.probation_size -= self.sizes.get(key, 0)
+                self.ghosts[key] = None
+                if len(self.ghosts) > self.capacity:
+                    self.ghosts.popitem(last=False)
+            else:
+                key, _ = self.cache.popitem(last=False)
+            self._forget(key)
+            self.evictions += 1
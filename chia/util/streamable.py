@@ -3,19 +3,23 @@
 from __future__ import annotations
 
 import dataclasses
+import functools
 import io
 import pprint
+import struct
 import sys
 from enum import Enum
 from typing import Any, BinaryIO, Dict, List, Tuple, Type, Callable, Optional, Iterator
 
 from blspy import G1Element, G2Element, PrivateKey
+from clvm_rs import serialized_length
 
 from chia.types.blockchain_format.program import Program, SerializedProgram
 from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.util.byte_types import hexstr_to_bytes
 from chia.util.hash import std_hash
 from chia.util.ints import int64, int512, uint32, uint64, uint128
+from chia.util.struct_stream import StructStream
 from chia.util.type_checking import is_type_List, is_type_SpecificOptional, is_type_Tuple, strictdataclass
 
 if sys.version_info < (3, 8):
@@ -126,6 +130,10 @@ def recurse_jsonify(d):
 
 
 PARSE_FUNCTIONS_FOR_STREAMABLE_CLASS = {}
+# Specialized (buffer, offset) -> (value, offset) parsers and (value, bytearray) streamers, compiled for each
+# streamable class when it is decorated. They are used by from_bytes, parse and __bytes__.
+PARSE_FROM_FUNCTIONS_FOR_STREAMABLE_CLASS: Dict[Type, Callable[[memoryview, int], Tuple[Any, int]]] = {}
+STREAM_FUNCTIONS_FOR_STREAMABLE_CLASS: Dict[Type, Callable[[Any, bytearray], None]] = {}
 
 
 def streamable(cls: Any):
@@ -167,6 +175,8 @@ def streamable(cls: Any):
         parse_functions.append(cls.function_to_parse_one_item(f_type))
 
     PARSE_FUNCTIONS_FOR_STREAMABLE_CLASS[t] = parse_functions
+    PARSE_FROM_FUNCTIONS_FOR_STREAMABLE_CLASS[t] = function_to_parse_from_streamable(t, fields)
+    STREAM_FUNCTIONS_FOR_STREAMABLE_CLASS[t] = function_to_stream_streamable(fields)
     return t
 
 
@@ -234,6 +244,389 @@ def parse_str(f: BinaryIO) -> str:
     return bytes.decode(str_read_bytes, "utf-8")
 
 
+def parse_from_bool(buf: memoryview, pos: int) -> Tuple[bool, int]:
+    assert pos < len(buf)  # Checks for EOF
+    bool_byte = buf[pos]
+    if bool_byte == 0:
+        return False, pos + 1
+    elif bool_byte == 1:
+        return True, pos + 1
+    else:
+        raise ValueError("Bool byte must be 0 or 1")
+
+
+def parse_from_length_prefix(buf: memoryview, pos: int) -> Tuple[int, int]:
+    end = pos + 4
+    assert end <= len(buf)  # Checks for EOF
+    return int.from_bytes(buf[pos:end], "big"), end
+
+
+def parse_from_bytes(buf: memoryview, pos: int) -> Tuple[bytes, int]:
+    size, pos = parse_from_length_prefix(buf, pos)
+    end = pos + size
+    assert end <= len(buf)  # Checks for EOF
+    return bytes(buf[pos:end]), end
+
+
+def parse_from_str(buf: memoryview, pos: int) -> Tuple[str, int]:
+    size, pos = parse_from_length_prefix(buf, pos)
+    end = pos + size
+    assert end <= len(buf)  # Checks for EOF
+    return str(buf[pos:end], "utf-8"), end
+
+
+def parse_from_serialized_program(buf: memoryview, pos: int) -> Tuple[SerializedProgram, int]:
+    end = pos + serialized_length(bytes(buf[pos:]))
+    return SerializedProgram.from_bytes(buf[pos:end]), end
+
+
+def function_to_parse_from_fixed_size(size: int, convert: Callable[[memoryview], Any]):
+    def parse_from_fixed_size(buf: memoryview, pos: int) -> Tuple[Any, int]:
+        end = pos + size
+        assert end <= len(buf)  # Checks for EOF
+        return convert(buf[pos:end]), end
+
+    return parse_from_fixed_size
+
+
+def function_to_parse_from_stream(parse_f: Callable[[BinaryIO], Any]):
+    # For types that can only parse from a stream, such as Program
+    def parse_from_stream(buf: memoryview, pos: int) -> Tuple[Any, int]:
+        f = io.BytesIO(buf[pos:])
+        item = parse_f(f)
+        return item, pos + f.tell()
+
+    return parse_from_stream
+
+
+def fixed_size_struct_format(f_type: Type) -> Optional[Tuple[str, Callable[[Any], Any]]]:
+    """
+    For types that are a single struct field, returns the struct format and the function that makes
+    the type from the unpacked value, so that runs of such fields can be unpacked at once.
+    """
+    if not isinstance(f_type, type):
+        return None
+    if issubclass(f_type, StructStream):
+        # Skips the range check of StructStream.__new__, the unpacked value always fits
+        return f_type.PACK.lstrip("!"), functools.partial(int.__new__, f_type)
+    size = getattr(f_type, "SIZE", None)
+    if issubclass(f_type, bytes) and size is not None:
+        return f"{size}s", functools.partial(bytes.__new__, f_type)
+    return None
+
+
+def function_to_parse_from_one_item(f_type: Type) -> Callable[[memoryview, int], Tuple[Any, int]]:
+    """
+    Same as Streamable.function_to_parse_one_item, but the returned function parses the value at an offset
+    of a memoryview, and returns it together with the offset right after it.
+    """
+    inner_type: Type
+    if f_type is bool:
+        return parse_from_bool
+    if is_type_SpecificOptional(f_type):
+        inner_type = get_args(f_type)[0]
+        parse_inner_type_f = function_to_parse_from_one_item(inner_type)
+
+        def parse_from_optional(buf: memoryview, pos: int) -> Tuple[Optional[Any], int]:
+            is_present, pos = parse_from_bool(buf, pos)
+            if not is_present:
+                return None, pos
+            return parse_inner_type_f(buf, pos)
+
+        return parse_from_optional
+    if hasattr(f_type, "parse"):
+        if f_type in PARSE_FROM_FUNCTIONS_FOR_STREAMABLE_CLASS:
+            return PARSE_FROM_FUNCTIONS_FOR_STREAMABLE_CLASS[f_type]
+        if hasattr(f_type, "parse_from"):
+            # Ints and sized bytes
+            return f_type.parse_from
+        if f_type is SerializedProgram:
+            return parse_from_serialized_program
+        return function_to_parse_from_stream(f_type.parse)
+    if f_type == bytes:
+        return parse_from_bytes
+    if is_type_List(f_type):
+        inner_type = get_args(f_type)[0]
+        parse_inner_type_f = function_to_parse_from_one_item(inner_type)
+
+        def parse_from_list(buf: memoryview, pos: int) -> Tuple[List[Any], int]:
+            full_list: List = []
+            list_size, pos = parse_from_length_prefix(buf, pos)
+            for _ in range(list_size):
+                item, pos = parse_inner_type_f(buf, pos)
+                full_list.append(item)
+            return full_list, pos
+
+        return parse_from_list
+    if is_type_Tuple(f_type):
+        list_parse_inner_type_f = [function_to_parse_from_one_item(_) for _ in get_args(f_type)]
+
+        def parse_from_tuple(buf: memoryview, pos: int) -> Tuple[Tuple[Any, ...], int]:
+            full_list = []
+            for parse_f in list_parse_inner_type_f:
+                item, pos = parse_f(buf, pos)
+                full_list.append(item)
+            return tuple(full_list), pos
+
+        return parse_from_tuple
+    if hasattr(f_type, "from_bytes") and f_type.__name__ in size_hints:
+        return function_to_parse_from_fixed_size(size_hints[f_type.__name__], lambda b: f_type.from_bytes(bytes(b)))
+    if f_type is str:
+        return parse_from_str
+    raise NotImplementedError(f"Type {f_type} does not have parse")
+
+
+def function_to_parse_from_struct_run(struct_format: str, converters: List[Callable[[Any], Any]]):
+    compiled_struct = struct.Struct("!" + struct_format)
+    unpack_from = compiled_struct.unpack_from
+    size = compiled_struct.size
+
+    def parse_from_struct_run(buf: memoryview, pos: int) -> Tuple[List[Any], int]:
+        end = pos + size
+        assert end <= len(buf)  # Checks for EOF
+        return [convert(value) for convert, value in zip(converters, unpack_from(buf, pos))], end
+
+    return parse_from_struct_run
+
+
+def function_to_parse_from_streamable(cls: Type, fields: Dict[str, Type]):
+    field_names = list(fields.keys())
+    # Runs of consecutive fixed size fields are unpacked with a single struct, these steps return a list of values
+    steps: List[Tuple[bool, Callable[[memoryview, int], Tuple[Any, int]]]] = []
+    run_format = ""
+    run_converters: List[Callable[[Any], Any]] = []
+    for f_type in fields.values():
+        struct_format = fixed_size_struct_format(f_type)
+        if struct_format is not None:
+            run_format += struct_format[0]
+            run_converters.append(struct_format[1])
+            continue
+        if len(run_converters) > 0:
+            steps.append((True, function_to_parse_from_struct_run(run_format, run_converters)))
+            run_format, run_converters = "", []
+        steps.append((False, function_to_parse_from_one_item(f_type)))
+    if len(run_converters) > 0:
+        steps.append((True, function_to_parse_from_struct_run(run_format, run_converters)))
+
+    def parse_from_streamable(buf: memoryview, pos: int) -> Tuple[Any, int]:
+        values: List[Any] = []
+        for is_run, parse_f in steps:
+            value, pos = parse_f(buf, pos)
+            if is_run:
+                values.extend(value)
+            else:
+                values.append(value)
+        # Create the object without calling __init__() to avoid unnecessary post-init checks in strictdataclass
+        obj = object.__new__(cls)
+        obj.__dict__.update(zip(field_names, values))
+        return obj, pos
+
+    return parse_from_streamable
+
+
+def skip_from_bytes(buf: memoryview, pos: int) -> int:
+    size, pos = parse_from_length_prefix(buf, pos)
+    end = pos + size
+    assert end <= len(buf)  # Checks for EOF
+    return end
+
+
+def skip_from_serialized_program(buf: memoryview, pos: int) -> int:
+    return pos + serialized_length(bytes(buf[pos:]))
+
+
+def function_to_skip_from_fixed_size(size: int):
+    def skip_from_fixed_size(buf: memoryview, pos: int) -> int:
+        end = pos + size
+        assert end <= len(buf)  # Checks for EOF
+        return end
+
+    return skip_from_fixed_size
+
+
+def function_to_skip_from_one_item(f_type: Type) -> Callable[[memoryview, int], int]:
+    """
+    Returns a function that takes a memoryview and the offset of a serialized value of the given type,
+    and returns the offset right after it. Values are only parsed where their size is not known otherwise.
+    """
+    inner_type: Type
+    if is_type_SpecificOptional(f_type):
+        inner_type = get_args(f_type)[0]
+        skip_inner_type_f = function_to_skip_from_one_item(inner_type)
+
+        def skip_from_optional(buf: memoryview, pos: int) -> int:
+            is_present, pos = parse_from_bool(buf, pos)
+            if not is_present:
+                return pos
+            return skip_inner_type_f(buf, pos)
+
+        return skip_from_optional
+    if f_type == bytes:
+        return skip_from_bytes
+    if f_type is SerializedProgram:
+        return skip_from_serialized_program
+    if f_type in PARSE_FROM_FUNCTIONS_FOR_STREAMABLE_CLASS:
+        field_skip_functions = [function_to_skip_from_one_item(_) for _ in f_type.__annotations__.values()]
+
+        def skip_from_streamable(buf: memoryview, pos: int) -> int:
+            for skip_f in field_skip_functions:
+                pos = skip_f(buf, pos)
+            return pos
+
+        return skip_from_streamable
+    struct_format = fixed_size_struct_format(f_type)
+    if struct_format is not None:
+        return function_to_skip_from_fixed_size(struct.calcsize("!" + struct_format[0]))
+    if is_type_List(f_type):
+        inner_type = get_args(f_type)[0]
+        skip_inner_type_f = function_to_skip_from_one_item(inner_type)
+        inner_struct_format = fixed_size_struct_format(inner_type)
+        inner_size = None if inner_struct_format is None else struct.calcsize("!" + inner_struct_format[0])
+
+        def skip_from_list(buf: memoryview, pos: int) -> int:
+            list_size, pos = parse_from_length_prefix(buf, pos)
+            if inner_size is not None:
+                end = pos + list_size * inner_size
+                assert end <= len(buf)  # Checks for EOF
+                return end
+            for _ in range(list_size):
+                pos = skip_inner_type_f(buf, pos)
+            return pos
+
+        return skip_from_list
+    if is_type_Tuple(f_type):
+        list_skip_inner_type_f = [function_to_skip_from_one_item(_) for _ in get_args(f_type)]
+
+        def skip_from_tuple(buf: memoryview, pos: int) -> int:
+            for skip_f in list_skip_inner_type_f:
+                pos = skip_f(buf, pos)
+            return pos
+
+        return skip_from_tuple
+    if hasattr(f_type, "from_bytes") and f_type.__name__ in size_hints:
+        return function_to_skip_from_fixed_size(size_hints[f_type.__name__])
+    parse_f = function_to_parse_from_one_item(f_type)
+    return lambda buf, pos: parse_f(buf, pos)[1]
+
+
+def stream_bool(item: bool, out: bytearray) -> None:
+    out.append(int(item))
+
+
+def stream_bytes(item: bytes, out: bytearray) -> None:
+    out += uint32(len(item)).to_bytes(4, "big")
+    out += item
+
+
+def stream_str(item: str, out: bytearray) -> None:
+    str_bytes = item.encode("utf-8")
+    out += uint32(len(str_bytes)).to_bytes(4, "big")
+    out += str_bytes
+
+
+def stream_uint128(item: uint128, out: bytearray) -> None:
+    assert item <= (2 ** 128) - 1 and item >= 0
+    out += item.to_bytes(16, "big", signed=False)
+
+
+def stream_int512(item: int512, out: bytearray) -> None:
+    assert item <= (2 ** 512) - 1 and item >= -(2 ** 512)
+    out += item.to_bytes(65, "big", signed=True)
+
+
+def stream_sized_bytes(item: bytes, out: bytearray) -> None:
+    out += item
+
+
+def stream_with_bytes(item: Any, out: bytearray) -> None:
+    out += bytes(item)
+
+
+def stream_with_stream(item: Any, out: bytearray) -> None:
+    f = io.BytesIO()
+    item.stream(f)
+    out += f.getvalue()
+
+
+def function_to_stream_one_item(f_type: Type) -> Callable[[Any, bytearray], None]:
+    """
+    Returns a function that appends the serialization of a value of the given type to a bytearray,
+    exactly as Streamable.stream_one_item writes it to a stream.
+    """
+    inner_type: Type
+    if is_type_SpecificOptional(f_type):
+        inner_type = get_args(f_type)[0]
+        stream_inner_type_f = function_to_stream_one_item(inner_type)
+
+        def stream_optional(item: Any, out: bytearray) -> None:
+            if item is None:
+                out.append(0)
+            else:
+                out.append(1)
+                stream_inner_type_f(item, out)
+
+        return stream_optional
+    if f_type == bytes:
+        return stream_bytes
+    if hasattr(f_type, "stream"):
+        if f_type in STREAM_FUNCTIONS_FOR_STREAMABLE_CLASS:
+            return STREAM_FUNCTIONS_FOR_STREAMABLE_CLASS[f_type]
+        if issubclass(f_type, StructStream):
+            pack = f_type.STRUCT.pack
+
+            def stream_struct(item: StructStream, out: bytearray) -> None:
+                out += pack(item)
+
+            return stream_struct
+        if issubclass(f_type, bytes) and hasattr(f_type, "SIZE"):
+            return stream_sized_bytes
+        if f_type is uint128:
+            return stream_uint128
+        if f_type is int512:
+            return stream_int512
+        if hasattr(f_type, "__bytes__"):
+            # Program and SerializedProgram, whose __bytes__ is their stream
+            return stream_with_bytes
+        return stream_with_stream
+    if hasattr(f_type, "__bytes__"):
+        return stream_with_bytes
+    if is_type_List(f_type):
+        inner_type = get_args(f_type)[0]
+        stream_inner_type_f = function_to_stream_one_item(inner_type)
+
+        def stream_list(item: List[Any], out: bytearray) -> None:
+            assert is_type_List(type(item))
+            out += uint32(len(item)).to_bytes(4, "big")
+            for element in item:
+                stream_inner_type_f(element, out)
+
+        return stream_list
+    if is_type_Tuple(f_type):
+        list_stream_inner_type_f = [function_to_stream_one_item(_) for _ in get_args(f_type)]
+
+        def stream_tuple(item: Tuple[Any, ...], out: bytearray) -> None:
+            assert len(item) == len(list_stream_inner_type_f)
+            for element, stream_f in zip(item, list_stream_inner_type_f):
+                stream_f(element, out)
+
+        return stream_tuple
+    if f_type is str:
+        return stream_str
+    if f_type is bool:
+        return stream_bool
+    raise NotImplementedError(f"can't stream {f_type}")
+
+
+def function_to_stream_streamable(fields: Dict[str, Type]):
+    field_stream_functions = [(f_name, function_to_stream_one_item(f_type)) for f_name, f_type in fields.items()]
+
+    def stream_streamable(obj: Any, out: bytearray) -> None:
+        for f_name, stream_f in field_stream_functions:
+            stream_f(getattr(obj, f_name), out)
+
+    return stream_streamable
+
+
 class Streamable:
     @classmethod
     def function_to_parse_one_item(cls: Type[cls.__name__], f_type: Type):  # type: ignore
@@ -267,8 +660,22 @@ class Streamable:
             return parse_str
         raise NotImplementedError(f"Type {f_type} does not have parse")
 
+    @classmethod
+    def parse_from(cls: Any, buf: memoryview, offset: int) -> Tuple[Any, int]:
+        """
+        Parses the object at offset of buf in place, returning it and the offset right after it.
+        """
+        return PARSE_FROM_FUNCTIONS_FOR_STREAMABLE_CLASS[cls](buf, offset)
+
     @classmethod
     def parse(cls: Type[cls.__name__], f: BinaryIO) -> cls.__name__:  # type: ignore
+        if type(f) is io.BytesIO:
+            # Parse in place from the buffer of the stream, and move the stream past the parsed object
+            with f.getbuffer() as buf:
+                parsed, pos = PARSE_FROM_FUNCTIONS_FOR_STREAMABLE_CLASS[cls](buf, f.tell())
+            f.seek(pos)
+            return parsed
+
         # Create the object without calling __init__() to avoid unnecessary post-init checks in strictdataclass
         obj: Streamable = object.__new__(cls)
         fields: Iterator[str] = iter(getattr(cls, "__annotations__", {}))
@@ -322,27 +729,24 @@ class Streamable:
             raise NotImplementedError(f"can't stream {item}, {f_type}")
 
     def stream(self, f: BinaryIO) -> None:
-        try:
-            fields = self.__annotations__  # pylint: disable=no-member
-        except Exception:
-            fields = {}
-        for f_name, f_type in fields.items():
-            self.stream_one_item(f_type, getattr(self, f_name), f)
+        out = bytearray()
+        STREAM_FUNCTIONS_FOR_STREAMABLE_CLASS[type(self)](self, out)
+        f.write(out)
 
     def get_hash(self) -> bytes32:
         return bytes32(std_hash(bytes(self)))
 
     @classmethod
     def from_bytes(cls: Any, blob: bytes) -> Any:
-        f = io.BytesIO(blob)
-        parsed = cls.parse(f)
-        assert f.read() == b""
+        buf = memoryview(blob)
+        parsed, pos = PARSE_FROM_FUNCTIONS_FOR_STREAMABLE_CLASS[cls](buf, 0)
+        assert pos == len(buf)
         return parsed
 
     def __bytes__(self: Any) -> bytes:
-        f = io.BytesIO()
-        self.stream(f)
-        return bytes(f.getvalue())
+        out = bytearray()
+        STREAM_FUNCTIONS_FOR_STREAMABLE_CLASS[type(self)](self, out)
+        return bytes(out)
 
     def __str__(self: Any) -> str:
         return pp.pformat(recurse_jsonify(dataclasses.asdict(self)))
@@ -1,17 +1,24 @@
-import io
 import struct
-from typing import Any, BinaryIO
+from typing import Any, BinaryIO, Tuple
 
 
 class StructStream(int):
     PACK = ""
+    # Set for each subclass from PACK, so that the format is only compiled once
+    STRUCT: struct.Struct = struct.Struct(PACK)
+    SIZE = 0
 
     """
     Create a class that can parse and stream itself based on a struct.pack template string.
     """
 
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.STRUCT = struct.Struct(cls.PACK)
+        cls.SIZE = cls.STRUCT.size
+
     def __new__(cls: Any, value: int):
-        bits = struct.calcsize(cls.PACK) * 8
+        bits = cls.SIZE * 8
         value = int(value)
         if value.bit_length() > bits:
             raise ValueError(
@@ -21,22 +28,28 @@ class StructStream(int):
 
     @classmethod
     def parse(cls: Any, f: BinaryIO) -> Any:
-        bytes_to_read = struct.calcsize(cls.PACK)
-        read_bytes = f.read(bytes_to_read)
-        assert read_bytes is not None and len(read_bytes) == bytes_to_read
-        return cls(*struct.unpack(cls.PACK, read_bytes))
+        read_bytes = f.read(cls.SIZE)
+        assert read_bytes is not None and len(read_bytes) == cls.SIZE
+        return int.__new__(cls, *cls.STRUCT.unpack(read_bytes))
+
+    @classmethod
+    def parse_from(cls: Any, buf: Any, offset: int) -> Tuple[Any, int]:
+        """
+        Decodes the value at offset of buf, which can be a memoryview, without copying it, and returns it
+        together with the offset right after it.
+        """
+        end = offset + cls.SIZE
+        assert end <= len(buf)  # Checks for EOF
+        # The unpacked value always fits, so the range check of __new__ is not needed
+        return int.__new__(cls, *cls.STRUCT.unpack_from(buf, offset)), end
 
     def stream(self, f):
-        f.write(struct.pack(self.PACK, self))
+        f.write(self.STRUCT.pack(self))
 
     @classmethod
     def from_bytes(cls: Any, blob: bytes) -> Any:  # type: ignore
-        f = io.BytesIO(blob)
-        result = cls.parse(f)
-        assert f.read() == b""
-        return result
+        assert len(blob) == cls.SIZE
+        return int.__new__(cls, *cls.STRUCT.unpack(blob))
 
     def __bytes__(self: Any) -> bytes:
-        f = io.BytesIO()
-        self.stream(f)
-        return bytes(f.getvalue())
+        return self.STRUCT.pack(self)
@@ -13,7 +13,11 @@ from chia.consensus.constants import ConsensusConstants
 from chia.consensus.difficulty_adjustment import get_next_sub_slot_iters_and_difficulty
 from chia.consensus.find_fork_point import find_fork_point_in_chain
 from chia.consensus.full_block_to_block_record import block_to_block_record
-from chia.consensus.multiprocess_validation import PreValidationResult, pre_validate_blocks_multiprocessing
+from chia.consensus.multiprocess_validation import (
+    PreValidationContext,
+    PreValidationResult,
+    pre_validate_blocks_multiprocessing,
+)
 from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.types.blockchain_format.sub_epoch_summary import SubEpochSummary
 from chia.types.header_block import HeaderBlock
@@ -64,6 +68,7 @@ class WalletBlockchain(BlockchainInterface):
     block_store: WalletBlockStore
     # Used to verify blocks in parallel
     pool: ProcessPoolExecutor
+    pre_validation_context: PreValidationContext
 
     coins_of_interest_received: Any
     reorg_rollback: Any
@@ -99,10 +104,11 @@ class WalletBlockchain(BlockchainInterface):
         if cpu_count > 61:
             cpu_count = 61  # Windows Server 2016 has an issue https://bugs.python.org/issue26903
         num_workers = max(cpu_count - 2, 1)
-        self.pool = ProcessPoolExecutor(max_workers=num_workers)
-        log.info(f"Started {num_workers} processes for block validation")
         self.constants = consensus_constants
         self.constants_json = recurse_jsonify(dataclasses.asdict(self.constants))
+        self.pre_validation_context = PreValidationContext(self.constants_json, num_workers)
+        self.pool = self.pre_validation_context.pool
+        log.info(f"Started {num_workers} processes for block validation")
         self.block_store = block_store
         self._shut_down = False
         self.coins_of_interest_received = coins_of_interest_received
@@ -114,7 +120,7 @@ class WalletBlockchain(BlockchainInterface):
 
     def shut_down(self):
         self._shut_down = True
-        self.pool.shutdown(wait=True)
+        self.pre_validation_context.shut_down()
 
     async def _load_chain_from_store(self) -> None:
         """
@@ -341,10 +347,19 @@ class WalletBlockchain(BlockchainInterface):
         return get_next_sub_slot_iters_and_difficulty(self.constants, new_slot, curr, self)[0]
 
     async def pre_validate_blocks_multiprocessing(
-        self, blocks: List[HeaderBlock], batch_size: int = 4
+        self, blocks: List[HeaderBlock], batch_size: Optional[int] = None
     ) -> Optional[List[PreValidationResult]]:
         return await pre_validate_blocks_multiprocessing(
-            self.constants, self.constants_json, self, blocks, self.pool, True, {}, None, batch_size
+            self.constants,
+            self.constants_json,
+            self,
+            blocks,
+            self.pool,
+            True,
+            {},
+            None,
+            batch_size,
+            self.pre_validation_context,
         )
 
     def contains_block(self, header_hash: bytes32) -> bool:
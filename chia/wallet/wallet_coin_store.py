@@ -146,9 +146,10 @@ class WalletCoinStore:
         """ Returns CoinRecord with specified coin id. """
         if coin_name in self.coin_record_cache:
             return self.coin_record_cache[coin_name]
-        cursor = await self.db_connection.execute("SELECT * from coin_record WHERE coin_name=?", (coin_name.hex(),))
-        row = await cursor.fetchone()
-        await cursor.close()
+        async with self.db_wrapper.reader() as conn:
+            cursor = await conn.execute("SELECT * from coin_record WHERE coin_name=?", (coin_name.hex(),))
+            row = await cursor.fetchone()
+            await cursor.close()
 
         if row is None:
             return None
@@ -156,9 +157,10 @@ class WalletCoinStore:
 
     async def get_first_coin_height(self) -> Optional[uint32]:
         """ Returns height of first confirmed coin"""
-        cursor = await self.db_connection.execute("SELECT MIN(confirmed_height) FROM coin_record;")
-        row = await cursor.fetchone()
-        await cursor.close()
+        async with self.db_wrapper.reader() as conn:
+            cursor = await conn.execute("SELECT MIN(confirmed_height) FROM coin_record;")
+            row = await cursor.fetchone()
+            await cursor.close()
 
         if row is not None and row[0] is not None:
             return uint32(row[0])
@@ -197,18 +199,20 @@ class WalletCoinStore:
 
     async def get_all_coins(self) -> Set[WalletCoinRecord]:
         """ Returns set of all CoinRecords."""
-        cursor = await self.db_connection.execute("SELECT * from coin_record")
-        rows = await cursor.fetchall()
-        await cursor.close()
+        async with self.db_wrapper.reader() as conn:
+            cursor = await conn.execute("SELECT * from coin_record")
+            rows = await cursor.fetchall()
+            await cursor.close()
 
         return set(self.coin_record_from_row(row) for row in rows)
 
     # Checks DB and DiffStores for CoinRecords with puzzle_hash and returns them
     async def get_coin_records_by_puzzle_hash(self, puzzle_hash: bytes32) -> List[WalletCoinRecord]:
         """Returns a list of all coin records with the given puzzle hash"""
-        cursor = await self.db_connection.execute("SELECT * from coin_record WHERE puzzle_hash=?", (puzzle_hash.hex(),))
-        rows = await cursor.fetchall()
-        await cursor.close()
+        async with self.db_wrapper.reader() as conn:
+            cursor = await conn.execute("SELECT * from coin_record WHERE puzzle_hash=?", (puzzle_hash.hex(),))
+            rows = await cursor.fetchall()
+            await cursor.close()
 
         return [self.coin_record_from_row(row) for row in rows]
 
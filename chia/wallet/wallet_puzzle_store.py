@@ -8,6 +8,7 @@ from blspy import G1Element
 from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.util.db_wrapper import DBWrapper
 from chia.util.ints import uint32
+from chia.util.lru_cache import LRUCache
 from chia.wallet.derivation_record import DerivationRecord
 from chia.wallet.util.wallet_types import WalletType
 
@@ -23,6 +24,7 @@ class WalletPuzzleStore:
     lock: asyncio.Lock
     cache_size: uint32
     all_puzzle_hashes: Set[bytes32]
+    derivation_record_cache: LRUCache
     db_wrapper: DBWrapper
 
     @classmethod
@@ -30,6 +32,8 @@ class WalletPuzzleStore:
         self = cls()
 
         self.cache_size = cache_size
+        # Derivation records by puzzle hash, for the lookups done for every coin the wallet sees
+        self.derivation_record_cache = LRUCache(cache_size)
 
         self.db_wrapper = db_wrapper
         self.db_connection = self.db_wrapper.db
@@ -75,6 +79,7 @@ class WalletPuzzleStore:
     async def _clear_database(self):
         cursor = await self.db_connection.execute("DELETE FROM derivation_paths")
         await cursor.close()
+        self.derivation_record_cache.clear()
         await self.db_connection.commit()
 
     async def add_derivation_paths(self, records: List[DerivationRecord]) -> None:
@@ -85,6 +90,7 @@ class WalletPuzzleStore:
             sql_records = []
             for record in records:
                 self.all_puzzle_hashes.add(record.puzzle_hash)
+                self.derivation_record_cache.put(record.puzzle_hash, record)
                 sql_records.append(
                     (
                         record.index,
@@ -151,6 +157,15 @@ class WalletPuzzleStore:
 
         return None
 
+    async def _get_derivation_record_for_puzzle_hash(self, puzzle_hash: bytes32) -> Optional[DerivationRecord]:
+        cached = self.derivation_record_cache.get(puzzle_hash)
+        if cached is not None:
+            return cached
+        record = await self.get_derivation_record_for_puzzle_hash(puzzle_hash.hex())
+        if record is not None:
+            self.derivation_record_cache.put(puzzle_hash, record)
+        return record
+
     async def set_used_up_to(self, index: uint32, in_transaction=False) -> None:
         """
         Sets a derivation path to used so we don't use it again.
@@ -217,14 +232,9 @@ class WalletPuzzleStore:
         Returns the derivation path for the puzzle_hash.
         Returns None if not present.
         """
-        cursor = await self.db_connection.execute(
-            "SELECT * from derivation_paths WHERE puzzle_hash=?", (puzzle_hash.hex(),)
-        )
-        row = await cursor.fetchone()
-        await cursor.close()
-
-        if row is not None:
-            return uint32(row[0])
+        record = await self._get_derivation_record_for_puzzle_hash(puzzle_hash)
+        if record is not None:
+            return record.index
 
         return None
 
@@ -253,15 +263,9 @@ class WalletPuzzleStore:
         Returns the derivation path for the puzzle_hash.
         Returns None if not present.
         """
-
-        cursor = await self.db_connection.execute(
-            "SELECT * from derivation_paths WHERE puzzle_hash=?", (puzzle_hash.hex(),)
-        )
-        row = await cursor.fetchone()
-        await cursor.close()
-
-        if row is not None:
-            return row[4], WalletType(row[3])
+        record = await self._get_derivation_record_for_puzzle_hash(puzzle_hash)
+        if record is not None:
+            return record.wallet_id, record.wallet_type
 
         return None
 
@@ -134,6 +134,7 @@ class WalletStateManager:
         self.trade_manager = await TradeManager.create(self, self.db_wrapper)
         self.user_settings = await UserSettings.create(self.basic_store)
         self.block_store = await WalletBlockStore.create(self.db_wrapper)
+        await self.db_wrapper.open_read_pool(db_path, config.get("db_readers", 2))
 
         self.blockchain = await WalletBlockchain.create(
             self.block_store,
@@ -967,6 +968,9 @@ class WalletStateManager:
     async def close_all_stores(self) -> None:
         if self.blockchain is not None:
             self.blockchain.shut_down()
+        if self.weight_proof_handler is not None:
+            self.weight_proof_handler.shut_down()
+        await self.db_wrapper.close_read_pool()
         await self.db_connection.close()
 
     async def clear_all_stores(self):
@@ -253,9 +253,10 @@ class WalletTransactionStore:
             return self.tx_record_cache[tx_id]
 
         # NOTE: bundle_id is being stored as bytes, not hex
-        cursor = await self.db_connection.execute("SELECT * from transaction_record WHERE bundle_id=?", (tx_id,))
-        row = await cursor.fetchone()
-        await cursor.close()
+        async with self.db_wrapper.reader() as conn:
+            cursor = await conn.execute("SELECT * from transaction_record WHERE bundle_id=?", (tx_id,))
+            row = await cursor.fetchone()
+            await cursor.close()
         if row is not None:
             record = TransactionRecord.from_bytes(row[0])
             return record
@@ -266,12 +267,13 @@ class WalletTransactionStore:
         Returns the list of transaction that have not been received by full node yet.
         """
         current_time = int(time.time())
-        cursor = await self.db_connection.execute(
-            "SELECT * from transaction_record WHERE confirmed=?",
-            (0,),
-        )
-        rows = await cursor.fetchall()
-        await cursor.close()
+        async with self.db_wrapper.reader() as conn:
+            cursor = await conn.execute(
+                "SELECT * from transaction_record WHERE confirmed=?",
+                (0,),
+            )
+            rows = await cursor.fetchall()
+            await cursor.close()
         records = []
         for row in rows:
             record = TransactionRecord.from_bytes(row[0])
@@ -296,11 +298,12 @@ class WalletTransactionStore:
         """
         fee_int = TransactionType.FEE_REWARD.value
         pool_int = TransactionType.COINBASE_REWARD.value
-        cursor = await self.db_connection.execute(
-            "SELECT * from transaction_record WHERE confirmed=? and (type=? or type=?)", (1, fee_int, pool_int)
-        )
-        rows = await cursor.fetchall()
-        await cursor.close()
+        async with self.db_wrapper.reader() as conn:
+            cursor = await conn.execute(
+                "SELECT * from transaction_record WHERE confirmed=? and (type=? or type=?)", (1, fee_int, pool_int)
+            )
+            rows = await cursor.fetchall()
+            await cursor.close()
         records = []
 
         for row in rows:
@@ -314,9 +317,10 @@ class WalletTransactionStore:
         Returns the list of all transaction that have not yet been confirmed.
         """
 
-        cursor = await self.db_connection.execute("SELECT * from transaction_record WHERE confirmed=?", (0,))
-        rows = await cursor.fetchall()
-        await cursor.close()
+        async with self.db_wrapper.reader() as conn:
+            cursor = await conn.execute("SELECT * from transaction_record WHERE confirmed=?", (0,))
+            rows = await cursor.fetchall()
+            await cursor.close()
         records = []
 
         for row in rows:
@@ -339,15 +343,16 @@ class WalletTransactionStore:
         start = 0 is most recent transaction
         """
         limit = end - start
-        cursor = await self.db_connection.execute(
-            f"SELECT * from transaction_record where wallet_id=? and confirmed_at_height not in"
-            f" (select confirmed_at_height from transaction_record order by confirmed_at_height"
-            f" ASC LIMIT {start})"
-            f" order by confirmed_at_height DESC LIMIT {limit}",
-            (wallet_id,),
-        )
-        rows = await cursor.fetchall()
-        await cursor.close()
+        async with self.db_wrapper.reader() as conn:
+            cursor = await conn.execute(
+                f"SELECT * from transaction_record where wallet_id=? and confirmed_at_height not in"
+                f" (select confirmed_at_height from transaction_record order by confirmed_at_height"
+                f" ASC LIMIT {start})"
+                f" order by confirmed_at_height DESC LIMIT {limit}",
+                (wallet_id,),
+            )
+            rows = await cursor.fetchall()
+            await cursor.close()
         records = []
 
         for row in rows:
@@ -359,35 +364,33 @@ class WalletTransactionStore:
         return records
 
     async def get_transaction_count_for_wallet(self, wallet_id) -> int:
-        cursor = await self.db_connection.execute(
-            "SELECT COUNT(*) FROM transaction_record where wallet_id=?", (wallet_id,)
-        )
-        count_result = await cursor.fetchone()
-        if count_result is not None:
-            count = count_result[0]
-        else:
-            count = 0
-        await cursor.close()
+        async with self.db_wrapper.reader() as conn:
+            cursor = await conn.execute("SELECT COUNT(*) FROM transaction_record where wallet_id=?", (wallet_id,))
+            count_result = await cursor.fetchone()
+            if count_result is not None:
+                count = count_result[0]
+            else:
+                count = 0
+            await cursor.close()
         return count
 
     async def get_all_transactions_for_wallet(self, wallet_id: int, type: int = None) -> List[TransactionRecord]:
         """
         Returns all stored transactions.
         """
-        if type is None:
-            cursor = await self.db_connection.execute(
-                "SELECT * from transaction_record where wallet_id=?", (wallet_id,)
-            )
-        else:
-            cursor = await self.db_connection.execute(
-                "SELECT * from transaction_record where wallet_id=? and type=?",
-                (
-                    wallet_id,
-                    type,
-                ),
-            )
-        rows = await cursor.fetchall()
-        await cursor.close()
+        async with self.db_wrapper.reader() as conn:
+            if type is None:
+                cursor = await conn.execute("SELECT * from transaction_record where wallet_id=?", (wallet_id,))
+            else:
+                cursor = await conn.execute(
+                    "SELECT * from transaction_record where wallet_id=? and type=?",
+                    (
+                        wallet_id,
+                        type,
+                    ),
+                )
+            rows = await cursor.fetchall()
+            await cursor.close()
         records = []
 
         cache_set = set()
@@ -402,9 +405,10 @@ class WalletTransactionStore:
         """
         Returns all stored transactions.
         """
-        cursor = await self.db_connection.execute("SELECT * from transaction_record")
-        rows = await cursor.fetchall()
-        await cursor.close()
+        async with self.db_wrapper.reader() as conn:
+            cursor = await conn.execute("SELECT * from transaction_record")
+            rows = await cursor.fetchall()
+            await cursor.close()
         records = []
 
         for row in rows:
@@ -416,11 +420,10 @@ class WalletTransactionStore:
     async def get_transaction_above(self, height: int) -> List[TransactionRecord]:
         # Can be -1 (get all tx)
 
-        cursor = await self.db_connection.execute(
-            "SELECT * from transaction_record WHERE confirmed_at_height>?", (height,)
-        )
-        rows = await cursor.fetchall()
-        await cursor.close()
+        async with self.db_wrapper.reader() as conn:
+            cursor = await conn.execute("SELECT * from transaction_record WHERE confirmed_at_height>?", (height,))
+            rows = await cursor.fetchall()
+            await cursor.close()
         records = []
 
         for row in rows:
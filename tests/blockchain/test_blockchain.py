@@ -3,6 +3,7 @@ import asyncio
 import logging
 import multiprocessing
 import time
+from concurrent.futures.thread import ThreadPoolExecutor
 from dataclasses import replace
 from secrets import token_bytes
 
@@ -10,9 +11,16 @@ import pytest
 from blspy import AugSchemeMPL, G2Element
 from clvm.casts import int_to_bytes
 
+from chia.consensus.block_header_validation import validate_finished_header_block
 from chia.consensus.block_rewards import calculate_base_farmer_reward
 from chia.consensus.blockchain import ReceiveBlockResult
 from chia.consensus.coinbase import create_farmer_coin
+from chia.consensus.difficulty_adjustment import get_next_sub_slot_iters_and_difficulty
+from chia.consensus.multiprocess_validation import (
+    estimate_validation_cost,
+    pre_validate_blocks_multiprocessing,
+    split_into_work_units,
+)
 from chia.consensus.pot_iterations import is_overflow_block
 from chia.full_node.bundle_tools import detect_potential_template_generator
 from chia.types.blockchain_format.classgroup import ClassgroupElement
@@ -21,7 +29,12 @@ from chia.types.blockchain_format.foliage import TransactionsInfo
 from chia.types.blockchain_format.program import SerializedProgram
 from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.types.blockchain_format.slots import InfusedChallengeChainSubSlot
-from chia.types.blockchain_format.vdf import VDFInfo, VDFProof
+from chia.types.blockchain_format.vdf import (
+    VDFInfo,
+    VDFProof,
+    clear_verified_vdf_cache,
+    get_verified_vdf_cache_stats,
+)
 from chia.types.condition_opcodes import ConditionOpcode
 from chia.types.condition_with_args import ConditionWithArgs
 from chia.types.end_of_slot_bundle import EndOfSubSlotBundle
@@ -30,6 +43,7 @@ from chia.types.spend_bundle import SpendBundle
 from chia.types.unfinished_block import UnfinishedBlock
 from chia.util.block_tools import BlockTools, get_vdf_info_and_proof
 from chia.util.errors import Err
+from chia.util.generator_tools import get_block_header
 from chia.util.hash import std_hash
 from chia.util.ints import uint8, uint64, uint32
 from chia.util.merkle_set import MerkleSet
@@ -1547,6 +1561,35 @@ class TestBlockHeaderValidation:
                 return None
             assert (await empty_blockchain.receive_block(blocks[-1]))[0] == ReceiveBlockResult.NEW_PEAK
 
+    @pytest.mark.asyncio
+    async def test_verified_vdf_cache(self, empty_blockchain):
+        constants = empty_blockchain.constants
+        blocks = bt.get_consecutive_blocks(3)
+        for block in blocks[:2]:
+            assert (await empty_blockchain.receive_block(block))[0] == ReceiveBlockResult.NEW_PEAK
+
+        clear_verified_vdf_cache()
+        block = blocks[2]
+        default_element = ClassgroupElement.get_default_element()
+        info = block.reward_chain_block.reward_chain_ip_vdf
+        start = get_verified_vdf_cache_stats()
+        assert block.reward_chain_ip_proof.is_valid(constants, default_element, info)
+        assert block.reward_chain_ip_proof.is_valid(constants, default_element, info)
+        stats = get_verified_vdf_cache_stats()
+        assert stats["hits"] == start["hits"] + 1
+        assert stats["entries"] == 1
+
+        # Only the same proof of the same VDF is taken from the cache
+        other_info = replace(info, number_of_iterations=uint64(info.number_of_iterations + 1))
+        assert not block.reward_chain_ip_proof.is_valid(constants, default_element, other_info)
+        bad_proof = VDFProof(uint8(0), b"\x00" * 100, False)
+        assert not bad_proof.is_valid(constants, default_element, info)
+        assert get_verified_vdf_cache_stats()["entries"] == 1
+
+        # The block is validated without verifying the infusion point proof again
+        assert (await empty_blockchain.receive_block(block))[0] == ReceiveBlockResult.NEW_PEAK
+        assert get_verified_vdf_cache_stats()["hits"] > stats["hits"]
+
 
 class TestPreValidation:
     @pytest.mark.asyncio
@@ -1595,6 +1638,85 @@ class TestPreValidation:
         log.info(f"Average pv: {sum(times_pv)/(len(blocks)/n_at_a_time)}")
         log.info(f"Average rb: {sum(times_rb)/(len(blocks))}")
 
+    @pytest.mark.asyncio
+    async def test_pre_validation_shared_block_records(self, empty_blockchain, default_1000_blocks):
+        b = empty_blockchain
+        blocks = default_1000_blocks[:200]
+        for i in range(0, len(blocks), 16):
+            blocks_to_validate = blocks[i : i + 16]
+            res = await b.pre_validate_blocks_multiprocessing(blocks_to_validate, {})
+            # Same results as when the constants and block records are sent with each batch
+            res_pickled = await pre_validate_blocks_multiprocessing(
+                b.constants, b.constants_json, b, blocks_to_validate, b.pool, True, {}, b.get_block_generator, 4
+            )
+            assert res == res_pickled
+            for block, result in zip(blocks_to_validate, res):
+                assert result.error is None
+                assert (await b.receive_block(block, result))[0] == ReceiveBlockResult.NEW_PEAK
+
+        # Each block record was written once
+        buffer = b.pre_validation_context.block_records
+        assert len(buffer.written) <= len(blocks)
+        assert blocks[-1].header_hash in buffer.written
+
+    def test_split_into_work_units(self):
+        assert split_into_work_units([], 4) == []
+        assert split_into_work_units([5, 5, 5], 8) == [(0, 1), (1, 2), (2, 3)]
+        assert split_into_work_units([1] * 8, 4) == [(0, 2), (2, 4), (4, 6), (6, 8)]
+        # A heavy block gets a work unit for itself
+        assert split_into_work_units([1, 1, 30, 1, 1, 1, 1], 3) == [(0, 3), (3, 5), (5, 7)]
+        assert split_into_work_units([30, 1, 1, 1, 1, 1, 1], 3) == [(0, 1), (1, 4), (4, 7)]
+
+    @pytest.mark.asyncio
+    async def test_pre_validation_stats(self, empty_blockchain, default_400_blocks):
+        b = empty_blockchain
+        blocks = default_400_blocks[:64]
+        res = await b.pre_validate_blocks_multiprocessing(blocks, {})
+        assert all(result.error is None for result in res)
+        stats = b.pre_validation_context.get_stats()
+        assert sum(worker["blocks"] for worker in stats["workers"].values()) == len(blocks)
+        assert sum(worker["work_units"] for worker in stats["workers"].values()) <= stats["max_workers"]
+        assert all(estimate_validation_cost(block, {}) > 0 for block in blocks)
+
+    @pytest.mark.asyncio
+    async def test_parallel_vdf_checks(self, empty_blockchain, default_400_blocks):
+        b = empty_blockchain
+        blocks = default_400_blocks[:100]
+        executor = ThreadPoolExecutor(max_workers=4)
+        time_sequential = 0.0
+        time_parallel = 0.0
+        try:
+            for block in blocks:
+                prev_b = None if block.height == 0 else b.block_record(block.prev_header_hash)
+                sub_slot_iters, difficulty = get_next_sub_slot_iters_and_difficulty(
+                    b.constants, len(block.finished_sub_slots) > 0, prev_b, b
+                )
+                header_block = get_block_header(block, [], [])
+                start = time.time()
+                sequential = validate_finished_header_block(
+                    b.constants, b, header_block, False, difficulty, sub_slot_iters
+                )
+                time_sequential += time.time() - start
+                start = time.time()
+                parallel = validate_finished_header_block(
+                    b.constants, b, header_block, False, difficulty, sub_slot_iters, executor=executor
+                )
+                time_parallel += time.time() - start
+                assert sequential == parallel
+                assert parallel[1] is None
+
+                bad_proof = VDFProof(uint8(0), b"\x00" * 100, False)
+                header_bad = get_block_header(recursive_replace(block, "challenge_chain_ip_proof", bad_proof), [], [])
+                bad = validate_finished_header_block(
+                    b.constants, b, header_bad, False, difficulty, sub_slot_iters, executor=executor
+                )
+                assert bad[1] is not None and bad[1].code == Err.INVALID_CC_IP_VDF
+
+                assert (await b.receive_block(block))[0] == ReceiveBlockResult.NEW_PEAK
+        finally:
+            executor.shutdown()
+        log.info(f"Header validation of {len(blocks)} blocks: {time_sequential}s, with parallel VDFs: {time_parallel}s")
+
 
 class TestBodyValidation:
     @pytest.mark.asyncio
@@ -2589,3 +2711,39 @@ class TestReorgs:
             != blocks_without_filter[header_hash].transactions_filter
         )
         assert blocks_with_filter[header_hash].header_hash == blocks_without_filter[header_hash].header_hash
+
+    @pytest.mark.asyncio
+    async def test_stream_header_blocks_in_range(self, empty_blockchain):
+        b = empty_blockchain
+        blocks = bt.get_consecutive_blocks(
+            10,
+            guarantee_transaction_block=True,
+            pool_reward_puzzle_hash=bt.pool_ph,
+            farmer_reward_puzzle_hash=bt.pool_ph,
+        )
+        for block in blocks:
+            assert (await b.receive_block(block))[0] == ReceiveBlockResult.NEW_PEAK
+        wt: WalletTool = bt.get_pool_wallet_tool()
+        tx: SpendBundle = wt.generate_signed_transaction(
+            10, wt.get_new_puzzlehash(), list(blocks[2].get_included_reward_coins())[0]
+        )
+        blocks = bt.get_consecutive_blocks(
+            3,
+            block_list_input=blocks,
+            guarantee_transaction_block=True,
+            transaction_data=tx,
+        )
+        for block in blocks[-3:]:
+            assert (await b.receive_block(block))[0] == ReceiveBlockResult.NEW_PEAK
+
+        # Half of the blocks are read from the database
+        for block in blocks[::2]:
+            b.block_store.rollback_cache_block(block.header_hash)
+        for tx_filter in [True, False]:
+            expected = [(await b.get_header_blocks_in_range(h, h, tx_filter))[blocks[h].header_hash] for h in range(13)]
+            for batch_size in [1, 3, 32]:
+                streamed = [hb async for hb in b.stream_header_blocks_in_range(0, 20, tx_filter, batch_size)]
+                assert streamed == expected
+            streamed = [hb async for hb in b.stream_header_blocks_in_range(4, 8, tx_filter, 2)]
+            assert streamed == expected[4:9]
+
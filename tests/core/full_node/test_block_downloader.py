@@ -0,0 +1,120 @@
+import asyncio
+from typing import List, Optional
+
+import pytest
+
+from chia.full_node.block_downloader import BlockDownloader
+from chia.protocols.full_node_protocol import RejectBlocks, RequestBlocks, RespondBlocks
+
+
+class FakePeer:
+    def __init__(self, peer_id: int, delay: float = 0, fail_at: Optional[int] = None):
+        self.peer_node_id = bytes([peer_id] * 32)
+        self.peer_host = f"peer{peer_id}"
+        self.closed = False
+        self.delay = delay
+        self.fail_at = fail_at
+        self.requested: List[int] = []
+
+    async def request_blocks(self, request: RequestBlocks, timeout: int):
+        self.requested.append(request.start_height)
+        await asyncio.sleep(self.delay)
+        if self.fail_at is not None and request.start_height >= self.fail_at:
+            return RejectBlocks(request.start_height, request.end_height)
+        # The blocks are not looked at by the downloader, the heights are enough to check the order
+        return RespondBlocks(request.start_height, request.end_height, [])
+
+    async def close(self, ban_time: int = 0):
+        self.closed = True
+
+
+async def download_all(downloader: BlockDownloader) -> List[int]:
+    heights = []
+    try:
+        while not downloader.finished:
+            batch = await downloader.next_batch()
+            if batch is None:
+                break
+            heights.append(batch.start_height)
+    finally:
+        downloader.close()
+    return heights
+
+
+@pytest.fixture(scope="module")
+def event_loop():
+    loop = asyncio.get_event_loop()
+    yield loop
+
+
+class TestBlockDownloader:
+    @pytest.mark.asyncio
+    async def test_batches_in_order_from_all_peers(self):
+        peers = [FakePeer(1, 0.01), FakePeer(2, 0.05), FakePeer(3, 0.002)]
+        downloader = BlockDownloader(peers, 0, 1000, 32, max_batches_ahead=8)
+        assert await download_all(downloader) == list(range(0, 1000, 32))
+        for peer in peers:
+            assert len(peer.requested) > 0
+        # The fastest peer downloads the most batches
+        assert len(peers[2].requested) > len(peers[1].requested)
+
+    @pytest.mark.asyncio
+    async def test_failed_peer_batches_reassigned(self):
+        failing = FakePeer(1, 0.01, fail_at=320)
+        peers = [failing, FakePeer(2, 0.01)]
+        downloader = BlockDownloader(peers, 0, 1000, 32)
+        assert await download_all(downloader) == list(range(0, 1000, 32))
+        assert failing.peer_node_id not in downloader.peers
+
+    @pytest.mark.asyncio
+    async def test_slow_batch_requested_again(self):
+        stuck = FakePeer(1, 1000)
+        fast = FakePeer(2, 0.01)
+        downloader = BlockDownloader([stuck, fast], 0, 320, 32, min_slow_seconds=0.1)
+        heights = await asyncio.wait_for(download_all(downloader), 10)
+        assert heights == list(range(0, 320, 32))
+        assert set(stuck.requested).issubset(set(fast.requested))
+
+    @pytest.mark.asyncio
+    async def test_remove_peer_with_duplicate_request(self):
+        stuck = FakePeer(1, 1000)
+        fast = FakePeer(2, 0.01)
+        downloader = BlockDownloader([stuck, fast], 0, 320, 32, min_slow_seconds=0.1)
+        batch = await asyncio.wait_for(downloader.next_batch(), 10)
+        assert batch.start_height == 0 and batch.peer is fast
+        # The stuck peer still has the batch that was already returned in flight
+        assert stuck.peer_node_id in downloader.in_flight[0]
+        downloader.remove_peer(stuck.peer_node_id)
+        assert all(len(requested) > 0 for requested in downloader.in_flight.values())
+        heights = await asyncio.wait_for(download_all(downloader), 10)
+        assert heights == list(range(32, 320, 32))
+        # Batches already returned are not requested again
+        assert len(fast.requested) == len(set(fast.requested))
+
+    @pytest.mark.asyncio
+    async def test_rejected_batch_downloaded_again(self):
+        bad = FakePeer(1, 0)
+        good = FakePeer(2, 0.05)
+        downloader = BlockDownloader([bad, good], 0, 100, 10)
+        batch = await downloader.next_batch()
+        while batch.peer is not bad:
+            batch = await downloader.next_batch()
+        rejected = batch.start_height
+        downloader.reject(batch)
+        batch = await downloader.next_batch()
+        assert batch.start_height == rejected
+        assert batch.peer is good
+        assert bad.peer_node_id not in downloader.peers
+        downloader.close()
+
+    @pytest.mark.asyncio
+    async def test_no_peers_left(self):
+        peers = [FakePeer(1, 0, fail_at=0), FakePeer(2, 0, fail_at=50)]
+        downloader = BlockDownloader(peers, 0, 100, 10)
+        assert await download_all(downloader) == [0, 10, 20, 30, 40]
+        assert not downloader.finished
+        assert len(downloader.peers) == 0
+
+    def test_ranges(self):
+        downloader = BlockDownloader([], 5, 70, 32)
+        assert downloader.ranges == [(5, 37), (37, 69), (69, 70)]
@@ -0,0 +1,129 @@
+# flake8: noqa: F811, F401
+import asyncio
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import aiosqlite
+import pytest
+
+from chia.consensus.blockchain import Blockchain
+from chia.full_node.block_store import BlockStore
+from chia.full_node.coin_store import CoinStore
+from chia.types.full_block import FullBlock
+from chia.util.db_wrapper import DBWrapper
+from tests.core.fixtures import default_400_blocks  # noqa: F401
+from tests.setup_nodes import bt, test_constants
+
+
+@pytest.fixture(scope="module")
+def event_loop():
+    loop = asyncio.get_event_loop()
+    yield loop
+
+
+def map_files(db_path: Path) -> List[Path]:
+    return [
+        db_path.with_name(f"{db_path.stem}-height-to-hash"),
+        db_path.with_name(f"{db_path.stem}-sub-epoch-summaries"),
+    ]
+
+
+def remove_db(db_path: Path) -> None:
+    for path in [db_path, db_path.with_name(f"{db_path.stem}-chain-snapshot")] + map_files(db_path):
+        if path.exists():
+            path.unlink()
+
+
+async def open_blockchain(db_path: Path, map_db_path: Optional[Path]) -> Tuple[Blockchain, aiosqlite.Connection]:
+    connection = await aiosqlite.connect(db_path)
+    db_wrapper = DBWrapper(connection)
+    coin_store = await CoinStore.create(db_wrapper)
+    block_store = await BlockStore.create(db_wrapper)
+    return await Blockchain.create(coin_store, block_store, test_constants, map_db_path), connection
+
+
+async def close_blockchain(bc: Blockchain, connection: aiosqlite.Connection) -> None:
+    bc.shut_down()
+    await connection.close()
+
+
+async def assert_chain(bc: Blockchain, blocks: List[FullBlock]) -> None:
+    peak = bc.get_peak()
+    assert peak is not None and peak.header_hash == blocks[-1].header_hash
+    for block in blocks:
+        assert bc.height_to_hash(block.height) == block.header_hash
+    assert not bc.contains_height(blocks[-1].height + 1)
+    records = await bc.block_store.get_block_records_in_range(0, blocks[-1].height)
+    ses_heights = [
+        block.height for block in blocks if records[block.header_hash].sub_epoch_summary_included is not None
+    ]
+    assert len(ses_heights) > 0
+    assert bc.get_ses_heights() == ses_heights
+    for height in ses_heights:
+        assert bc.get_ses(height) == records[blocks[height].header_hash].sub_epoch_summary_included
+
+
+class TestBlockHeightMap:
+    @pytest.mark.asyncio
+    async def test_saved_map(self, default_400_blocks):
+        blocks = default_400_blocks
+        db_path = Path("blockchain_height_map_test.db")
+        remove_db(db_path)
+        try:
+            bc, connection = await open_blockchain(db_path, db_path)
+            for block in blocks:
+                await bc.receive_block(block)
+            await assert_chain(bc, blocks)
+            await close_blockchain(bc, connection)
+            assert all(path.exists() for path in map_files(db_path))
+            assert map_files(db_path)[0].stat().st_size == len(blocks) * 32
+
+            # Loaded from the saved files
+            bc, connection = await open_blockchain(db_path, db_path)
+            await assert_chain(bc, blocks)
+            await close_blockchain(bc, connection)
+
+            # Loaded from the database
+            bc, connection = await open_blockchain(db_path, None)
+            await assert_chain(bc, blocks)
+            await close_blockchain(bc, connection)
+
+            # The last heights are missing, and the last one was partially written
+            height_to_hash_file = map_files(db_path)[0]
+            height_to_hash_file.write_bytes(height_to_hash_file.read_bytes()[: 350 * 32 + 5])
+            bc, connection = await open_blockchain(db_path, db_path)
+            await assert_chain(bc, blocks)
+            await close_blockchain(bc, connection)
+            assert height_to_hash_file.stat().st_size == len(blocks) * 32
+        finally:
+            remove_db(db_path)
+
+    @pytest.mark.asyncio
+    async def test_saved_map_from_other_chain(self, default_400_blocks):
+        blocks = default_400_blocks
+        db_path = Path("blockchain_height_map_test.db")
+        db_path_2 = Path("blockchain_height_map_test_2.db")
+        remove_db(db_path)
+        remove_db(db_path_2)
+        try:
+            bc, connection = await open_blockchain(db_path, db_path)
+            for block in blocks:
+                await bc.receive_block(block)
+            await close_blockchain(bc, connection)
+
+            # A shorter chain that forks at height 290, with the map saved for the longer chain
+            fork_blocks = bt.get_consecutive_blocks(20, blocks[:290], seed=b"height map fork")
+            bc, connection = await open_blockchain(db_path_2, None)
+            for block in fork_blocks:
+                await bc.receive_block(block)
+            await close_blockchain(bc, connection)
+            for path, path_2 in zip(map_files(db_path), map_files(db_path_2)):
+                path_2.write_bytes(path.read_bytes())
+
+            bc, connection = await open_blockchain(db_path_2, db_path_2)
+            await assert_chain(bc, fork_blocks)
+            await close_blockchain(bc, connection)
+            assert map_files(db_path_2)[0].stat().st_size == len(fork_blocks) * 32
+        finally:
+            remove_db(db_path)
+            remove_db(db_path_2)
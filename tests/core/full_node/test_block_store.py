@@ -55,10 +55,26 @@ class TestBlockStore:
                 await store.add_full_block(block.header_hash, block, block_record)
                 assert block == await store.get_full_block(block.header_hash)
                 assert block == await store.get_full_block(block.header_hash)
+                view = await store.get_full_block_view(block.header_hash)
+                assert view is not None and view.to_full_block() == block
                 assert block_record == (await store.get_block_record(block_record_hh))
                 await store.set_peak(block_record.header_hash)
                 await store.set_peak(block_record.header_hash)
 
+            # Views of blocks which are not in the cache are lazily parsed from the database
+            for block in blocks:
+                store.rollback_cache_block(block.header_hash)
+                view = await store.get_full_block_view(block.header_hash)
+                assert view is not None
+                assert view.header_hash == block.header_hash
+                assert view.foliage_transaction_block == block.foliage_transaction_block
+                assert view.transactions_generator == block.transactions_generator
+                assert view.transactions_generator_ref_list == block.transactions_generator_ref_list
+                assert view.challenge_chain_ip_proof == block.challenge_chain_ip_proof
+                assert bytes(view) == bytes(block)
+                assert view.to_full_block() == block
+            assert await store.get_full_block_view(bytes([0] * 32)) is None
+
             assert len(await store.get_full_blocks_at([1])) == 1
             assert len(await store.get_full_blocks_at([0])) == 1
             assert len(await store.get_full_blocks_at([100])) == 0
@@ -124,3 +140,53 @@ class TestBlockStore:
         await connection_2.close()
         db_filename.unlink()
         db_filename_2.unlink()
+
+    @pytest.mark.asyncio
+    async def test_read_pool(self):
+        blocks = bt.get_consecutive_blocks(10)
+        db_filename = Path("blockchain_test.db")
+        db_filename_2 = Path("blockchain_test2.db")
+
+        if db_filename.exists():
+            db_filename.unlink()
+        if db_filename_2.exists():
+            db_filename_2.unlink()
+
+        connection = await aiosqlite.connect(db_filename)
+        connection_2 = await aiosqlite.connect(db_filename_2)
+        wrapper = DBWrapper(connection)
+        wrapper_2 = DBWrapper(connection_2)
+
+        store = await BlockStore.create(wrapper)
+        coin_store_2 = await CoinStore.create(wrapper_2)
+        store_2 = await BlockStore.create(wrapper_2)
+        bc = await Blockchain.create(coin_store_2, store_2, test_constants)
+        await wrapper.open_read_pool(db_filename, 2)
+        try:
+            block_records = []
+            for block in blocks:
+                await bc.receive_block(block)
+                block_records.append(bc.block_record(block.header_hash))
+
+            await wrapper.begin_transaction()
+            for block, block_record in zip(blocks, block_records):
+                await store.add_full_block(block.header_hash, block, block_record)
+
+            # The task that owns the transaction reads its own writes, other tasks only see committed blocks.
+            # Block records are not cached, so these go to the database.
+            assert await store.get_block_record(blocks[0].header_hash) == block_records[0]
+            assert await asyncio.create_task(store.get_block_record(blocks[0].header_hash)) is None
+            await wrapper.commit_transaction()
+
+            results = await asyncio.gather(*[store.get_block_record(block.header_hash) for block in blocks])
+            assert results == block_records
+            metrics = wrapper.get_read_pool_metrics()
+            assert metrics["size"] == 2
+            assert metrics["available"] == 2
+            assert sum(c["uses"] for c in metrics["connections"]) == len(blocks) + 1
+        finally:
+            await wrapper.close_read_pool()
+            await connection.close()
+            await connection_2.close()
+            db_filename.unlink()
+            db_filename_2.unlink()
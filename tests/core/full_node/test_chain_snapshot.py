@@ -0,0 +1,64 @@
+# flake8: noqa: F811, F401
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from chia.full_node.chain_snapshot import read_chain_snapshot
+from tests.core.fixtures import default_400_blocks  # noqa: F401
+from tests.core.full_node.test_block_height_map import close_blockchain, open_blockchain, remove_db
+from tests.setup_nodes import test_constants
+
+
+@pytest.fixture(scope="module")
+def event_loop():
+    loop = asyncio.get_event_loop()
+    yield loop
+
+
+class TestChainSnapshot:
+    @pytest.mark.asyncio
+    async def test_chain_snapshot(self, default_400_blocks):
+        blocks = default_400_blocks
+        db_path = Path("blockchain_snapshot_test.db")
+        snapshot_path = db_path.with_name(f"{db_path.stem}-chain-snapshot")
+        remove_db(db_path)
+        try:
+            bc, connection = await open_blockchain(db_path, db_path)
+            for block in blocks[:-1]:
+                await bc.receive_block(block)
+            await close_blockchain(bc, connection)
+            snapshot = read_chain_snapshot(snapshot_path)
+            assert snapshot is not None and snapshot.peak_hash == blocks[-2].header_hash
+
+            # The snapshot matches the database, its block records are used
+            bc, connection = await open_blockchain(db_path, None)
+            expected_records = await bc.block_store.get_block_records_in_range(
+                blocks[-2].height - test_constants.BLOCKS_CACHE_SIZE, blocks[-2].height
+            )
+            await close_blockchain(bc, connection)
+            assert {record.header_hash: record for record in snapshot.block_records} == expected_records
+            bc, connection = await open_blockchain(db_path, db_path)
+            assert bc.get_peak().header_hash == blocks[-2].header_hash
+            for record in expected_records.values():
+                assert bc.block_record(record.header_hash) == record
+
+            # A block added after the snapshot, without a clean shut down
+            bc._last_snapshot_time = 0
+            await bc.receive_block(blocks[-1])
+            snapshot = read_chain_snapshot(snapshot_path)
+            assert snapshot is not None and snapshot.peak_hash == blocks[-1].header_hash
+            bc.pre_validation_context.shut_down()
+            await connection.close()
+
+            # A corrupted snapshot is not used
+            data = bytearray(snapshot_path.read_bytes())
+            data[-1] ^= 1
+            snapshot_path.write_bytes(bytes(data))
+            assert read_chain_snapshot(snapshot_path) is None
+            bc, connection = await open_blockchain(db_path, db_path)
+            assert bc.get_peak().header_hash == blocks[-1].header_hash
+            await close_blockchain(bc, connection)
+            assert read_chain_snapshot(snapshot_path) is not None
+        finally:
+            remove_db(db_path)
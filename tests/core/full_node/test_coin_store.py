@@ -54,6 +54,33 @@ def get_future_reward_coins(block: FullBlock) -> Tuple[Coin, Coin]:
     return pool_coin, farmer_coin
 
 
+async def create_legacy_coin_table(connection: aiosqlite.Connection, blocks: List[FullBlock]) -> List[Coin]:
+    await connection.execute(
+        "CREATE TABLE coin_record(coin_name text PRIMARY KEY, confirmed_index bigint, spent_index bigint,"
+        " spent int, coinbase int, puzzle_hash text, coin_parent text, amount blob, timestamp bigint)"
+    )
+    legacy_coins: List[Coin] = []
+    for block in blocks:
+        for coin in block.get_included_reward_coins():
+            legacy_coins.append(coin)
+            await connection.execute(
+                "INSERT INTO coin_record VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    coin.name().hex(),
+                    block.height,
+                    0,
+                    0,
+                    1,
+                    coin.puzzle_hash.hex(),
+                    coin.parent_coin_info.hex(),
+                    bytes(coin.amount),
+                    block.foliage_transaction_block.timestamp,
+                ),
+            )
+    await connection.commit()
+    return legacy_coins
+
+
 class TestCoinStore:
     @pytest.mark.asyncio
     async def test_basic_coin_store(self):
@@ -171,6 +198,90 @@ class TestCoinStore:
             await connection.close()
             Path("fndb_test.db").unlink()
 
+    @pytest.mark.asyncio
+    async def test_new_blocks_batch(self):
+        blocks = bt.get_consecutive_blocks(20)
+        tx_blocks = [block for block in blocks if block.is_transaction_block()]
+
+        for cache_size in [0, 10, 100000]:
+            db_path = Path("fndb_test.db")
+            if db_path.exists():
+                db_path.unlink()
+            connection = await aiosqlite.connect(db_path)
+            db_wrapper = DBWrapper(connection)
+            coin_store = await CoinStore.create(db_wrapper, cache_size=uint32(cache_size))
+
+            # Each block spends the reward coins of the previous one, both across and within batches
+            changes = []
+            prev_coins: List[Coin] = []
+            for block in tx_blocks:
+                changes.append((block, [], [coin.name() for coin in prev_coins]))
+                prev_coins = list(block.get_included_reward_coins())
+            for i in range(0, len(changes), 3):
+                batch = changes[i : i + 3]
+                await coin_store.new_blocks(batch)
+                for block, _, removals in batch:
+                    for name in removals:
+                        record = await coin_store.get_coin_record(name)
+                        assert record is not None and record.spent
+                        assert record.spent_block_index == block.height
+
+            with pytest.raises(Exception):
+                await coin_store.new_blocks([changes[-1]])
+
+            for prev_block, block in zip(tx_blocks[:-1], tx_blocks[1:]):
+                removed = await coin_store.get_coins_removed_at_height(block.height)
+                assert set(r.coin for r in removed) == prev_block.get_included_reward_coins()
+            added_in_range = await coin_store.get_coins_added_in_range(uint32(0), tx_blocks[-1].height)
+            removed_in_range = await coin_store.get_coins_removed_in_range(uint32(0), tx_blocks[-1].height)
+            for block in tx_blocks:
+                added = await coin_store.get_coins_added_at_height(block.height)
+                assert set(added_in_range[block.height]) == set(added)
+                assert set(removed_in_range.get(block.height, [])) == set(
+                    await coin_store.get_coins_removed_at_height(block.height)
+                )
+            for coin in tx_blocks[-1].get_included_reward_coins():
+                record = await coin_store.get_coin_record(coin.name())
+                assert record is not None
+                assert not record.spent
+
+            await connection.close()
+            Path("fndb_test.db").unlink()
+
+    @pytest.mark.asyncio
+    async def test_read_pool_during_new_blocks(self):
+        blocks = bt.get_consecutive_blocks(20)
+        tx_blocks = [block for block in blocks if block.is_transaction_block()]
+        db_path = Path("fndb_test.db")
+        if db_path.exists():
+            db_path.unlink()
+        connection = await aiosqlite.connect(db_path)
+        db_wrapper = DBWrapper(connection)
+        coin_store = await CoinStore.create(db_wrapper, cache_size=uint32(100000))
+        await db_wrapper.open_read_pool(db_path, 2)
+        try:
+            await db_wrapper.begin_transaction()
+            await coin_store.new_blocks([(tx_blocks[0], [], [])])
+            await db_wrapper.commit_transaction()
+            coin_name = next(iter(tx_blocks[0].get_included_reward_coins())).name()
+
+            await db_wrapper.begin_transaction()
+            await coin_store.new_blocks([(tx_blocks[1], [], [coin_name])])
+            # Evicted, as it can be from a full cache, so another task reads the committed, unspent record
+            coin_store.coin_record_cache.remove(coin_name)
+            record = await asyncio.create_task(coin_store.get_coin_record(coin_name))
+            assert record is not None and not record.spent
+            await db_wrapper.commit_transaction()
+
+            # The unspent record read during the transaction was not cached
+            record = await coin_store.get_coin_record(coin_name)
+            assert record is not None and record.spent
+            assert record.spent_block_index == tx_blocks[1].height
+        finally:
+            await db_wrapper.close_read_pool()
+            await connection.close()
+            db_path.unlink()
+
     @pytest.mark.asyncio
     async def test_rollback(self):
         blocks = bt.get_consecutive_blocks(20)
@@ -323,3 +434,89 @@ class TestCoinStore:
             await connection.close()
             Path("blockchain_test.db").unlink()
             b.shut_down()
+
+    @pytest.mark.asyncio
+    async def test_migrate_legacy_records(self):
+        blocks = bt.get_consecutive_blocks(10, guarantee_transaction_block=True)
+        db_path = Path("fndb_test.db")
+        if db_path.exists():
+            db_path.unlink()
+        connection = await aiosqlite.connect(db_path)
+        legacy_coins = await create_legacy_coin_table(connection, blocks)
+
+        db_wrapper = DBWrapper(connection)
+        coin_store = await CoinStore.create(db_wrapper, cache_size=uint32(0))
+        assert coin_store.migrating
+
+        # Legacy coins are readable and spendable before they are migrated
+        for coin in legacy_coins:
+            record = await coin_store.get_coin_record(coin.name())
+            assert record is not None
+            assert record.coin == coin
+            assert record.coinbase
+        await coin_store._set_spent(legacy_coins[0].name(), uint32(20))
+        unspent = await coin_store.get_coin_records_by_puzzle_hash(False, legacy_coins[0].puzzle_hash)
+        assert legacy_coins[0] not in [r.coin for r in unspent]
+
+        # A read that started before a migration batch committed is not cached
+        generation = db_wrapper.cache_generation()
+        migrated = await coin_store.migrate_legacy_records(batch_size=3)
+        assert not db_wrapper.can_cache(generation)
+        assert migrated == len(legacy_coins) - 1
+        assert not coin_store.migrating
+        cursor = await connection.execute("SELECT name from sqlite_master WHERE type='table' AND name='coin_record'")
+        assert (await cursor.fetchone()) is None
+        await cursor.close()
+
+        for coin in legacy_coins:
+            record = await coin_store.get_coin_record(coin.name())
+            assert record is not None
+            assert record.coin == coin
+            assert record.spent == (coin == legacy_coins[0])
+        removed = await coin_store.get_coins_removed_at_height(uint32(20))
+        assert [r.coin for r in removed] == [legacy_coins[0]]
+
+        await connection.close()
+        Path("fndb_test.db").unlink()
+
+    @pytest.mark.asyncio
+    async def test_read_during_migration(self):
+        blocks = bt.get_consecutive_blocks(10, guarantee_transaction_block=True)
+        db_path = Path("fndb_test.db")
+        # The migration finishes right after a read's statement, or between the read checking migrating and its
+        # statement, when the legacy table is already dropped
+        for migrate_before_statement in [False, True]:
+            if db_path.exists():
+                db_path.unlink()
+            connection = await aiosqlite.connect(db_path)
+            legacy_coins = await create_legacy_coin_table(connection, blocks)
+            db_wrapper = DBWrapper(connection)
+            coin_store = await CoinStore.create(db_wrapper, cache_size=uint32(0))
+            await db_wrapper.open_read_pool(db_path, 1)
+            read_connection = db_wrapper.read_connections[0]
+            execute = read_connection.execute
+            interleaved = False
+
+            async def execute_during_migration(*args):
+                nonlocal interleaved
+                if interleaved:
+                    return await execute(*args)
+                interleaved = True
+                if migrate_before_statement:
+                    await coin_store.migrate_legacy_records()
+                    return await execute(*args)
+                cursor = await execute(*args)
+                await coin_store.migrate_legacy_records()
+                return cursor
+
+            read_connection.execute = execute_during_migration  # type: ignore
+            try:
+                assert coin_store.migrating
+                record = await coin_store.get_coin_record(legacy_coins[-1].name())
+                assert interleaved and not coin_store.migrating
+                assert record is not None
+                assert record.coin == legacy_coins[-1]
+            finally:
+                await db_wrapper.close_read_pool()
+                await connection.close()
+                db_path.unlink()
@@ -13,6 +13,7 @@ from chia.types.blockchain_format.coin import Coin
 from chia.types.coin_solution import CoinSolution
 from chia.types.condition_opcodes import ConditionOpcode
 from chia.types.condition_with_args import ConditionWithArgs
+from chia.types.mempool_inclusion_status import MempoolInclusionStatus
 from chia.types.spend_bundle import SpendBundle
 from chia.util.clvm import int_to_bytes
 from chia.util.condition_tools import conditions_for_solution
@@ -294,6 +295,168 @@ class TestMempoolManager:
 
         assert sb1 is None
 
+    @pytest.mark.asyncio
+    async def test_new_peak_updates_mempool(self, two_nodes):
+        reward_ph = WALLET_A.get_new_puzzlehash()
+        full_node_1, full_node_2, server_1, server_2 = two_nodes
+        blocks = await full_node_1.get_all_full_blocks()
+        start_height = blocks[-1].height
+        blocks = bt.get_consecutive_blocks(
+            3,
+            block_list_input=blocks,
+            guarantee_transaction_block=True,
+            farmer_reward_puzzle_hash=reward_ph,
+            pool_reward_puzzle_hash=reward_ph,
+        )
+        peer = await connect_and_get_peer(server_1, server_2)
+
+        for block in blocks:
+            await full_node_1.full_node.respond_block(full_node_protocol.RespondBlock(block))
+        await time_out_assert(60, node_height_at_least, True, full_node_1, start_height + 3)
+
+        coins = list(blocks[-1].get_included_reward_coins())
+        spend_bundle1 = await self.gen_and_send_sb(full_node_1, peer, coins[0])
+        spend_bundle2 = await self.gen_and_send_sb(full_node_1, peer, coins[1])
+        cvp = ConditionWithArgs(
+            ConditionOpcode.ASSERT_HEIGHT_ABSOLUTE,
+            [uint64(start_height + 5).to_bytes(4, "big")],
+        )
+        dic = {ConditionOpcode.ASSERT_HEIGHT_ABSOLUTE: [cvp]}
+        height_locked = await self.gen_and_send_sb(
+            full_node_1, peer, list(blocks[-2].get_included_reward_coins())[0], dic
+        )
+        self.assert_sb_in_pool(full_node_1, spend_bundle1)
+        self.assert_sb_in_pool(full_node_1, spend_bundle2)
+        self.assert_sb_not_in_pool(full_node_1, height_locked)
+        assert height_locked.name() in full_node_1.full_node.mempool_manager.potential_txs
+
+        # The confirmed bundle is evicted, the other one is kept, and the height locked one gets in once it can
+        blocks = bt.get_consecutive_blocks(
+            2,
+            block_list_input=blocks,
+            guarantee_transaction_block=True,
+            farmer_reward_puzzle_hash=reward_ph,
+            pool_reward_puzzle_hash=reward_ph,
+            transaction_data=spend_bundle1,
+        )
+        for block in blocks[-2:]:
+            await full_node_1.full_node.respond_block(full_node_protocol.RespondBlock(block))
+        await time_out_assert(60, node_height_at_least, True, full_node_1, start_height + 5)
+
+        self.assert_sb_not_in_pool(full_node_1, spend_bundle1)
+        self.assert_sb_in_pool(full_node_1, spend_bundle2)
+        self.assert_sb_in_pool(full_node_1, height_locked)
+        assert height_locked.name() not in full_node_1.full_node.mempool_manager.potential_txs
+
+    @pytest.mark.asyncio
+    async def test_transaction_flood_throughput(self, two_nodes):
+        reward_ph = WALLET_A.get_new_puzzlehash()
+        full_node_1, full_node_2, server_1, server_2 = two_nodes
+        blocks = await full_node_1.get_all_full_blocks()
+        start_height = blocks[-1].height
+        blocks = bt.get_consecutive_blocks(
+            3,
+            block_list_input=blocks,
+            guarantee_transaction_block=True,
+            farmer_reward_puzzle_hash=reward_ph,
+            pool_reward_puzzle_hash=reward_ph,
+        )
+        peer = await connect_and_get_peer(server_1, server_2)
+        for block in blocks:
+            await full_node_1.full_node.respond_block(full_node_protocol.RespondBlock(block))
+        await time_out_assert(60, node_height_at_least, True, full_node_1, start_height + 3)
+
+        # Splits a reward coin into many coins, which are then all spent at once
+        tx_count = 100
+        amounts = [2000 + i for i in range(tx_count)]
+        outputs = [ConditionWithArgs(ConditionOpcode.CREATE_COIN, [reward_ph, int_to_bytes(a)]) for a in amounts]
+        split_coin = list(blocks[-1].get_included_reward_coins())[0]
+        split_bundle = generate_test_spend_bundle(
+            split_coin, {ConditionOpcode.CREATE_COIN: outputs}, new_puzzle_hash=reward_ph
+        )
+        blocks = bt.get_consecutive_blocks(
+            2,
+            block_list_input=blocks,
+            guarantee_transaction_block=True,
+            farmer_reward_puzzle_hash=reward_ph,
+            pool_reward_puzzle_hash=reward_ph,
+            transaction_data=split_bundle,
+        )
+        for block in blocks[-2:]:
+            await full_node_1.full_node.respond_block(full_node_protocol.RespondBlock(block))
+        await time_out_assert(60, node_height_at_least, True, full_node_1, start_height + 5)
+
+        spend_bundles = [
+            generate_test_spend_bundle(Coin(split_coin.name(), reward_ph, uint64(a)), amount=uint64(1)) for a in amounts
+        ]
+        conflicting = generate_test_spend_bundle(Coin(split_coin.name(), reward_ph, uint64(amounts[0])))
+
+        start = time()
+        await asyncio.gather(*[self.send_sb(full_node_1, peer, sb) for sb in spend_bundles + [conflicting]])
+        duration = time() - start
+        log.info(f"Added {tx_count} transactions in {duration}s, {tx_count / duration} tx/sec")
+
+        for sb in spend_bundles:
+            self.assert_sb_in_pool(full_node_1, sb)
+        self.assert_sb_not_in_pool(full_node_1, conflicting)
+        assert not full_node_1.full_node.mempool_manager.seen(conflicting.name())
+
+    @pytest.mark.asyncio
+    async def test_transaction_batch_errors(self, two_nodes):
+        reward_ph = WALLET_A.get_new_puzzlehash()
+        full_node_1, full_node_2, server_1, server_2 = two_nodes
+        blocks = await full_node_1.get_all_full_blocks()
+        start_height = blocks[-1].height
+        blocks = bt.get_consecutive_blocks(
+            3,
+            block_list_input=blocks,
+            guarantee_transaction_block=True,
+            farmer_reward_puzzle_hash=reward_ph,
+            pool_reward_puzzle_hash=reward_ph,
+        )
+        for block in blocks:
+            await full_node_1.full_node.respond_block(full_node_protocol.RespondBlock(block))
+        await time_out_assert(60, node_height_at_least, True, full_node_1, start_height + 3)
+
+        coins = [
+            coin for block in blocks[-3:] for coin in block.get_included_reward_coins() if coin.puzzle_hash == reward_ph
+        ]
+        cancelled, good, failing = [generate_test_spend_bundle(coin) for coin in coins[:3]]
+        full_node = full_node_1.full_node
+        mempool_manager = full_node.mempool_manager
+
+        # A waiter cancelled while its transaction is in a batch does not stop the following batches
+        task = asyncio.create_task(full_node.respond_transaction(cancelled, cancelled.name(), test=True))
+        await asyncio.sleep(0)
+        task.cancel()
+        await time_out_assert(10, lambda: full_node._tx_batch_task is None)
+
+        # A bundle that raises only fails its own transaction
+        add_spendbundle = mempool_manager.add_spendbundle
+
+        async def failing_add_spendbundle(new_spend, *args, **kwargs):
+            if new_spend.name() == failing.name():
+                raise ValueError("Failing bundle")
+            return await add_spendbundle(new_spend, *args, **kwargs)
+
+        mempool_manager.add_spendbundle = failing_add_spendbundle
+        try:
+            results = await asyncio.wait_for(
+                asyncio.gather(
+                    full_node.respond_transaction(good, good.name(), test=True),
+                    full_node.respond_transaction(failing, failing.name(), test=True),
+                    return_exceptions=True,
+                ),
+                10,
+            )
+        finally:
+            del mempool_manager.add_spendbundle
+        assert results[0] == (MempoolInclusionStatus.SUCCESS, None)
+        assert isinstance(results[1], ValueError)
+        self.assert_sb_in_pool(full_node_1, good)
+        self.assert_sb_not_in_pool(full_node_1, failing)
+        assert not mempool_manager.seen(failing.name())
+
     @pytest.mark.asyncio
     async def test_correct_block_index(self, two_nodes):
         reward_ph = WALLET_A.get_new_puzzlehash()
@@ -1,12 +1,17 @@
 # flake8: noqa: F811, F401
 
 import asyncio
+import random
 import time
+from dataclasses import dataclass
+from typing import List
 
 import pytest
 import logging
 
+from chia.full_node.mempool import Mempool
 from chia.protocols import full_node_protocol
+from chia.types.blockchain_format.coin import Coin
 from chia.types.peer_info import PeerInfo
 from chia.util.ints import uint16
 from chia.wallet.transaction_record import TransactionRecord
@@ -28,6 +33,32 @@ def wallet_height_at_least(wallet_node, h):
 log = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class SyntheticMempoolItem:
+    # Only what Mempool reads from a MempoolItem
+    name: int
+    fee: int
+    cost: int
+    additions: List[Coin]
+    removals: List[Coin]
+
+    @property
+    def fee_per_cost(self) -> float:
+        return self.fee / self.cost
+
+
+def min_fee_rate_by_scan(mempool: Mempool, cost: int) -> float:
+    if not mempool.at_full_capacity(cost):
+        return 0
+    current_cost = mempool.total_mempool_cost
+    for fee_per_cost, spends_with_fpc in mempool.sorted_spends.items():
+        for item in spends_with_fpc.values():
+            current_cost -= item.cost
+            if current_cost + cost <= mempool.max_size_in_cost:
+                return fee_per_cost
+    raise ValueError()
+
+
 @pytest.fixture(scope="session")
 def event_loop():
     loop = asyncio.get_event_loop()
@@ -77,3 +108,33 @@ class TestMempoolPerformance:
             start_t_2 = time.time()
             await full_node_api_1.full_node.respond_block(full_node_protocol.RespondBlock(block))
             assert time.time() - start_t_2 < 1
+
+    def test_mempool_fee_index_performance(self):
+        random.seed(0)
+        item_count = 5000
+        mempool = Mempool(item_count * 50)
+        items = [
+            SyntheticMempoolItem(i, random.randint(0, 10 ** 9), random.randint(1, 100), [], [])
+            for i in range(item_count)
+        ]
+        start = time.time()
+        for item in items:
+            mempool.add_to_pool(item, [], {})  # type: ignore
+        # Fills the mempool to max_size_in_cost, and then evicts the cheapest items for each new one
+        for i in range(item_count, item_count + 1000):
+            item = SyntheticMempoolItem(i, random.randint(0, 10 ** 9), 100, [], [])
+            mempool.add_to_pool(item, [], {})  # type: ignore
+        fill_time = time.time() - start
+        assert mempool.total_mempool_cost <= mempool.max_size_in_cost
+
+        costs = list(range(1000, mempool.max_size_in_cost, 1000)) + [1, 100, mempool.max_size_in_cost]
+        start = time.time()
+        fee_rates = [mempool.get_min_fee_rate(cost) for cost in costs]
+        query_time = time.time() - start
+        log.info(
+            f"Filled mempool with {item_count} items in {fill_time}s, {len(costs)} min fee queries in {query_time}s"
+        )
+        assert fill_time < 5
+        assert query_time < 1
+
+        assert fee_rates == [min_fee_rate_by_scan(mempool, cost) for cost in costs]
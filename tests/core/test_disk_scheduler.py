@@ -0,0 +1,83 @@
+import asyncio
+import threading
+from pathlib import Path
+
+import pytest
+
+from chia.harvester.disk_scheduler import FULL_PROOF_LOOKUP, QUALITY_LOOKUP, UNKNOWN_DEVICE, DiskScheduler
+
+
+@pytest.fixture(scope="module")
+def event_loop():
+    loop = asyncio.get_event_loop()
+    yield loop
+
+
+class TestDiskScheduler:
+    @pytest.mark.asyncio
+    async def test_quality_lookups_first(self, tmp_path: Path):
+        plot = tmp_path / "plot-1.plot"
+        plot.write_bytes(b"")
+        scheduler = DiskScheduler(1)
+        scheduler.update_plots({plot: plot.stat().st_dev})
+        started = threading.Event()
+        release = threading.Event()
+        order = []
+
+        def blocking(name: str) -> str:
+            started.set()
+            release.wait(5)
+            order.append(name)
+            return name
+
+        try:
+            first = asyncio.create_task(scheduler.run(plot, FULL_PROOF_LOOKUP, blocking, "first"))
+            while not started.is_set():
+                await asyncio.sleep(0.01)
+            # The only thread of the lane is busy, so both of these wait in the queue
+            proof = asyncio.create_task(scheduler.run(plot, FULL_PROOF_LOOKUP, blocking, "proof"))
+            quality = asyncio.create_task(scheduler.run(plot, QUALITY_LOOKUP, blocking, "quality"))
+            await asyncio.sleep(0.05)
+            release.set()
+            assert await asyncio.gather(first, proof, quality) == ["first", "proof", "quality"]
+            assert order == ["first", "quality", "proof"]
+
+            stats = scheduler.get_stats()
+            assert len(stats) == 1
+            assert stats[0]["device"] == plot.stat().st_dev
+            assert stats[0]["plots"] == 1
+            assert stats[0]["latency"]["qualities"]["count"] == 1
+            assert stats[0]["latency"]["full_proof"]["count"] == 2
+        finally:
+            release.set()
+            scheduler.close()
+
+    @pytest.mark.asyncio
+    async def test_errors_and_removed_plots(self, tmp_path: Path):
+        plots = [tmp_path / f"plot-{i}.plot" for i in range(3)]
+        for plot in plots:
+            plot.write_bytes(b"")
+        scheduler = DiskScheduler(2)
+        scheduler.update_plots({plot: plot.stat().st_dev for plot in plots})
+
+        def fail() -> None:
+            raise ValueError("bad plot")
+
+        try:
+            with pytest.raises(ValueError):
+                await scheduler.run(plots[0], QUALITY_LOOKUP, fail)
+            assert await asyncio.gather(*[scheduler.run(p, QUALITY_LOOKUP, str, p) for p in plots]) == [
+                str(p) for p in plots
+            ]
+            # All the plots are in the same directory, so on the same device
+            assert len(scheduler.lanes) == 1
+            assert scheduler.get_stats()[0]["plots"] == 3
+            scheduler.update_plots({plot: plot.stat().st_dev for plot in plots[1:]})
+            assert scheduler.get_stats()[0]["plots"] == 2
+            # A plot with no known device is not looked at, its lookups run on a shared lane
+            assert await scheduler.run(tmp_path / "missing.plot", QUALITY_LOOKUP, str, "missing") == "missing"
+            assert UNKNOWN_DEVICE in scheduler.lanes
+        finally:
+            scheduler.close()
+        with pytest.raises(RuntimeError):
+            await scheduler.run(plots[1], QUALITY_LOOKUP, str, "closed")
@@ -180,6 +180,13 @@ class TestRpc:
             await client_2.remove_plot_directory(str(plot_dir))
             assert len(await client_2.get_plot_directories()) == 2
 
+            # No signage point was received, so no disk was used for lookups yet
+            assert await client_2.get_disk_stats() == []
+
+            # Each refresh polls the plot directories
+            refresh_stats = await client_2.get_plot_refresh_stats()
+            assert refresh_stats["polls"] > 0
+
             targets_1 = await client.get_reward_targets(False)
             assert "have_pool_sk" not in targets_1
             assert "have_farmer_sk" not in targets_1
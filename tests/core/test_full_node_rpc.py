@@ -101,6 +101,17 @@ class TestRpc:
 
             assert (await client.get_block_record_by_height(100)) is None
 
+            cache_stats = (await client.get_cache_stats())["caches"]
+            assert cache_stats["block_cache"]["entries"] > 0
+            assert cache_stats["block_cache"]["size"] > 0
+            assert "evictions" in cache_stats["coin_record_cache"]
+            assert 0 <= cache_stats["verified_vdf_cache"]["hit_rate"] <= 1
+
+            pre_validation_stats = (await client.get_pre_validation_stats())["pre_validation"]
+            assert 1 <= pre_validation_stats["active_workers"] <= pre_validation_stats["max_workers"]
+            assert sum(worker["blocks"] for worker in pre_validation_stats["workers"].values()) > 0
+            assert sum(worker["vdf_cache_misses"] for worker in pre_validation_stats["workers"].values()) > 0
+
             ph = list(blocks[-1].get_included_reward_coins())[0].puzzle_hash
             coins = await client.get_coin_records_by_puzzle_hash(ph)
             print(coins)
@@ -0,0 +1,67 @@
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import List, Optional
+
+from chia.plotting.plot_cache import PlotCache
+from chia.plotting.plot_tools import load_plots
+from chia.wallet.derive_keys import master_sk_to_farmer_sk
+from tests.setup_nodes import bt
+
+log = logging.getLogger(__name__)
+
+
+def timed_load(plot_cache: PlotCache, filenames: Optional[List[Path]] = None):
+    farmer_pubkeys = [master_sk_to_farmer_sk(sk).get_g1() for sk in bt.all_sks]
+    start = time.time()
+    _, provers, _, _ = load_plots(
+        {}, {}, farmer_pubkeys, bt.pool_pubkeys, None, False, bt.root_path, plot_cache=plot_cache, filenames=filenames
+    )
+    return provers, time.time() - start
+
+
+class TestPlotCache:
+    def test_plot_cache(self, tmp_path):
+        cache_path = tmp_path / "plot_cache.dat"
+        plot_cache = PlotCache(cache_path)
+        plot_cache.load()
+        cold, cold_time = timed_load(plot_cache)
+        assert len(cold) > 0
+        assert plot_cache.hits == 0 and plot_cache.misses == len(cold)
+        assert cache_path.exists()
+
+        plot_cache = PlotCache(cache_path)
+        plot_cache.load()
+        warm, warm_time = timed_load(plot_cache)
+        log.info(f"Loaded {len(cold)} plots in {cold_time:.3f}s cold and {warm_time:.3f}s from the plot cache")
+        assert plot_cache.hits == len(cold) and plot_cache.misses == 0
+        assert warm.keys() == cold.keys()
+        for filename, plot_info in warm.items():
+            assert plot_info.prover.get_id() == cold[filename].prover.get_id()
+            assert plot_info.pool_public_key == cold[filename].pool_public_key
+            assert plot_info.pool_contract_puzzle_hash == cold[filename].pool_contract_puzzle_hash
+            assert plot_info.farmer_public_key == cold[filename].farmer_public_key
+            assert plot_info.plot_public_key == cold[filename].plot_public_key
+
+        # A plot that was modified is read again, a copy is modified to leave the shared test plots alone
+        original = next(iter(cold.keys()))
+        filename = tmp_path / original.name
+        shutil.copyfile(original, filename)
+        timed_load(plot_cache, [filename])
+        plot_cache = PlotCache(cache_path)
+        plot_cache.load()
+        timed_load(plot_cache, [filename])
+        assert plot_cache.hits == 1 and plot_cache.misses == 0
+        stat_info = filename.stat()
+        os.utime(filename, ns=(stat_info.st_atime_ns, stat_info.st_mtime_ns + 1000))
+        plot_cache = PlotCache(cache_path)
+        plot_cache.load()
+        again, _ = timed_load(plot_cache, [filename])
+        assert plot_cache.hits == 0 and plot_cache.misses == 1
+        assert again[filename].plot_public_key == cold[original].plot_public_key
+
+        # Entries of plots that are gone are dropped
+        plot_cache.remove_missing([filename])
+        assert list(plot_cache.entries.keys()) == [str(filename)]
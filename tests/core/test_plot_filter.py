@@ -0,0 +1,73 @@
+import logging
+import random
+import time
+import unittest
+from pathlib import Path
+
+from chia.consensus.default_constants import DEFAULT_CONSTANTS
+from chia.harvester.plot_filter import PlotFilterIndex, plots_passing_filter
+from chia.types.blockchain_format.proof_of_space import ProofOfSpace
+from chia.types.blockchain_format.sized_bytes import bytes32
+
+log = logging.getLogger(__name__)
+
+
+def random_bytes32(rng: random.Random) -> bytes32:
+    return bytes32(rng.getrandbits(256).to_bytes(32, "big"))
+
+
+class FakeProver:
+    def __init__(self, plot_id: bytes32):
+        self.plot_id = plot_id
+
+    def get_id(self) -> bytes32:
+        return self.plot_id
+
+
+class FakePlotInfo:
+    def __init__(self, plot_id: bytes32):
+        self.prover = FakeProver(plot_id)
+
+
+class TestPlotFilter(unittest.TestCase):
+    def test_same_as_passes_plot_filter(self):
+        rng = random.Random(0)
+        plot_ids = [random_bytes32(rng) for _ in range(2000)]
+        for zero_bits in [0, 1, 3, 8, 9, 16]:
+            constants = DEFAULT_CONSTANTS.replace(NUMBER_ZERO_BITS_PLOT_FILTER=zero_bits)
+            challenge_hash, sp_hash = random_bytes32(rng), random_bytes32(rng)
+            expected = [
+                i
+                for i, plot_id in enumerate(plot_ids)
+                if ProofOfSpace.passes_plot_filter(constants, plot_id, challenge_hash, sp_hash)
+            ]
+            assert plots_passing_filter(b"".join(plot_ids), zero_bits, challenge_hash, sp_hash) == expected
+
+    def test_plot_filter_index(self):
+        rng = random.Random(1)
+        provers = {Path(f"plot-{i}.plot"): FakePlotInfo(random_bytes32(rng)) for i in range(1000)}
+        index = PlotFilterIndex(provers)  # type: ignore
+        assert len(index) == 1000
+        challenge_hash, sp_hash = random_bytes32(rng), random_bytes32(rng)
+        expected = [
+            path
+            for path, plot_info in provers.items()
+            if ProofOfSpace.passes_plot_filter(DEFAULT_CONSTANTS, plot_info.prover.get_id(), challenge_hash, sp_hash)
+        ]
+        assert len(expected) > 0
+        assert index.passing_plots(DEFAULT_CONSTANTS.NUMBER_ZERO_BITS_PLOT_FILTER, challenge_hash, sp_hash) == expected
+        assert len(PlotFilterIndex({})) == 0
+
+    def test_plot_filter_performance(self):
+        rng = random.Random(2)
+        for count in [1000, 10000, 100000]:
+            plot_ids = b"".join(random_bytes32(rng) for _ in range(count))
+            challenge_hash, sp_hash = random_bytes32(rng), random_bytes32(rng)
+            start = time.time()
+            passing = plots_passing_filter(
+                plot_ids, DEFAULT_CONSTANTS.NUMBER_ZERO_BITS_PLOT_FILTER, challenge_hash, sp_hash
+            )
+            duration = time.time() - start
+            log.info(f"Plot filter of {count} plots took {duration:.4f}s, {len(passing)} passed")
+            # Well below the 5 seconds a harvester has to answer a signage point
+            assert duration < count / 20000
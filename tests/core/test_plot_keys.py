@@ -0,0 +1,70 @@
+import logging
+import time
+
+from blspy import AugSchemeMPL, G1Element, PrivateKey
+
+from chia.plotting.plot_tools import PlotInfo, get_plot_local_sk, parse_plot_info, stream_plot_info_pk
+from chia.types.blockchain_format.proof_of_space import ProofOfSpace
+from chia.wallet.derive_keys import master_sk_to_local_sk
+
+log = logging.getLogger(__name__)
+
+
+class FakeProver:
+    def __init__(self, memo: bytes):
+        self.memo = memo
+        self.memo_reads = 0
+
+    def get_memo(self) -> bytes:
+        self.memo_reads += 1
+        return self.memo
+
+
+def derive_keys(prover: FakeProver):
+    # What the harvester did for each proof and signature request before the keys were kept in PlotInfo
+    _, farmer_public_key, local_master_sk = parse_plot_info(prover.get_memo())
+    local_sk = master_sk_to_local_sk(local_master_sk)
+    return local_sk, ProofOfSpace.generate_plot_public_key(local_sk.get_g1(), farmer_public_key)
+
+
+def make_plot_info() -> PlotInfo:
+    pool_public_key: G1Element = AugSchemeMPL.key_gen(bytes([1] * 32)).get_g1()
+    farmer_public_key: G1Element = AugSchemeMPL.key_gen(bytes([2] * 32)).get_g1()
+    local_master_sk: PrivateKey = AugSchemeMPL.key_gen(bytes([3] * 32))
+    prover = FakeProver(stream_plot_info_pk(pool_public_key, farmer_public_key, local_master_sk))
+    plot_public_key = ProofOfSpace.generate_plot_public_key(
+        master_sk_to_local_sk(local_master_sk).get_g1(), farmer_public_key
+    )
+    return PlotInfo(prover, pool_public_key, None, farmer_public_key, plot_public_key, 0, 0, 0)  # type: ignore
+
+
+class TestPlotKeys:
+    def test_local_sk_derived_once(self):
+        plot_info = make_plot_info()
+        local_sk, plot_public_key = derive_keys(plot_info.prover)
+        assert plot_info.local_sk is None
+        assert get_plot_local_sk(plot_info) == local_sk
+        assert get_plot_local_sk(plot_info) == local_sk
+        assert plot_info.prover.memo_reads == 2
+        assert plot_info.plot_public_key == plot_public_key
+        assert str(local_sk) not in repr(plot_info)
+
+    def test_signature_latency(self):
+        plot_info = make_plot_info()
+        message = bytes([4] * 32)
+        count = 50
+
+        start = time.time()
+        for _ in range(count):
+            local_sk, plot_public_key = derive_keys(plot_info.prover)
+            derived_signature = AugSchemeMPL.sign(local_sk, message, plot_public_key)
+        derived_time = (time.time() - start) / count
+
+        start = time.time()
+        for _ in range(count):
+            cached_signature = AugSchemeMPL.sign(get_plot_local_sk(plot_info), message, plot_info.plot_public_key)
+        cached_time = (time.time() - start) / count
+
+        assert cached_signature == derived_signature
+        log.info(f"Signature with derived keys {derived_time * 1000:.3f}ms, with kept keys {cached_time * 1000:.3f}ms")
+        assert cached_time < derived_time
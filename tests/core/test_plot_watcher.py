@@ -0,0 +1,88 @@
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+from chia.harvester.plot_watcher import InotifyWaker, PlotDirectoryWatcher
+
+
+@pytest.fixture(scope="function")
+def plot_dirs():
+    root = Path(tempfile.mkdtemp())
+    dirs = [root / "a", root / "b"]
+    for directory in dirs:
+        directory.mkdir()
+    yield dirs
+    shutil.rmtree(root)
+
+
+class TestPlotWatcher:
+    def test_poll(self, plot_dirs):
+        dir_a, dir_b = plot_dirs
+        (dir_a / "1.plot").write_bytes(b"1")
+        (dir_a / "._1.plot").write_bytes(b"1")
+        (dir_a / "notes.txt").write_bytes(b"1")
+        (dir_a / "sub.plot").mkdir()
+        (dir_b / "2.plot").write_bytes(b"2")
+        watcher = PlotDirectoryWatcher()
+
+        changes = watcher.poll(plot_dirs)
+        assert sorted(changes.added) == [dir_a / "1.plot", dir_b / "2.plot"]
+        assert changes.removed == [] and changes.modified == []
+        assert set(changes.seen_time.keys()) == set(changes.added)
+        assert not watcher.poll(plot_dirs)
+
+        (dir_a / "1.plot").write_bytes(b"11")
+        stat_info = (dir_b / "2.plot").stat()
+        os.utime(dir_b / "2.plot", ns=(stat_info.st_atime_ns, stat_info.st_mtime_ns + 1000))
+        (dir_b / "2.plot").rename(dir_b / "3.plot")
+        changes = watcher.poll(plot_dirs)
+        assert changes.added == [dir_b / "3.plot"]
+        assert changes.removed == [dir_b / "2.plot"]
+        assert changes.modified == [dir_a / "1.plot"]
+
+        # The plots of a directory that can not be read are kept, the plots of a directory no longer polled are not
+        shutil.rmtree(dir_a)
+        changes = watcher.poll(plot_dirs)
+        assert not changes
+        assert dir_a / "1.plot" in watcher.files
+        changes = watcher.poll([dir_b])
+        assert changes.removed == [dir_a / "1.plot"]
+
+    def test_poll_performance(self, plot_dirs):
+        for i in range(10000):
+            (plot_dirs[i % 2] / f"{i}.plot").touch()
+        watcher = PlotDirectoryWatcher()
+        assert len(watcher.poll(plot_dirs).added) == 10000
+        start, start_cpu = time.time(), time.thread_time()
+        assert not watcher.poll(plot_dirs)
+        # A poll stats each plot once, and opens none of them
+        assert time.thread_time() - start_cpu < 1
+        assert time.time() - start < 5
+
+    @pytest.mark.asyncio
+    @pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is only on Linux")
+    async def test_inotify(self, plot_dirs):
+        event = asyncio.Event()
+        waker = InotifyWaker(event)
+        assert waker.enabled
+        waker.set_directories(plot_dirs)
+        (plot_dirs[0] / "1.plot").write_bytes(b"1")
+        await asyncio.wait_for(event.wait(), 5)
+
+        # Removing a watch is an event too, a spurious wake up only costs a poll
+        waker.set_directories(plot_dirs[1:])
+        await asyncio.sleep(0.2)
+        event.clear()
+        (plot_dirs[0] / "2.plot").write_bytes(b"2")
+        await asyncio.sleep(0.2)
+        assert not event.is_set()
+        (plot_dirs[0] / "2.plot").rename(plot_dirs[1] / "2.plot")
+        await asyncio.wait_for(event.wait(), 5)
+        waker.close()
+        assert not waker.enabled
@@ -0,0 +1,34 @@
+import random
+
+from chia.util.fenwick_tree import FenwickTree
+
+
+class TestFenwickTree:
+    def test_prefix_sum_and_find(self):
+        random.seed(0)
+        size = 37
+        tree = FenwickTree(size)
+        slots = [0] * size
+        for _ in range(1000):
+            index = random.randrange(size)
+            delta = random.randint(0, 100)
+            if random.random() < 0.3:
+                delta = -min(delta, slots[index])
+            tree.add(index, delta)
+            slots[index] += delta
+
+            end = random.randint(0, size)
+            assert tree.prefix_sum(end) == sum(slots[:end])
+
+            target = random.randint(1, sum(slots) + 10)
+            expected = size
+            for i in range(size):
+                if sum(slots[: i + 1]) >= target:
+                    expected = i
+                    break
+            assert tree.find(target) == expected
+
+    def test_empty(self):
+        tree = FenwickTree(0)
+        assert tree.prefix_sum(0) == 0
+        assert tree.find(1) == 0
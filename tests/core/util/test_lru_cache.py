@@ -1,6 +1,6 @@
 import unittest
 
-from chia.util.lru_cache import LRUCache
+from chia.util.lru_cache import LRUCache, TwoQueueCache
 
 
 class TestLRUCache(unittest.TestCase):
@@ -52,3 +52,88 @@ class TestLRUCache(unittest.TestCase):
         assert len(cache.cache) == 5
         assert cache.get(b"0") is None
         assert cache.get(b"1") == 1
+
+    def test_max_size(self):
+        cache = LRUCache(100, max_size=10)
+        cache.put(b"0", "a", 4)
+        cache.put(b"1", "b", 4)
+        assert cache.size == 8
+        cache.put(b"2", "c", 4)
+        # The least recently used entry is evicted to fit the new one
+        assert cache.get(b"0") is None
+        assert cache.size == 8
+        cache.put(b"1", "bb", 7)
+        assert cache.get(b"2") is None
+        assert cache.size == 7
+        # An entry larger than the cache on its own is still kept
+        cache.put(b"3", "d", 20)
+        assert len(cache) == 1
+        assert cache.get(b"3") == "d"
+        cache.remove(b"3")
+        assert cache.size == 0
+
+        cache = LRUCache(100, max_size=10, size_of=len)
+        cache.put(b"0", b"12345")
+        cache.put(b"1", b"123456")
+        assert cache.get(b"0") is None
+        assert cache.size == 6
+
+    def test_ttl(self):
+        cache = LRUCache(5, ttl=0)
+        cache.put(b"0", 1)
+        assert cache.get(b"0") is None
+        assert len(cache) == 0
+
+        cache = LRUCache(5, ttl=1000)
+        cache.put(b"0", 1)
+        assert cache.get(b"0") == 1
+
+    def test_stats(self):
+        cache = LRUCache(1)
+        cache.put(b"0", 1)
+        cache.get(b"0")
+        cache.get(b"1")
+        cache.put(b"1", 1)
+        stats = cache.get_stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["evictions"] == 1
+        assert stats["entries"] == 1
+
+    def test_two_queue_cache(self):
+        cache = TwoQueueCache(8)
+        for i in range(4):
+            cache.put(i, i)
+        # Reading entries again moves them to the main queue
+        for i in range(4):
+            assert cache.get(i) == i
+        assert len(cache.cache) == 4
+
+        # A scan of keys that are used once only cycles the probation queue
+        for i in range(100, 200):
+            cache.put(i, i)
+        assert len(cache) == 8
+        for i in range(4):
+            assert cache.get(i) == i
+        assert cache.get(100) is None
+        assert cache.get(199) == 199
+
+        # Keys put again shortly after being evicted go straight to the main queue
+        cache.put(195, 195)
+        assert 195 in cache.cache
+
+        assert sorted(key for key, _ in cache.items()) == [0, 1, 2, 3, 195, 197, 198, 199]
+        cache.remove(199)
+        cache.remove(197)
+        assert len(cache) == 6
+        cache.clear()
+        assert len(cache) == 0
+
+    def test_two_queue_cache_max_size(self):
+        cache = TwoQueueCache(100, max_size=100, size_of=len)
+        cache.put(b"0", b"0" * 40)
+        assert cache.get(b"0") is not None
+        for i in range(1, 20):
+            cache.put(bytes([i]), b"1" * 10)
+        assert cache.size <= 100
+        assert cache.get(b"0") is not None
@@ -12,7 +12,7 @@ from chia.types.blockchain_format.program import Program
 from chia.types.blockchain_format.sized_bytes import bytes32
 from chia.types.full_block import FullBlock
 from chia.types.weight_proof import SubEpochChallengeSegment
-from chia.util.ints import uint8, uint32
+from chia.util.ints import uint8, uint32, uint64, uint128
 from chia.util.streamable import (
     Streamable,
     streamable,
@@ -23,6 +23,8 @@ from chia.util.streamable import (
     parse_tuple,
     parse_size_hints,
     parse_str,
+    function_to_parse_from_one_item,
+    function_to_skip_from_one_item,
 )
 from tests.setup_nodes import bt, test_constants
 
@@ -204,6 +206,70 @@ class TestStreamable(unittest.TestCase):
 
         assert A.from_bytes(bytes(A())) == A()
 
+    def test_compiled_parse_and_stream(self):
+        @dataclass(frozen=True)
+        @streamable
+        class TestClassCompiled(Streamable):
+            a: uint32
+            b: bytes32
+            c: uint8
+            d: Optional[Coin]
+            e: List[Tuple[bytes32, Optional[Coin]]]
+            f: bool
+            g: str
+            h: bytes
+            i: uint128
+            j: Program
+
+        coin = Coin(bytes32([1] * 32), bytes32([2] * 32), uint64(3))
+        a = TestClassCompiled(
+            uint32(1),
+            bytes32([3] * 32),
+            uint8(255),
+            coin,
+            [(bytes32([4] * 32), None), (bytes32([5] * 32), coin)],
+            True,
+            "hello",
+            b"goodbye",
+            uint128(2 ** 100),
+            Program.to(binutils.assemble("(q . 1)")),
+        )
+
+        # The compiled streamer writes exactly what the per field stream_one_item writes
+        f = io.BytesIO()
+        for f_name, f_type in TestClassCompiled.__annotations__.items():
+            a.stream_one_item(f_type, getattr(a, f_name), f)
+        assert bytes(a) == f.getvalue()
+
+        # Parsing from a stream leaves it right after the object
+        f = io.BytesIO(bytes(a) + b"next")
+        assert TestClassCompiled.parse(f) == a
+        assert f.read() == b"next"
+
+        with raises(AssertionError):
+            TestClassCompiled.from_bytes(bytes(a) + b"\x00")
+        with raises(AssertionError):
+            TestClassCompiled.from_bytes(bytes(a)[:40])
+
+    def test_skip_from_one_item(self):
+        block = bt.get_consecutive_blocks(3)[-1]
+        blob = bytes(block) + b"next"
+        # Skipping all the fields of a FullBlock ends right after it
+        assert function_to_skip_from_one_item(FullBlock)(memoryview(blob), 0) == len(blob) - 4
+
+        pos = 0
+        for f_name, f_type in FullBlock.__annotations__.items():
+            end = function_to_skip_from_one_item(f_type)(memoryview(blob), pos)
+            value, parsed_end = function_to_parse_from_one_item(f_type)(memoryview(blob), pos)
+            assert value == getattr(block, f_name)
+            assert end == parsed_end
+            pos = end
+
+        with raises(AssertionError):
+            function_to_skip_from_one_item(List[uint32])(memoryview(b"\x00\x00\x00\x02\x00\x00\x00\x01"), 0)
+        with raises(AssertionError):
+            function_to_skip_from_one_item(bytes)(memoryview(b"\x00\x00\x00\x02\x00"), 0)
+
     def test_parse_bool(self):
         assert not parse_bool(io.BytesIO(b"\x00"))
         assert parse_bool(io.BytesIO(b"\x01"))
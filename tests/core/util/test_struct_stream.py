@@ -0,0 +1,59 @@
+import io
+import unittest
+
+from pytest import raises
+
+from chia.types.blockchain_format.sized_bytes import bytes32
+from chia.util.ints import int8, int512, uint8, uint32, uint64, uint128
+
+
+class TestStructStream(unittest.TestCase):
+    def test_round_trip(self):
+        for value in [uint8(255), int8(-128), uint32(2 ** 32 - 1), uint64(2 ** 64 - 1)]:
+            blob = bytes(value)
+            assert len(blob) == type(value).SIZE
+            assert type(value).from_bytes(blob) == value
+            assert type(type(value).from_bytes(blob)) is type(value)
+            assert type(value).parse(io.BytesIO(blob)) == value
+
+        with raises(AssertionError):
+            uint32.from_bytes(b"\x00\x00\x00")
+        with raises(AssertionError):
+            uint32.from_bytes(b"\x00\x00\x00\x00\x00")
+        with raises(ValueError):
+            uint8(256)
+
+    def test_parse_from(self):
+        f = io.BytesIO()
+        for value in [uint32(7), uint64(8), bytes32([1] * 32), uint128(9), int512(-10)]:
+            value.stream(f)
+        buf = f.getbuffer()
+        value, offset = uint32.parse_from(buf, 0)
+        assert value == 7 and type(value) is uint32 and offset == 4
+        value, offset = uint64.parse_from(buf, offset)
+        assert value == 8 and type(value) is uint64 and offset == 12
+        value, offset = bytes32.parse_from(buf, offset)
+        assert value == bytes32([1] * 32) and type(value) is bytes32 and offset == 44
+        value, offset = uint128.parse_from(buf, offset)
+        assert value == 9 and type(value) is uint128 and offset == 60
+        value, offset = int512.parse_from(buf, offset)
+        assert value == -10 and type(value) is int512 and offset == len(buf)
+
+        # EOF
+        with raises(AssertionError):
+            uint64.parse_from(buf, len(buf) - 7)
+        with raises(AssertionError):
+            bytes32.parse_from(buf, len(buf) - 31)
+
+    def test_sized_bytes(self):
+        value = bytes32([3] * 32)
+        assert bytes(value) == bytes([3] * 32)
+        assert type(bytes(value)) is bytes
+        assert bytes32.from_bytes(bytes(value)) == value
+
+        with raises(AssertionError):
+            bytes32.from_bytes(bytes(31))
+
+
+if __name__ == "__main__":
+    unittest.main()
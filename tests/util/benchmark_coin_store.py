@@ -0,0 +1,122 @@
+import asyncio
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from secrets import token_bytes
+
+import aiosqlite
+
+from chia.full_node.coin_store import CoinStore
+from chia.types.blockchain_format.coin import Coin
+from chia.types.blockchain_format.sized_bytes import bytes32
+from chia.util.db_wrapper import DBWrapper
+from chia.util.ints import uint32, uint64
+
+NUM_COINS = 2000000
+NUM_LOOKUPS = 20000
+BATCH = 50000
+
+legacy_db_path = Path("benchmark_coin_store_legacy.db")
+v2_db_path = Path("benchmark_coin_store_v2.db")
+
+
+def db_size(path: Path) -> int:
+    size = 0
+    for suffix in ["", "-wal", "-shm"]:
+        p = Path(str(path) + suffix)
+        if p.exists():
+            size += p.stat().st_size
+    return size
+
+
+async def fill_legacy(connection: aiosqlite.Connection, num_coins: int) -> None:
+    await connection.execute(
+        "CREATE TABLE coin_record(coin_name text PRIMARY KEY, confirmed_index bigint, spent_index bigint,"
+        " spent int, coinbase int, puzzle_hash text, coin_parent text, amount blob, timestamp bigint)"
+    )
+    await connection.execute("CREATE INDEX coin_confirmed_index on coin_record(confirmed_index)")
+    await connection.execute("CREATE INDEX coin_spent_index on coin_record(spent_index)")
+    await connection.execute("CREATE INDEX coin_spent on coin_record(spent)")
+    await connection.execute("CREATE INDEX coin_puzzle_hash on coin_record(puzzle_hash)")
+    for start in range(0, num_coins, BATCH):
+        rows = []
+        for i in range(start, min(start + BATCH, num_coins)):
+            coin = Coin(bytes32(token_bytes(32)), bytes32(token_bytes(32)), uint64(random.randint(1, 2 ** 40)))
+            rows.append(
+                (
+                    coin.name().hex(),
+                    i // 20,
+                    0,
+                    0,
+                    0,
+                    coin.puzzle_hash.hex(),
+                    coin.parent_coin_info.hex(),
+                    bytes(coin.amount),
+                    1600000000 + i,
+                )
+            )
+        await connection.executemany("INSERT INTO coin_record VALUES(?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        await connection.commit()
+
+
+async def time_lookups(coin_store: CoinStore, names, heights) -> float:
+    start = time.time()
+    for name in names:
+        assert (await coin_store.get_coin_record(name)) is not None
+    for height in heights:
+        await coin_store.get_coins_added_at_height(uint32(height))
+    return time.time() - start
+
+
+async def main(num_coins: int) -> None:
+    for path in [legacy_db_path, v2_db_path]:
+        for suffix in ["", "-wal", "-shm"]:
+            p = Path(str(path) + suffix)
+            if p.exists():
+                p.unlink()
+
+    connection = await aiosqlite.connect(legacy_db_path)
+    print(f"Creating legacy table with {num_coins} coins")
+    await fill_legacy(connection, num_coins)
+    cursor = await connection.execute("SELECT coin_name from coin_record ORDER BY random() LIMIT ?", (NUM_LOOKUPS,))
+    names = [bytes32(bytes.fromhex(row[0])) for row in await cursor.fetchall()]
+    await cursor.close()
+    heights = [random.randint(0, num_coins // 20) for _ in range(NUM_LOOKUPS // 10)]
+    await connection.execute("VACUUM")
+    legacy_size = db_size(legacy_db_path)
+
+    # Legacy lookups, through the migration fallback path
+    coin_store = await CoinStore.create(DBWrapper(connection), cache_size=uint32(0))
+    legacy_time = await time_lookups(coin_store, names, heights)
+    await connection.close()
+
+    os.rename(legacy_db_path, v2_db_path)
+    connection = await aiosqlite.connect(v2_db_path)
+    coin_store = await CoinStore.create(DBWrapper(connection), cache_size=uint32(0))
+    start = time.time()
+    migrated = await coin_store.migrate_legacy_records()
+    migration_time = time.time() - start
+    await connection.execute("VACUUM")
+    v2_time = await time_lookups(coin_store, names, heights)
+    # Closing the connection checkpoints the WAL back into the main file
+    await connection.close()
+    v2_size = db_size(v2_db_path)
+
+    print(f"Migrated {migrated} coins in {migration_time:.1f}s")
+    print(f"Legacy: {legacy_size / 2 ** 20:.1f} MiB, {legacy_time:.2f}s for lookups")
+    print(f"v2:     {v2_size / 2 ** 20:.1f} MiB, {v2_time:.2f}s for lookups")
+    for path in [v2_db_path]:
+        for suffix in ["", "-wal", "-shm"]:
+            p = Path(str(path) + suffix)
+            if p.exists():
+                p.unlink()
+
+
+if __name__ == "__main__":
+    """
+    Compares on disk size and get_coin_record / get_coins_added_at_height latency of the legacy hex keyed
+    coin_record table and coin_record_v2. Usage: python -m tests.util.benchmark_coin_store [num_coins]
+    """
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else NUM_COINS))
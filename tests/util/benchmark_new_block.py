@@ -0,0 +1,120 @@
+import asyncio
+import random
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from secrets import token_bytes
+from typing import List, Set, Tuple
+
+import aiosqlite
+
+from chia.full_node.coin_store import CoinStore
+from chia.types.blockchain_format.coin import Coin
+from chia.types.blockchain_format.sized_bytes import bytes32
+from chia.types.coin_record import CoinRecord
+from chia.util.db_wrapper import DBWrapper
+from chia.util.ints import uint32, uint64
+
+NUM_BLOCKS = 2000
+ADDITIONS_PER_BLOCK = 50
+REMOVALS_PER_BLOCK = 50
+SYNC_BATCH = 32
+
+db_path = Path("benchmark_new_block.db")
+
+
+@dataclass(frozen=True)
+class SyntheticFoliageTransactionBlock:
+    timestamp: uint64
+
+
+@dataclass(frozen=True)
+class SyntheticBlock:
+    """
+    Has the parts of a FullBlock that CoinStore.new_block reads, so that blocks with many coins can be
+    generated without farming them.
+    """
+
+    height: uint32
+    foliage_transaction_block: SyntheticFoliageTransactionBlock
+    reward_coins: Tuple[Coin, ...]
+
+    def is_transaction_block(self) -> bool:
+        return True
+
+    def get_included_reward_coins(self) -> Set[Coin]:
+        return set(self.reward_coins)
+
+
+def make_blocks(num_blocks: int) -> List[Tuple[SyntheticBlock, List[Coin], List[bytes32]]]:
+    unspent: List[Coin] = []
+    blocks = []
+    for height in range(1, num_blocks + 1):
+        random.shuffle(unspent)
+        removals = [unspent.pop() for _ in range(min(REMOVALS_PER_BLOCK, len(unspent)))]
+        additions = [
+            Coin(bytes32(token_bytes(32)), bytes32(token_bytes(32)), uint64(0)) for _ in range(ADDITIONS_PER_BLOCK)
+        ]
+        rewards = tuple(
+            Coin(bytes32(token_bytes(32)), bytes32(token_bytes(32)), uint64(random.randint(1, 2 ** 40)))
+            for _ in range(2)
+        )
+        block = SyntheticBlock(uint32(height), SyntheticFoliageTransactionBlock(uint64(1600000000 + height)), rewards)
+        blocks.append((block, additions, [coin.name() for coin in removals]))
+        unspent.extend(additions)
+        unspent.extend(rewards)
+    return blocks
+
+
+async def per_coin_new_block(coin_store: CoinStore, block, tx_additions, tx_removals) -> None:
+    # The coin at a time writes that CoinStore.new_block used to do
+    timestamp = block.foliage_transaction_block.timestamp
+    for coin in tx_additions:
+        await coin_store._add_coin_record(CoinRecord(coin, block.height, uint32(0), False, False, timestamp), False)
+    for coin in block.get_included_reward_coins():
+        await coin_store._add_coin_record(CoinRecord(coin, block.height, uint32(0), False, True, timestamp), False)
+    for coin_name in tx_removals:
+        await coin_store._set_spent(coin_name, block.height)
+
+
+async def replay(blocks, mode: str) -> float:
+    if db_path.exists():
+        db_path.unlink()
+    connection = await aiosqlite.connect(db_path)
+    db_wrapper = DBWrapper(connection)
+    coin_store = await CoinStore.create(db_wrapper)
+    start = time.time()
+    for i in range(0, len(blocks), SYNC_BATCH):
+        batch = blocks[i : i + SYNC_BATCH]
+        await db_wrapper.begin_transaction()
+        if mode == "per_coin":
+            for change in batch:
+                await per_coin_new_block(coin_store, *change)
+        elif mode == "per_block":
+            for change in batch:
+                await coin_store.new_block(*change)
+        else:
+            await coin_store.new_blocks(batch)
+        await db_wrapper.commit_transaction()
+    elapsed = time.time() - start
+    await connection.close()
+    db_path.unlink()
+    return elapsed
+
+
+async def main(num_blocks: int) -> None:
+    blocks = make_blocks(num_blocks)
+    for mode in ["per_coin", "per_block", "batched"]:
+        elapsed = await replay(blocks, mode)
+        print(f"{mode:>10}: {num_blocks / elapsed:.1f} blocks/sec")
+
+
+if __name__ == "__main__":
+    """
+    Replays synthetic blocks with ADDITIONS_PER_BLOCK additions and REMOVALS_PER_BLOCK removals into an empty
+    CoinStore, committing every SYNC_BATCH blocks like long sync does, and reports blocks/sec with the coin at
+    a time writes, CoinStore.new_block and CoinStore.new_blocks.
+    Usage: python -m tests.util.benchmark_new_block [num_blocks]
+    """
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else NUM_BLOCKS))
@@ -0,0 +1,90 @@
+import io
+import sys
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, List, Tuple, Type
+
+from chia.protocols.full_node_protocol import RespondBlocks
+from chia.util.generator_tools import get_block_header
+from chia.util.ints import uint32
+from chia.util.streamable import Streamable
+from tests.setup_nodes import bt
+
+NUM_BLOCKS = 100
+ROUNDS = 20
+
+
+class LegacyBytesIO(io.BytesIO):
+    """
+    Streamable.parse only parses in place from plain BytesIO objects, so this takes the per field path of
+    closures calling read(), that was used for all parsing before compiling parsers.
+    """
+
+
+def legacy_parse(cls: Any, blob: bytes) -> Any:
+    f = LegacyBytesIO(blob)
+    parsed = cls.parse(f)
+    assert f.read() == b""
+    return parsed
+
+
+def legacy_stream_one_item(f_type: Type, item: Any, f: io.BytesIO) -> None:
+    # Streamable.stream before compiling streamers, which inspected the annotations of every object
+    if isinstance(f_type, type) and issubclass(f_type, Streamable):
+        for f_name, inner_type in f_type.__annotations__.items():
+            legacy_stream_one_item(inner_type, getattr(item, f_name), f)
+    else:
+        Streamable.stream_one_item(LEGACY_STREAMER, f_type, item, f)  # type: ignore
+
+
+LEGACY_STREAMER = SimpleNamespace(stream_one_item=legacy_stream_one_item)
+
+
+def legacy_bytes(obj: Streamable) -> bytes:
+    f = io.BytesIO()
+    legacy_stream_one_item(type(obj), obj, f)
+    return f.getvalue()
+
+
+def time_calls(f: Callable, items: List[Any]) -> float:
+    start = time.time()
+    for _ in range(ROUNDS):
+        for item in items:
+            f(item)
+    return time.time() - start
+
+
+def main(num_blocks: int) -> None:
+    blocks = bt.get_consecutive_blocks(num_blocks)
+    header_blocks = [get_block_header(block, [], []) for block in blocks]
+    respond_blocks = [RespondBlocks(uint32(0), uint32(len(blocks) - 1), blocks)]
+    cases: List[Tuple[str, List[Any]]] = [
+        ("FullBlock", blocks),
+        ("HeaderBlock", header_blocks),
+        ("RespondBlocks", respond_blocks),
+    ]
+    for name, objects in cases:
+        cls = type(objects[0])
+        blobs = [bytes(obj) for obj in objects]
+        for obj, blob in zip(objects, blobs):
+            assert blob == legacy_bytes(obj)
+            assert cls.from_bytes(blob) == legacy_parse(cls, blob) == obj
+
+        legacy_stream_time = time_calls(legacy_bytes, objects)
+        stream_time = time_calls(bytes, objects)
+        legacy_parse_time = time_calls(lambda blob: legacy_parse(cls, blob), blobs)
+        parse_time = time_calls(cls.from_bytes, blobs)
+        print(
+            f"{name:>13}: stream {legacy_stream_time:.3f}s -> {stream_time:.3f}s"
+            f" ({legacy_stream_time / stream_time:.2f}x), parse {legacy_parse_time:.3f}s -> {parse_time:.3f}s"
+            f" ({legacy_parse_time / parse_time:.2f}x)"
+        )
+
+
+if __name__ == "__main__":
+    """
+    Serializes and parses FullBlocks, HeaderBlocks and a RespondBlocks message ROUNDS times, with the per field
+    BytesIO code and with the compiled parsers and streamers, and reports the speedup.
+    Usage: python -m tests.util.benchmark_streamable [num_blocks]
+    """
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else NUM_BLOCKS)
@@ -1,6 +1,9 @@
 # flake8: noqa: F811, F401
 import asyncio
+import dataclasses
+import logging
 import sys
+import time
 from typing import Dict, List, Optional, Tuple
 
 import aiosqlite
@@ -39,6 +42,7 @@ from chia.full_node.weight_proof import (  # type: ignore
 )
 from chia.types.full_block import FullBlock
 from chia.types.header_block import HeaderBlock
+from chia.util.hash import std_hash
 from chia.util.ints import uint32, uint64
 from tests.core.fixtures import (
     default_400_blocks,
@@ -48,6 +52,8 @@ from tests.core.fixtures import (
     pre_genesis_empty_slots_1000_blocks,
 )
 
+log = logging.getLogger(__name__)
+
 
 @pytest.fixture(scope="session")
 def event_loop():
@@ -410,6 +416,39 @@ class TestWeightProof:
         assert valid
         assert fork_point == 0
 
+    @pytest.mark.asyncio
+    async def test_weight_proof_validation_workers(self, default_10000_blocks):
+        blocks = default_10000_blocks
+        header_cache, height_to_hash, sub_blocks, summaries = await load_blocks_dont_validate(blocks)
+        wpf = WeightProofHandler(test_constants, BlockCache(sub_blocks, header_cache, height_to_hash, summaries))
+        wp = await wpf.get_proof_of_weight(blocks[-1].header_hash)
+        assert wp is not None
+
+        # The first segment of a sub epoch is used to check the reward chain hash of its summary
+        segments = list(wp.sub_epoch_segments)
+        index = next(i for i, segment in enumerate(segments) if segment.sub_epoch_n > 0)
+        rc_slot_end_info = segments[index].rc_slot_end_info
+        assert rc_slot_end_info is not None
+        bad_rc_slot_end_info = dataclasses.replace(rc_slot_end_info, challenge=std_hash(b"bad"))
+        segments[index] = dataclasses.replace(segments[index], rc_slot_end_info=bad_rc_slot_end_info)
+        wp_bad = dataclasses.replace(wp, sub_epoch_segments=segments)
+
+        for num_workers in [1, 2, 4]:
+            wpf_verify = WeightProofHandler(test_constants, BlockCache(sub_blocks, {}, height_to_hash, {}), num_workers)
+            try:
+                start = time.time()
+                valid, fork_point, _ = await wpf_verify.validate_weight_proof(wp)
+                log.info(
+                    f"Validated weight proof with {len(wp.sub_epoch_segments)} segments with {num_workers} workers "
+                    f"in {time.time() - start}s"
+                )
+                assert valid
+                assert fork_point == 0
+                valid, _, _ = await wpf_verify.validate_weight_proof(wp_bad)
+                assert not valid
+            finally:
+                wpf_verify.shut_down()
+
     @pytest.mark.asyncio
     async def test_check_num_of_samples(self, default_10000_blocks):
         blocks = default_10000_blocks
@@ -424,6 +463,34 @@ class TestWeightProof:
                 samples += 1
         assert samples <= wpf.MAX_SAMPLES
 
+    @pytest.mark.asyncio
+    async def test_weight_proof_incremental(self, default_1000_blocks):
+        blocks = default_1000_blocks
+        header_cache, height_to_hash, sub_blocks, summaries = await load_blocks_dont_validate(blocks)
+        wpf = WeightProofHandler(test_constants, BlockCache(sub_blocks, header_cache, height_to_hash, summaries))
+        wpf_verify = WeightProofHandler(test_constants, BlockCache(sub_blocks, header_cache, height_to_hash, {}))
+        for height in range(500, len(blocks), 100):
+            tip = blocks[height].header_hash
+            start = time.time()
+            wp_bytes = await wpf.get_serialized_proof_of_weight(tip)
+            created = time.time() - start
+            start = time.time()
+            assert await wpf.get_serialized_proof_of_weight(tip) == wp_bytes
+            cached = time.time() - start
+            log.info(f"Weight proof at height {height}: created in {created}s, from the cache in {cached}s")
+
+            wp = await wpf.get_proof_of_weight(tip)
+            assert wp is not None
+            assert bytes(wp) == wp_bytes
+            # Same proof as without the parts of the previous proofs
+            wpf_new = WeightProofHandler(
+                test_constants, BlockCache(sub_blocks, header_cache, height_to_hash, summaries)
+            )
+            assert await wpf_new.get_proof_of_weight(tip) == wp
+            valid, fork_point = wpf_verify.validate_weight_proof_single_proc(wp)
+            assert valid
+            assert fork_point == 0
+
     @pytest.mark.asyncio
     async def test_weight_proof_extend_no_ses(self, default_1000_blocks):
         blocks = default_1000_blocks